@@ -1,138 +1,219 @@
 import streamlit as st
-import pandas as pd
+import json
 import os
-from datetime import datetime
-from io import BytesIO
-
-# --- CONFIGURAZIONE PDF ---
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib import colors
-    PDF_OK = True
-except ImportError:
-    PDF_OK = False
+import pandas as pd
+from datetime import date, datetime, timedelta
+from archivio import backend
+from concorrenza import ConflittoVersione
+from documenti import pdf_scheda_staff, esporta_schede, filtra_staff, cache_pdf
+from dati import FILE_CONFIG, carica_tempi, salva_tempi, statistiche_cache, versione
+from rating import calcola_rating, calcola_status
+from planning import genera_schieramento, leggi_tempi
+from solver import genera_schieramento_ottimo
+from settimana import genera_periodo, carichi_da_tabella, tabella_periodo
+from pms import importa_pms
+from ripiano import ripianifica
+from vincoli import grafo_vincoli
+from zone import registro
+from storico import Storico
+from carico import CV, LIVELLI, SCENARI, picchi, previsione
+from prestazioni import attiva_qui, azzera, conta, misura, rapporto, tabella
+from contabilita import ContabilitaPiano
+from modello import a_ris, da_esito, info, per_zona, righe_pdf, testo_team
 
 st.set_page_config(page_title="Forte Village Housekeeping", layout="wide")
 
+# Pannello Performance nascosto: si apre con ?prestazioni=1 nell'indirizzo, che accende anche
+# le misure, solo per questa sessione e fino alla sua chiusura (FV_PRESTAZIONI=1 le accende
+# per tutto il processo dall'avvio)
+if st.query_params.get("prestazioni") == "1": st.session_state['prestazioni'] = True
+pannello_prestazioni = st.session_state.get('prestazioni', False)
+attiva_qui(pannello_prestazioni)
+conta("rerun")
+st.session_state['n_rerun'] = st.session_state.get('n_rerun', 0) + 1
+
 # --- DATABASE ---
-FILE_STAFF = 'Housekeeping_DB - Staff.csv'
-FILE_CONFIG = 'config_tempi.csv'
 
-lista_hotel = [
-    "Hotel Castello", "Hotel Castello Garden", "Hotel Castello 4 Piano", 
-    "Cala del Forte", "Le Dune", "Villa del Parco", "Hotel Pineta", 
-    "Bouganville", "Le Palme", "Il Borgo", "Le Ville", "Spazi Comuni"
-]
+zone_reg = registro()
+lista_hotel = zone_reg.hotel()
 
+@misura("load_data")
 def load_data():
-    if os.path.exists(FILE_STAFF):
-        df = pd.read_csv(FILE_STAFF)
-        df.columns = [c.strip() for c in df.columns]
-        cols_default = {
-            'Part_Time': 0, 'Jolly': 0, 'Pendolare': 0, 'Riposo_Pref': '',
-            'Viaggia_Con': '', 'Lavora_Bene_Con': 'Nessuna', 'Zone_Padronanza': '',
-            'Professionalita': 5, 'Esperienza': 5, 'Tenuta_Fisica': 5, 
-            'Disponibilita': 5, 'Empatia': 5, 'Capacita_Guida': 5
-        }
-        for col, val in cols_default.items():
-            if col not in df.columns: df[col] = val
-        df['Nome'] = df['Nome'].astype(str).str.strip()
-        return df.fillna("")
-    return pd.DataFrame()
-
-def save_data(df):
-    df.to_csv(FILE_STAFF, index=False)
-
-def get_rating_bar(row):
-    try:
-        if 'overnante' in str(row.get('Ruolo', '')).lower(): return "⭐ (Coord.)"
-        v = (pd.to_numeric(row.get('Professionalita', 5))*0.25 + pd.to_numeric(row.get('Esperienza', 5))*0.20 + 
-             pd.to_numeric(row.get('Tenuta_Fisica', 5))*0.20 + pd.to_numeric(row.get('Disponibilita', 5))*0.15)
-        voto = round((v/2)*2)/2
-        return "🟩"*int(voto) + ("🟨" if (voto%1)>=0.5 else "")
-    except: return "⬜"*5
-
-def pdf_scheda_staff(row):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    w, h = A4
-    p.setFont("Helvetica-Bold", 20); p.drawString(50, h-50, f"SCHEDA COLLABORATRICE: {row['Nome']}")
-    p.line(50, h-60, 540, h-60)
-    
-    y = h-90
-    p.setFont("Helvetica-Bold", 12); p.drawString(50, y, f"RUOLO: {row['Ruolo']}")
-    y -= 20; p.setFont("Helvetica", 11); p.drawString(50, y, f"Zone Padronanza: {row['Zone_Padronanza']}")
-    y -= 30
-    
-    p.setFont("Helvetica-Bold", 12); p.drawString(50, y, "DETTAGLI OPERATIVI:")
-    y -= 20; p.setFont("Helvetica", 11)
-    p.drawString(60, y, f"- Part-Time: {'SI' if row['Part_Time'] else 'NO'}")
-    p.drawString(200, y, f"- Jolly: {'SI' if row['Jolly'] else 'NO'}")
-    y -= 20
-    p.drawString(60, y, f"- Pendolare: {'SI' if row['Pendolare'] else 'NO'}")
-    p.drawString(200, y, f"- Viaggia con: {row['Viaggia_Con']}")
-    y -= 20
-    p.drawString(60, y, f"- Partner Preferito: {row['Lavora_Bene_Con']}")
-    p.drawString(200, y, f"- Riposo Pref: {row['Riposo_Pref']}")
-    
-    y -= 40
-    p.setFont("Helvetica-Bold", 12); p.drawString(50, y, "VALUTAZIONI (1-10):")
-    y -= 20; p.setFont("Helvetica", 11)
-    voci = [("Professionalità", 'Professionalita'), ("Esperienza", 'Esperienza'), ("Tenuta Fisica", 'Tenuta_Fisica'), 
-            ("Disponibilità", 'Disponibilita'), ("Empatia", 'Empatia'), ("Capacità Guida", 'Capacita_Guida')]
-    for label, col in voci:
-        p.drawString(60, y, f"{label}: {row[col]}/10")
-        y -= 15
-        
-    p.save(); buffer.seek(0)
-    return buffer
-
-def genera_pdf_planning(data_str, schieramento, split_list, lista_assenti):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    w, h = A4
-    p.setFont("Helvetica-Bold", 18); p.drawString(50, h-50, f"PLANNING - {data_str}")
-    p.line(50, h-60, 540, h-60); y = h-85
-    if lista_assenti:
-        p.setFont("Helvetica-Bold", 10); p.setFillColorRGB(0.7, 0, 0)
-        p.drawString(50, y, f"🛌 ASSENTI: {', '.join(lista_assenti)}")
-        y -= 25; p.setFillColorRGB(0,0,0)
-    for res in schieramento:
-        if y < 100: p.showPage(); y = h-70
-        p.setFont("Helvetica-Bold", 12); p.drawString(50, y, f"ZONA: {res['Hotel'].upper()}")
-        y -= 15; p.setFont("Helvetica", 10); p.drawString(60, y, f"Team: {res['Team']}")
-        y -= 25
-    p.save(); buffer.seek(0)
-    return buffer
+    return backend().carica()
 
-df = load_data()
-nomi_db = sorted(df['Nome'].unique().tolist()) if not df.empty else []
+# --- EDITOR A TABELLA ---
+# Ogni tabella è un solo data_editor dentro un fragment: una modifica riesegue solo il
+# fragment e applica allo stato il diff (edited_rows) invece di rileggere tutti i campi.
 
-# --- TABS ---
-t_dash, t_staff, t_tempi, t_plan = st.tabs(["🏆 Dashboard", "👥 Anagrafica Staff", "⚙️ Tempi", "🚀 Planning"])
+COLS_CARICHI = ["AI", "FI", "AG", "FG", "COP", "BIAN"]
+COLS_TEMPI = ["AI", "FI", "AG", "FG"]
+ETICHETTE = {"AI": "ARR I", "FI": "FERM I", "AG": "ARR G", "FG": "FERM G", "COP": "COP", "BIAN": "BIANC"}
+
+def applica_modifiche(base, modifiche):
+    """Copia di base (DataFrame) con le celle di edited_rows applicate."""
+    out = base.copy()
+    for i, celle in modifiche.get("edited_rows", {}).items():
+        for c, v in celle.items():
+            out.iloc[int(i), out.columns.get_loc(c)] = 0 if v is None else v
+    return out
+
+def _aggiorna_carichi():
+    mod = applica_modifiche(st.session_state['carichi_base'], st.session_state['ed_carichi'])
+    st.session_state['cur_inp'] = {h: {c: int(r[c]) for c in COLS_CARICHI} for h, r in mod.iterrows()}
+
+@st.fragment
+def editor_carichi():
+    if 'cur_inp' not in st.session_state:
+        st.session_state['cur_inp'] = {h: dict.fromkeys(COLS_CARICHI, 0) for h in lista_hotel}
+    if 'ed_carichi' not in st.session_state:
+        # Editor nuovo (primo avvio, import PMS, ritorno sul tab): si riparte dai carichi correnti
+        st.session_state['carichi_base'] = pd.DataFrame.from_dict(st.session_state['cur_inp'], orient="index")[COLS_CARICHI].rename_axis("ALBERGO")
+    st.data_editor(st.session_state['carichi_base'], key="ed_carichi", on_change=_aggiorna_carichi, use_container_width=True,
+                   column_config={c: st.column_config.NumberColumn(ETICHETTE[c], min_value=0, max_value=100, step=1) for c in COLS_CARICHI})
+
+@st.fragment
+def editor_tempi(base_t):
+    ed = st.data_editor(base_t, key="ed_tempi", hide_index=True, use_container_width=True, disabled=["HOTEL"],
+                        column_config={c: st.column_config.NumberColumn(ETICHETTE[c], min_value=5, max_value=120, step=1) for c in COLS_TEMPI})
+    # Le modifiche non salvate restano in bozza anche cambiando tab
+    if st.session_state['ed_tempi'].get("edited_rows"): st.session_state['tempi_bozza'] = ed
+    else: st.session_state.pop('tempi_bozza', None)
+    if st.button("💾 Salva Tempi"):
+        try:
+            # Solo le righe cambiate rispetto a quando si è aperto l'editor, sopra il file attuale
+            salva_tempi(ed, FILE_CONFIG, st.session_state.get('tempi_origine'))
+        except ConflittoVersione as e:
+            st.session_state['tempi_conflitto'] = str(e)
+        else:
+            st.session_state['tempi_salvati'] = True
+            ricarica_tempi()
+        st.rerun()
+
+def ricarica_tempi():
+    for k in ('tempi_bozza', 'tempi_base', 'tempi_origine', 'tempi_conflitto', 'ed_tempi'): st.session_state.pop(k, None)
 
-with t_dash:
+# --- MEMO DELLE SEZIONI ---
+# I risultati di una sezione restano in sessione finché non cambiano i suoi ingressi.
+# La cache di dati restituisce a ogni rerun una copia nuova delle tabelle: per staff e
+# tempi l'ingresso è quindi la firma del file (dati.versione), non il DataFrame.
+
+def memo(nome, calcola, *ingressi):
+    """calcola() rieseguita solo quando cambia uno degli ingressi (altro oggetto o valore diverso)."""
+    k = f"_memo_{nome}"
+    v = st.session_state.get(k)
+    if v is None or len(v[0]) != len(ingressi) or not all(a is b or (isinstance(a, (str, int, float, tuple, date)) and a == b)
+                                                         for a, b in zip(v[0], ingressi)):
+        conta(f"memo_{nome}")
+        v = st.session_state[k] = (ingressi, calcola())
+    return v[1]
+
+def grafo_staff():
+    return memo("grafo", lambda: grafo_vincoli(df, lista_hotel, zone_reg.unite()), ver_staff) if not df.empty else None
+
+def _tabella_dashboard():
+    df_v = df.copy()
+    rt = calcola_rating(df_v)
+    df_v['Rating'] = rt['Rating']
+    df_v['Status'] = calcola_status(df_v)
+    non_validi = rt['Errori'] != ""
+    avviso = "; ".join(f"{n} ({e})" for n, e in zip(df_v.loc[non_validi, 'Nome'], rt.loc[non_validi, 'Errori']))
+    return df_v[['Status', 'Nome', 'Ruolo', 'Rating', 'Zone_Padronanza', 'Lavora_Bene_Con']], avviso
+
+def _storico(sto, per_st):
+    rot = sto.rotazione_zone(*per_st)
+    return (sto.carico_persone(*per_st), sto.ore_zone(*per_st).set_index("Zona")["Ore"],
+            rot.pivot(index="Nome", columns="Zona", values="Volte").fillna(0).astype(int))
+
+def _tabella_tempi():
+    tempi = leggi_tempi(carica_tempi(FILE_CONFIG), lista_hotel)
+    return pd.DataFrame([{"HOTEL": h.upper(), **{k: int(v) for k, v in tempi[h].items()}} for h in lista_hotel])
+
+def _leggi_export(f):
+    """Contenuto del file temporaneo di un export, letto solo al clic sul download; poi il
+    file viene chiuso (e quindi cancellato)."""
+    with f:
+        f.seek(0)
+        return f.read()
+
+def _contabilita(piano, spl_fin, assenti, grafo):
+    cont = ContabilitaPiano(piano, st.session_state.get('fabb_v_fin') or {}, df, assenti, spl_fin,
+                            st.session_state.get('carico_spezzati_ore', 0.0), grafo)
+    # Ricostruita (nuovi assenti, ritorno sul tab): si riapplicano le modifiche già fatte
+    for z in list(cont.squadre):
+        s = st.session_state.get(f"e_{z}")
+        if s is not None: cont.sostituisci(z, s)
+    return cont
+
+def _modifica_squadra(z):
+    # Callback del multiselect: gira prima del rerun, quindi i riquadri sopra sono già aggiornati
+    cont = st.session_state.get("_memo_contabilita")
+    if cont is not None: cont[1].sostituisci(z, st.session_state[f"e_{z}"])
+
+# Streamlit scarta lo stato dei widget non disegnati nel rerun: questi restano in sessione
+# anche mentre il loro tab è chiuso. I valori iniziali si danno con setdefault, non con value=.
+WIDGET_RICORDATI = ("sel_staff", "per_storico", "data_p", "assenti", "modo", "t_max", "per_sett")
+
+def ricorda_widget():
+    for k in [k for k in st.session_state if k in WIDGET_RICORDATI or str(k).startswith("e_")]:
+        st.session_state[k] = st.session_state[k]
+
+# --- SEZIONI ---
+# Ogni tab è una funzione chiamata solo se il tab è aperto: st.tabs da solo nasconde il
+# contenuto ma lo calcola lo stesso a ogni rerun.
+
+def tab_dashboard():
     st.header("🏆 Performance Staff")
     if not df.empty:
-        df_v = df.copy()
-        df_v['Rating'] = df_v.apply(get_rating_bar, axis=1)
-        df_v['Status'] = df_v.apply(lambda r: ("🃏 " if r['Jolly'] else "") + ("🚌 " if r['Pendolare'] else ""), axis=1)
-        st.dataframe(df_v[['Status', 'Nome', 'Ruolo', 'Rating', 'Zone_Padronanza', 'Lavora_Bene_Con']], use_container_width=True, hide_index=True)
+        tab_v, avviso = memo("dashboard", _tabella_dashboard, ver_staff)
+        if avviso:
+            st.warning("⚠️ Valutazioni non valide: " + avviso)
+        st.dataframe(tab_v, use_container_width=True, hide_index=True)
+        if df.attrs.get('problemi'):
+            st.warning("⚠️ Dati staff da sistemare: " + "; ".join(df.attrs['problemi']))
+        problemi = grafo_staff().problemi()
+        if problemi:
+            with st.expander(f"🔗 Vincoli da sistemare ({len(problemi)})"):
+                st.write("\n".join(f"- {p}" for p in problemi))
 
-with t_staff:
+    with st.expander("📚 Storico planning"):
+        sto = Storico()
+        primo, ultimo = sto.giorni()
+        if primo is None:
+            st.info("Nessun planning archiviato: si archivia scaricando il PDF del planning.")
+        else:
+            primo, ultimo = (datetime.strptime(x, "%Y-%m-%d").date() for x in (primo, ultimo))
+            st.session_state.setdefault("per_storico", (max(primo, ultimo - timedelta(days=30)), ultimo))
+            per_st = st.date_input("Intervallo:", min_value=primo, max_value=ultimo, format="DD/MM/YYYY", key="per_storico")
+            if len(per_st) == 2:
+                # Ricalcolato solo se cambia l'intervallo o se lo storico è stato scritto
+                carico, ore, rot = memo("storico", lambda: _storico(sto, per_st), tuple(per_st), os.stat(sto.path).st_mtime_ns)
+                c_s1, c_s2 = st.columns(2)
+                with c_s1:
+                    st.subheader("👤 Carico per persona")
+                    st.dataframe(carico, use_container_width=True, hide_index=True)
+                with c_s2:
+                    st.subheader("🏨 Ore per hotel")
+                    st.bar_chart(ore)
+                st.subheader("🔄 Rotazione zone")
+                st.dataframe(rot, use_container_width=True)
+
+def tab_anagrafica():
     st.header("📝 Scheda Personale Collaboratrici")
-    sel_n = st.selectbox("Seleziona collaboratrice per modificare:", ["--- NUOVA ---"] + nomi_db)
+    if st.session_state.get("sel_staff") not in nomi_db: st.session_state.pop("sel_staff", None)
+    sel_n = st.selectbox("Seleziona collaboratrice per modificare:", ["--- NUOVA ---"] + nomi_db, key="sel_staff")
     curr = None
     if sel_n != "--- NUOVA ---":
         match = df[df['Nome'] == sel_n]
         if not match.empty: curr = match.iloc[0]
+    # Versione della scheda quando è stata aperta: il salvataggio fallisce se nel frattempo è cambiata
+    if st.session_state.get('versione_scheda', (None,))[0] != sel_n:
+        st.session_state['versione_scheda'] = (sel_n, str(curr['Ultima_Modifica']) if curr is not None else "")
     
     with st.form("form_staff_definitivo"):
         c1, c2, c3 = st.columns(3)
         f_nome = c1.text_input("Nome e Cognome", value=str(curr['Nome']) if curr is not None else "")
         f_ruolo = c2.selectbox("Ruolo", ["Cameriera", "Governante"], index=1 if curr is not None and "overnante" in str(curr['Ruolo']).lower() else 0)
-        def_padro = [z.strip() for z in str(curr['Zone_Padronanza']).split(",") if z.strip() in lista_hotel] if curr is not None else []
+        def_padro = list(dict.fromkeys(zone_reg.canonico(z) for z in str(curr['Zone_Padronanza']).split(",") if zone_reg.canonico(z) in lista_hotel)) if curr is not None else []
         f_padro = c3.multiselect("Zone di Padronanza", lista_hotel, default=def_padro)
         
         st.divider()
@@ -172,176 +253,236 @@ with t_staff:
                     "Professionalita": f_prof, "Esperienza": f_esp, "Tenuta_Fisica": f_ten,
                     "Disponibilita": f_dis, "Empatia": f_emp, "Capacita_Guida": f_gui
                 }
-                df = pd.concat([df[df['Nome'] != (curr['Nome'] if curr is not None else "---")], pd.DataFrame([nuova_r])], ignore_index=True)
-                save_data(df); st.success(f"Dati salvati!"); st.rerun()
+                try:
+                    backend().upsert(nuova_r, curr['Nome'] if curr is not None else None, st.session_state['versione_scheda'][1])
+                except ConflittoVersione as e:
+                    # Alla prossima apertura si riparte dalla versione attuale
+                    st.session_state.pop('versione_scheda', None)
+                    st.error(f"⚠️ Scheda non salvata: {e}. Ricarica la scheda e ripeti le modifiche.")
+                else:
+                    st.session_state.pop('versione_scheda', None)
+                    st.success(f"Dati salvati!"); st.rerun()
 
     if curr is not None:
         if st.button("📄 GENERA PDF SCHEDA"):
             pdf_s = pdf_scheda_staff(curr)
             st.download_button(f"📥 Scarica {curr['Nome']}", pdf_s, f"Scheda_{curr['Nome']}.pdf")
 
-with t_tempi:
+    with st.expander("📦 Esporta tutte le schede"):
+        c_e1, c_e2, c_e3 = st.columns([1, 2, 1])
+        f_ruoli = c_e1.multiselect("Ruolo", ["Cameriera", "Governante"])
+        f_zone = c_e2.multiselect("Zona di padronanza", lista_hotel)
+        f_form = c_e3.radio("Formato", ["PDF unico", "ZIP"], horizontal=True)
+        if st.button("📦 ESPORTA SCHEDE") and not df.empty:
+            sel = filtra_staff(df, f_ruoli, f_zone)
+            barra = st.progress(0.0)
+            exp = esporta_schede(sel, "zip" if f_form == "ZIP" else "pdf", avanzamento=lambda a, b: barra.progress(a / b, f"{a}/{b} schede"))
+            st.caption(f"{exp['pagine']} schede in {exp['secondi']}s ({exp['pagine_al_s'] or 0:.0f} pagine/s)")
+            est = "zip" if f_form == "ZIP" else "pdf"
+            st.download_button("📥 DOWNLOAD SCHEDE", lambda f=exp['file']: _leggi_export(f), f"Schede_staff.{est}",
+                               mime="application/zip" if est == "zip" else "application/pdf")
+
+def tab_tempi():
     st.header("⚙️ Tempi Standard (Minuti)")
     st.info("**Legenda:** ARR I: Arrivi Ind. | FERM I: Fermate Ind. | ARR G: Arrivi Gruppo | FERM G: Fermate Gruppo")
     st.caption("Nota: Coperture (1/3 fermata) e Cambio Biancheria (1/4 fermata) sono calcolati automaticamente.")
     
-    c_df = pd.read_csv(FILE_CONFIG) if os.path.exists(FILE_CONFIG) else pd.DataFrame()
-    new_c = []
-    
-    # Intestazioni colonne
-    h_cols = st.columns([2, 1, 1, 1, 1])
-    h_cols[0].write("**ALBERGO**")
-    h_cols[1].write("**ARR I**")
-    h_cols[2].write("**FERM I**")
-    h_cols[3].write("**ARR G**")
-    h_cols[4].write("**FERM G**")
-
-    for h in lista_hotel:
-        r = st.columns([2, 1, 1, 1, 1])
-        r[0].write(f"**{h}**")
-        m_ai, m_fi, m_ag, m_fg = 60, 30, 45, 25
-        if not c_df.empty:
-            tr = c_df[c_df['HOTEL'] == h.upper()] if 'HOTEL' in c_df.columns else c_df[c_df.iloc[:,0] == h]
-            if not tr.empty:
-                m_ai = tr.iloc[0].get('AI', 60); m_fi = tr.iloc[0].get('FI', 30)
-                m_ag = tr.iloc[0].get('AG', 45); m_fg = tr.iloc[0].get('FG', 25)
-        
-        v_ai = r[1].number_input("AI", 5, 120, int(m_ai), key=f"t_ai_{h}", label_visibility="collapsed")
-        v_fi = r[2].number_input("FI", 5, 120, int(m_fi), key=f"t_fi_{h}", label_visibility="collapsed")
-        v_ag = r[3].number_input("AG", 5, 120, int(m_ag), key=f"t_ag_{h}", label_visibility="collapsed")
-        v_fg = r[4].number_input("FG", 5, 120, int(m_fg), key=f"t_fg_{h}", label_visibility="collapsed")
-        new_c.append({"HOTEL": h.upper(), "AI": v_ai, "FI": v_fi, "AG": v_ag, "FG": v_fg})
+    if st.session_state.pop('tempi_salvati', False): st.success("Tempi salvati correttamente!")
+    if 'tempi_conflitto' in st.session_state:
+        st.error(f"⚠️ Tempi non salvati: {st.session_state['tempi_conflitto']}. Ricarica e ripeti le modifiche.")
+        st.button("🔄 Ricarica dal file", on_click=ricarica_tempi)
+    if 'ed_tempi' not in st.session_state or 'tempi_base' not in st.session_state:
+        # Editor nuovo: si riparte dalla bozza non salvata, se c'è, altrimenti dal file
+        bozza = st.session_state.get('tempi_bozza')
+        if bozza is None or 'tempi_origine' not in st.session_state:
+            bozza = st.session_state['tempi_origine'] = memo("tempi", _tabella_tempi, versione(FILE_CONFIG))
+        st.session_state['tempi_base'] = bozza
+    editor_tempi(st.session_state['tempi_base'])
+
+def tab_planning():
+    grafo = grafo_staff()
+    st.header("🚀 Generazione Planning")
+    c_d, c_a = st.columns([1, 2])
+    st.session_state.setdefault("data_p", datetime.now().date())
+    data_p = c_d.date_input("Data Planning:", format="DD/MM/YYYY", key="data_p")
+    data_p_str = data_p.strftime("%d/%m/%Y")
     
-    if st.button("💾 Salva Tempi"):
-        pd.DataFrame(new_c).to_csv(FILE_CONFIG, index=False)
-        st.success("Tempi salvati correttamente!")
-    with t_plan:
-        st.header("🚀 Generazione Planning")
-        c_d, c_a = st.columns([1, 2])
-        data_p = c_d.date_input("Data Planning:", datetime.now(), format="DD/MM/YYYY")
-        data_p_str = data_p.strftime("%d/%m/%Y")
-        
-        assenti = c_a.multiselect("🛌 Assenti/Riposi:", nomi_db)
-        
-        st.divider()
-        
-        # --- INTESTAZIONI ---
-        hp = st.columns([2, 1, 1, 1, 1, 1, 1])
-        hp[0].write("**ALBERGO**"); hp[1].write("**ARR I**"); hp[2].write("**FERM I**")
-        hp[3].write("**ARR G**"); hp[4].write("**FERM G**"); hp[5].write("**COP**"); hp[6].write("**BIANC**")
+    if "assenti" in st.session_state: st.session_state["assenti"] = [n for n in st.session_state["assenti"] if n in nomi_db]
+    assenti = c_a.multiselect("🛌 Assenti/Riposi:", nomi_db, key="assenti")
     
-        cur_inp = {}
-        for h in lista_hotel:
-            r = st.columns([2, 1, 1, 1, 1, 1, 1])
-            r[0].write(f"**{h}**")
-            cur_inp[h] = {
-                "AI": r[1].number_input("AI", 0, 100, 0, key=f"p_ai_{h}", label_visibility="collapsed"),
-                "FI": r[2].number_input("FI", 0, 100, 0, key=f"p_fi_{h}", label_visibility="collapsed"),
-                "AG": r[3].number_input("AG", 0, 100, 0, key=f"p_ag_{h}", label_visibility="collapsed"),
-                "FG": r[4].number_input("FG", 0, 100, 0, key=f"p_fg_{h}", label_visibility="collapsed"),
-                "COP": r[5].number_input("COP", 0, 100, 0, key=f"p_co_{h}", label_visibility="collapsed"),
-                "BIAN": r[6].number_input("BIAN", 0, 100, 0, key=f"p_bi_{h}", label_visibility="collapsed")
-            }
+    st.divider()
     
-        if st.button("🚀 GENERA SCHIERAMENTO", use_container_width=True):
-            ris = []
-            conf_df = pd.read_csv(FILE_CONFIG) if os.path.exists(FILE_CONFIG) else pd.DataFrame()
-            if not conf_df.empty:
-                conf_df.columns = [str(c).strip().upper() for c in conf_df.columns]
-            
-            attive_calc = df[~df['Nome'].isin(assenti)].copy()
-            pool_spl = attive_calc[attive_calc['Ruolo'] == 'Cameriera']['Nome'].head(4).tolist()
-            st.session_state['spl_v_fin'] = pool_spl
-            
-            fabb = {}
-            minuti_extra_tot = 0 # Inizializziamo il contatore per COP e BIANC
-            
-            for h in lista_hotel:
-                m = conf_df[conf_df['HOTEL'] == h.upper()] if not conf_df.empty else pd.DataFrame()
-                m_fi = m.iloc[0].get('FI', 30) if not m.empty else 30
-                m_ai = m.iloc[0].get('AI', 60) if not m.empty else 60
-                m_ag = m.iloc[0].get('AG', 45) if not m.empty else 45
-                m_fg = m.iloc[0].get('FG', 25) if not m.empty else 25
-                
-                # Calcolo minuti extra richiesti
-                t_cop = (m_fi / 3) * cur_inp[h]["COP"]
-                t_bian = (m_fi / 4) * cur_inp[h]["BIAN"]
-                
-                # Sommiamo al carico degli spezzati
-                minuti_extra_tot += (t_cop + t_bian)
-                
-                fabb[h] = (cur_inp[h]["AI"]*m_ai + cur_inp[h]["FI"]*m_fi + cur_inp[h]["AG"]*m_ag + cur_inp[h]["FG"]*m_fg + t_cop + t_bian) / 60
+    f_pms = st.file_uploader("📥 Importa carichi dal PMS (CSV o Excel)", type=["csv", "xlsx"])
+    if f_pms is not None and st.session_state.get('pms_file') != f_pms.file_id:
+        try:
+            imp = importa_pms(f_pms, zone=lista_hotel, nome=f_pms.name)
+            st.session_state['cur_inp'] = imp['carichi']
+            st.session_state.pop('ed_carichi', None)
+            st.session_state['pms_file'] = f_pms.file_id
+            st.success(f"Importate {imp['righe']} camere in {imp['secondi']}s"
+                       + (f" | ⚠️ {imp['fuori_zona']} fuori zona" if imp['fuori_zona'] else "")
+                       + (f" | ⚠️ {imp['stato_ignoto']} con stato sconosciuto" if imp['stato_ignoto'] else ""))
+        except (ValueError, ImportError) as e:
+            st.error(f"Importazione PMS non riuscita: {e}")
+    editor_carichi()
+    cur_inp = st.session_state['cur_inp']
     
-            # Salviamo il carico extra nello stato per visualizzarlo dopo il rerun
-            st.session_state['carico_spezzati_ore'] = round(minuti_extra_tot / 60, 1)
+    c_m, c_t = st.columns([2, 1])
+    st.session_state.setdefault("t_max", 0.5)
+    modo = c_m.radio("Modalità:", ["Greedy", "Ottimo (solver)"], horizontal=True, key="modo")
+    t_max = c_t.number_input("Tempo max solver (s)", 0.1, 10.0, step=0.1, disabled=modo == "Greedy", key="t_max")
     
-            fabb["Palme & Garden"] = fabb.get("Le Palme", 0) + fabb.get("Hotel Castello Garden", 0)
-            z_ord = ["Hotel Castello", "Hotel Castello 4 Piano", "Palme & Garden"] + [h for h in lista_hotel if h not in ["Hotel Castello", "Hotel Castello 4 Piano", "Le Palme", "Hotel Castello Garden"]]
-            
-            gia_a = set()
-            for zona in z_ord:
-                o_n, t_h, o_f = fabb.get(zona, 0), [], 0
-                gv = attive_calc[(attive_calc['Ruolo'] == 'Governante') & (~attive_calc['Nome'].isin(gia_a))]
-                for _, g in gv[gv['Zone_Padronanza'].str.contains(zona.replace("Hotel ", ""), case=False, na=False)].iterrows():
-                    t_h.append(f"⭐ {g['Nome']} (Gov.)"); gia_a.add(g['Nome'])
-                
-                cand = attive_calc[(attive_calc['Ruolo'] == 'Cameriera') & (~attive_calc['Nome'].isin(gia_a))].copy()
-                for _, p in cand.iterrows():
-                    if o_f < (o_n if o_n > 0 else 7.5):
-                        is_pt = str(p.get('Part_Time', '0')) in ['1', '1.0', 'True']
-                        ico = "🌙 " if p['Nome'] in pool_spl else ("🕒 " if is_pt else "")
-                        t_h.append(f"{ico}{p['Nome']}"); gia_a.add(p['Nome'])
-                        o_f += 5.0 if ico != "" else 7.5
-                    else: break
-                
-                if t_h:
-                    n_gov = len([n for n in t_h if "⭐" in n])
-                    n_cam = len(t_h) - n_gov
-                    n_spl = len([n for n in t_h if "🌙" in n])
-                    n_pt = len([n for n in t_h if "🕒" in n])
-                    n_std = n_cam - n_spl - n_pt
-                    info = f"G:{n_gov} | Cam:{n_cam} (Coppie:{n_cam/2}) | Pome:{n_std} | 🕒:{n_pt} 🌙:{n_spl}"
-                    ris.append({"Hotel": zona, "Team": ", ".join(t_h), "Req": round(o_n, 1), "Info": info})
-            
-            st.session_state['res_v_fin'] = ris
-            st.rerun()
+    def salva_esito(esito):
+        st.session_state['solver_info'] = esito.get('solver')
+        st.session_state['spl_v_fin'] = esito['spl']
+        st.session_state['serale_v_fin'] = esito.get('serale', [])
+        # Salviamo il carico extra nello stato per visualizzarlo dopo il rerun
+        st.session_state['carico_spezzati_ore'] = esito['carico_spezzati_ore']
+        # Un record per persona: le stringhe con le icone si compongono solo a video
+        st.session_state['piano_v_fin'] = da_esito(esito)
+        st.session_state['fabb_v_fin'] = esito['fabb']
+        st.session_state['spost_v_fin'] = esito.get('spostamenti')
+        for k in [k for k in st.session_state if str(k).startswith("e_")]: del st.session_state[k]
+
+    c_g, c_r = st.columns([3, 1])
+    if c_g.button("🚀 GENERA SCHIERAMENTO", use_container_width=True):
+        conf_df = carica_tempi(FILE_CONFIG)
+        recenti = Storico().spezzati_recenti(data_p)
+        if modo == "Greedy":
+            esito = genera_schieramento(df, conf_df, cur_inp, assenti, lista_hotel, grafo, recenti)
+        else:
+            esito = genera_schieramento_ottimo(df, conf_df, cur_inp, assenti, lista_hotel, tempo_max=t_max, grafo=grafo, recenti=recenti)
+        salva_esito(esito)
+        st.rerun()
+    if c_r.button("🔁 RIPIANIFICA", use_container_width=True, disabled='piano_v_fin' not in st.session_state,
+                  help="Ricalcola solo le zone cambiate; le squadre modificate a mano restano fissate"):
+        piano, fabb_p = st.session_state['piano_v_fin'], st.session_state.get('fabb_v_fin') or {}
+        prev = {"ris": a_ris(piano, fabb_p), "spl": st.session_state.get('spl_v_fin', []), "fabb": fabb_p}
+        fissati = {}
+        for z, aa in per_zona(piano).items():
+            scelte = st.session_state.get(f"e_{z}")
+            if scelte is not None and scelte != [a.nome for a in aa]: fissati[z] = scelte
+        salva_esito(ripianifica(prev, df, carica_tempi(FILE_CONFIG), cur_inp, assenti, lista_hotel, fissati, grafo,
+                                Storico().spezzati_recenti(data_p)))
+        st.rerun()
+
+    with st.expander("📅 Planning settimanale (riposi automatici)"):
+        c_s1, c_s2 = st.columns([1, 2])
+        st.session_state.setdefault("per_sett", (data_p, data_p + timedelta(days=6)))
+        per = c_s1.date_input("Periodo:", format="DD/MM/YYYY", key="per_sett")
+        f_car = c_s2.file_uploader("Carichi per giorno (CSV Data, Hotel, AI, FI, AG, FG, COP, BIAN) — senza file valgono quelli sopra per ogni giorno", type="csv")
+        if st.button("📅 GENERA SETTIMANA", use_container_width=True) and len(per) == 2:
+            carichi = carichi_da_tabella(pd.read_csv(f_car)) if f_car else cur_inp
+            # Gli assenti scelti sopra valgono per la data del planning, se cade nel periodo
+            ris_s = genera_periodo(df, carica_tempi(FILE_CONFIG), carichi, per[0], per[1],
+                                   assenti_giorno={data_p: assenti} if per[0] <= data_p <= per[1] else None,
+                                   modo="ottimo" if modo != "Greedy" else "greedy", tempo_max=t_max,
+                                   recenti=Storico().spezzati_recenti(per[0]))
+            st.session_state['sett_v_fin'] = (tabella_periodo(df, ris_s), ris_s['sforamenti'])
+        if 'sett_v_fin' in st.session_state:
+            tab_s, sfor = st.session_state['sett_v_fin']
+            if sfor: st.warning("🕒 Part-time oltre il tetto settimanale: " + ", ".join(sfor))
+            st.dataframe(tab_s, use_container_width=True)
+            st.download_button("📥 CSV SETTIMANA", tab_s.to_csv().encode("utf-8"), "Planning_settimana.csv")
+
+    with st.expander("📈 Previsione personale (Monte Carlo)"):
+        c_p1, c_p2, c_p3 = st.columns([2, 1, 1])
+        f_prev = c_p1.file_uploader("Carichi previsti per giorno (CSV Data, Hotel, AI, FI, AG, FG, COP, BIAN) — senza file valgono quelli sopra", type="csv", key="f_prev")
+        n_sc = c_p2.number_input("Scenari", 100, 20000, SCENARI, step=500)
+        cv = c_p3.number_input("Variabilità occupazione (cv)", 0.0, 1.0, CV, step=0.05)
+        livelli = st.multiselect("Livelli di confidenza", [0.5, 0.8, 0.9, 0.95, 0.99], default=list(LIVELLI), format_func=lambda q: f"{q:.0%}")
+        if st.button("📈 SIMULA", use_container_width=True) and livelli:
+            carichi = carichi_da_tabella(pd.read_csv(f_prev)) if f_prev else cur_inp
+            st.session_state['prev_v_fin'] = previsione(carichi, carica_tempi(FILE_CONFIG), sorted(livelli), int(n_sc), cv, lista_hotel=lista_hotel)
+        if 'prev_v_fin' in st.session_state:
+            pv = st.session_state['prev_v_fin']
+            st.caption(f"{pv['scenari']} scenari x {pv['giorni']} giorni in {pv['secondi']}s"
+                       + (" | per ogni zona il giorno peggiore del periodo" if pv['giorni'] > 1 else ""))
+            st.dataframe(picchi(pv['tabella']) if pv['giorni'] > 1 else pv['tabella'].drop(columns="Data"), use_container_width=True, hide_index=True)
+            st.download_button("📥 CSV PREVISIONE", pv['tabella'].to_csv(index=False).encode("utf-8"), "Previsione_personale.csv")
     
-        if 'res_v_fin' in st.session_state:
+    if 'piano_v_fin' in st.session_state:
+        with misura("render_risultati"):
             st.divider()
-            att_disp = df[(df['Ruolo'] == 'Cameriera') & (~df['Nome'].isin(assenti))].copy()
-            assegnate = set()
-            for r in st.session_state['res_v_fin']:
-                assegnate.update([n.replace("🌙 ", "").replace("🕒 ", "").strip() for n in r['Team'].split(", ") if "Gov." not in n])
-            
-            rimaste = [f"{('🌙 ' if p['Nome'] in st.session_state.get('spl_v_fin',[]) else ('🕒 ' if str(p.get('Part_Time','0')) in ['1','True'] else ''))}{p['Nome']}" for _, p in att_disp[~att_disp['Nome'].isin(assegnate)].iterrows()]
-            
+            sol = st.session_state.get('solver_info')
+            if sol:
+                if sol.get('modo') == "ottimo":
+                    st.success(f"🧮 Solver: obiettivo {sol['obiettivo']} (greedy {sol['obiettivo_greedy']}) | gap ≤ {sol['gap']:.1%} | {sol['tempo']}s")
+                else:
+                    st.info(f"🧮 Usato il greedy: {sol.get('motivo', '')}")
+            spost = st.session_state.get('spost_v_fin')
+            if spost is not None:
+                if spost: st.info("🔁 Spostamenti: " + "; ".join(f"{m['Nome']}: {m['Da'] or 'libera'} → {m['A'] or 'libera'}" for m in spost))
+                else: st.info("🔁 Nessuno spostamento")
+            piano = st.session_state['piano_v_fin']
+            spl_fin = st.session_state.get('spl_v_fin', [])
+            # Conti del planning aggiornati a ogni modifica delle squadre
+            cont = memo("contabilita", lambda: _contabilita(piano, spl_fin, assenti, grafo), piano, tuple(spl_fin), tuple(assenti), ver_staff)
+            rimaste = cont.elenco_rimaste()
+        
             c1, c2 = st.columns(2)
             with c1:
                 st.warning(f"🛌 Disponibili ({len(rimaste)}): " + ", ".join(rimaste))
-                
+            
             with c2:
-                spl_list = st.session_state.get('spl_v_fin', [])
-                capacita_tot = len(spl_list) * 5.0
-                carico_effettivo = st.session_state.get('carico_spezzati_ore', 0.0)
-                
-                st.error(f"🌙 Pool Spezzati ({len(spl_list)}) | Carico: {carico_effettivo}h / {capacita_tot}h")
-                st.write(", ".join([f"🌙 {n}" for n in spl_list]))
-                
+                spl_list = cont.spl
+                capacita_tot = cont.capacita_spl()
+                carico_effettivo = cont.carico_spl
+            
+                st.error(f"🌙 Pool Spezzati ({len(spl_list)}, {cont.spl_in_squadra} in squadra al mattino) | Carico: {carico_effettivo}h / {capacita_tot}h")
+                serale = {}
+                for c in st.session_state.get('serale_v_fin', []): serale.setdefault(c['Nome'], []).append(f"{c['Zona']} {c['Ore']}h")
+                st.write(", ".join([f"🌙 {n}" + (f" ({' + '.join(serale[n])})" if n in serale else "") for n in spl_list]))
+            
                 # Barra di progresso o indicatore visivo
                 if capacita_tot > 0:
                     percentuale = min(carico_effettivo / capacita_tot, 1.0)
                     st.progress(percentuale)
                     st.caption(f"Lavoro assegnato agli spezzati (Coperture + Biancheria): {carico_effettivo} ore su {capacita_tot} disponibili.")
     
+            avvisi = cont.avvisi()
+            if avvisi: st.warning("⚠️ " + " | ".join(avvisi))
             st.divider()
-            final_l = []
-            for i, r in enumerate(st.session_state['res_v_fin']):
-                with st.expander(f"📍 {r['Hotel']} | {r['Info']} | {r['Req']}h"):
-                    st.write(f"👥 **Team:** {r['Team']}")
-                    def_p = [n.replace("⭐ ", "").replace(" (Gov.)", "").replace("🌙 ", "").replace("🕒 ", "").strip() for n in r['Team'].split(", ")]
-                    s = st.multiselect(f"Modifica {r['Hotel']}", nomi_db, default=def_p, key=f"e_{i}")
-                    final_l.append({"Hotel": r['Hotel'], "Team": ", ".join(s)})
-            
-            if st.button("🧊 SCARICA PDF"):
-                pdf = genera_pdf_planning(data_p_str, final_l, st.session_state.get('spl_v_fin', []), assenti)
-                st.download_button("📥 DOWNLOAD", pdf, f"Planning_{data_p}.pdf")
+            for z, aa in per_zona(piano).items():
+                sq = list(cont.squadre[z].values())
+                segno = " ⚠️" if z in cont.scoperte or z in cont.eccesso else ""
+                with st.expander(f"📍 {z} | {info(sq)} | {cont.ore[z]:g}h / {round(cont.fabb.get(z, 0), 1)}h{segno}"):
+                    st.write(f"👥 **Team:** {testo_team(sq)}")
+                    st.session_state.setdefault(f"e_{z}", [a.nome for a in aa])
+                    st.multiselect(f"Modifica {z}", nomi_db, key=f"e_{z}", on_change=_modifica_squadra, args=(z,))
+            finale = cont.assegnazioni()
+            final_l = righe_pdf(finale)
+        
+            # Il PDF del planning così com'è ora parte subito in sfondo: al click è già pronto
+            cache_pdf.prepara(data_p_str, final_l, spl_fin, assenti)
+            # Il planning scaricato è quello finale: finisce nello storico (una nuova versione solo se cambia)
+            st.download_button("🧊 SCARICA PDF", lambda: cache_pdf.pdf(data_p_str, final_l, spl_fin, assenti),
+                               f"Planning_{data_p}.pdf", mime="application/pdf",
+                               on_click=lambda: Storico().archivia(data_p, finale) if finale else None)
+            cs = cache_pdf.statistiche()
+            st.caption(f"Cache PDF: {cs['voci']} documenti, hit rate {cs['hit_rate'] or 0:.0%}")
+
+# Firma presa prima di leggere: se il file cambia in mezzo, al prossimo rerun si ricalcola
+ver_staff = versione(backend().path)
+df = load_data()
+nomi_db = sorted(df['Nome'].unique().tolist()) if not df.empty else []
+
+# --- TABS ---
+t_dash, t_staff, t_tempi, t_plan = st.tabs(["🏆 Dashboard", "👥 Anagrafica Staff", "⚙️ Tempi", "🚀 Planning"], key="sezione", on_change="rerun")
+ricorda_widget()
+for t, sezione in ((t_dash, tab_dashboard), (t_staff, tab_anagrafica), (t_tempi, tab_tempi), (t_plan, tab_planning)):
+    if t.open:
+        with t, misura(sezione.__name__): sezione()
+
+# --- PERFORMANCE ---
+
+if pannello_prestazioni:
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        st.caption(f"Rerun di questa sessione: {st.session_state['n_rerun']}")
+        st.dataframe(pd.DataFrame(tabella()), hide_index=True, use_container_width=True)
+        cache = {"tabelle": statistiche_cache(), "pdf": cache_pdf.statistiche()}
+        st.json(cache, expanded=False)
+        rep = rapporto(cache=cache, sessione={"rerun": st.session_state['n_rerun']})
+        c_p1, c_p2 = st.columns(2)
+        c_p1.download_button("📥 JSON", json.dumps(rep, ensure_ascii=False, indent=1, default=str), "prestazioni.json", mime="application/json")
+        if c_p2.button("🔄 Azzera"): azzera(); st.rerun()
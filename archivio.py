@@ -0,0 +1,244 @@
+"""Backend di archiviazione dello staff: CSV (storico) e SQLite.
+
+Il backend si sceglie con la variabile d'ambiente FV_BACKEND ("csv" o "sqlite");
+il file SQLite è FV_DB (default housekeeping.db). Con SQLite il salvataggio di una
+scheda aggiorna solo la sua riga in una transazione, quindi due governanti che
+salvano schede diverse non si sovrascrivono più a vicenda.
+
+Con entrambi i backend upsert() può controllare la versione della scheda (il timbro in
+Ultima_Modifica letto quando la si è aperta): se nel frattempo un'altra governante l'ha
+salvata, solleva concorrenza.ConflittoVersione invece di sovrascriverla. Il CSV viene
+riletto, controllato e riscritto tenendo il blocco del file.
+
+Importazione una tantum dei CSV esistenti:
+    python archivio.py importa [housekeeping.db]
+"""
+import os
+import sys
+
+import pandas as pd
+
+from concorrenza import blocco_file, connetti_sqlite, controlla_versione, nuova_versione
+from dati import FILE_STAFF, invalida, leggi_con_cache, normalizza_staff, carica_staff, salva_staff
+from schema_staff import ALIAS, FLAG, TESTI, VOTI
+
+FILE_DB = os.environ.get("FV_DB", "housekeeping.db")
+# In ordine di priorità: a parità di Nome vince il primo file
+FILE_IMPORT = [FILE_STAFF, "housekeeping_database.csv", "backup_staff.csv"]
+
+COLONNE_NUMERICHE = {
+    'Professionalita', 'Esperienza', 'Capacita_Guida', 'Tenuta_Fisica', 'Disponibilita',
+    'Empatia', 'Pendolare', 'Turno_Spezzato', 'Jolly', 'Part_Time'
+}
+
+# --- 1. CSV ---
+
+class BackendCSV:
+    """Il file CSV di sempre: ogni scrittura riscrive l'intero file.
+
+    upsert() lavora sul testo del file, non sul modello canonico: le altre righe restano
+    identiche, i nomi di colonna restano quelli del file (Riposo_Preferenziale, ...) e i
+    valori della scheda sono scritti come gli altri della stessa colonna (7 o 7.0, 1 o 1.0).
+    Una colonna che il file non ha viene aggiunta solo se la scheda ci mette un valore.
+    """
+
+    def __init__(self, path=FILE_STAFF):
+        self.path = path
+
+    def carica(self):
+        return carica_staff(self.path)
+
+    def salva(self, df):
+        salva_staff(df, self.path)
+
+    def trova(self, nome):
+        df = self.carica()
+        m = df[df['Nome'] == nome] if not df.empty else df
+        return m.iloc[0].to_dict() if not m.empty else None
+
+    def upsert(self, record, nome_orig=None, versione=None):
+        """Aggiorna (o aggiunge) la riga di record['Nome']; nome_orig gestisce il cambio nome.
+
+        versione: Ultima_Modifica letta all'apertura della scheda (None = nessun controllo).
+        Restituisce la nuova versione.
+        """
+        with blocco_file(self.path):
+            df = self._testo()
+            record = _timbra(record, nome_orig, versione, lambda n: _versione_csv(df, n))
+            self._scrivi(df, record, nome_orig)
+        return record['Ultima_Modifica']
+
+    def _testo(self):
+        """Il file com'è scritto: tutte stringhe, vuoti compresi, Nome senza spazi attorno."""
+        if not os.path.exists(self.path): return pd.DataFrame(columns=['Nome'])
+        df = pd.read_csv(self.path, dtype=object, keep_default_na=False)
+        if 'Nome' not in df.columns: df['Nome'] = ""
+        df['Nome'] = df['Nome'].str.strip()
+        return df
+
+    def _scrivi(self, df, record, nome_orig):
+        riga = {}
+        for k, v in record.items():
+            col = next((vecchio for vecchio, nuovo in ALIAS.items() if nuovo == k and vecchio in df.columns and k not in df.columns), k)
+            if col not in df.columns:
+                if _vuoto(k, v): continue
+                df[col] = ""
+            riga[col] = _come_nel_file(df[col], v)
+        chiave = nome_orig or record['Nome']
+        trovate = df.index[df['Nome'] == chiave]
+        if len(trovate):
+            i = trovate[0]
+            for col, v in riga.items(): df.at[i, col] = v
+            if nome_orig and nome_orig != record['Nome']:
+                df = df[(df['Nome'] != record['Nome']) | (df.index == i)]
+        else:
+            df = pd.concat([df[df['Nome'] != record['Nome']], pd.DataFrame([riga])], ignore_index=True).fillna("")
+        self.salva(df)
+
+# --- 2. SQLITE ---
+
+class BackendSQLite:
+    """Tabella staff con chiave primaria Nome (indice) e colonne aggiunte al bisogno."""
+
+    def __init__(self, path=FILE_DB):
+        self.path = path
+        with self._conn() as con:
+            con.execute('CREATE TABLE IF NOT EXISTS staff ("Nome" TEXT PRIMARY KEY NOT NULL)')
+
+    def _conn(self):
+        return connetti_sqlite(self.path)
+
+    @staticmethod
+    def _colonne(con):
+        return [r[1] for r in con.execute("PRAGMA table_info(staff)")]
+
+    @staticmethod
+    def _aggiungi_colonne(con, colonne):
+        esistenti = set(BackendSQLite._colonne(con))
+        for c in colonne:
+            if c not in esistenti:
+                tipo = "NUMERIC" if c in COLONNE_NUMERICHE else "TEXT"
+                con.execute(f'ALTER TABLE staff ADD COLUMN "{c}" {tipo}')
+
+    def _leggi(self, path):
+        with self._conn() as con:
+            df = pd.read_sql_query("SELECT * FROM staff ORDER BY rowid", con.con)
+        return normalizza_staff(df)
+
+    def carica(self):
+        return leggi_con_cache("staff", self.path, self._leggi)
+
+    def trova(self, nome):
+        with self._conn() as con:
+            cur = con.execute("SELECT * FROM staff WHERE Nome = ?", (nome,))
+            r = cur.fetchone()
+            return dict(zip([d[0] for d in cur.description], r)) if r else None
+
+    def upsert(self, record, nome_orig=None, versione=None):
+        """Inserisce o aggiorna una sola riga; le colonne non presenti in record restano com'erano.
+
+        versione come in BackendCSV.upsert; il controllo si fa dentro la stessa transazione.
+        """
+        with self._conn() as con:
+            con.execute("BEGIN IMMEDIATE")
+            self._aggiungi_colonne(con, list(record) + ['Ultima_Modifica'])
+            def trovata(nome):
+                r = con.execute('SELECT "Ultima_Modifica" FROM staff WHERE Nome = ?', (nome,)).fetchone()
+                return None if r is None else (r[0] or "")
+            record = {k: _valore(v) for k, v in _timbra(record, nome_orig, versione, trovata).items()}
+            cols = list(record)
+            if nome_orig and nome_orig != record['Nome']:
+                # Cambio nome: la riga vecchia porta con sé i campi non modificati
+                con.execute("DELETE FROM staff WHERE Nome = ?", (record['Nome'],))
+                con.execute("UPDATE staff SET Nome = ? WHERE Nome = ?", (record['Nome'], nome_orig))
+            elenco = ", ".join(f'"{c}"' for c in cols)
+            agg = ", ".join(f'"{c}" = excluded."{c}"' for c in cols if c != 'Nome')
+            sql = f'INSERT INTO staff ({elenco}) VALUES ({", ".join("?" * len(cols))}) ON CONFLICT(Nome) DO '
+            con.execute(sql + (f"UPDATE SET {agg}" if agg else "NOTHING"), [record[c] for c in cols])
+        invalida("staff", self.path)
+        return record['Ultima_Modifica']
+
+    def elimina(self, nome):
+        with self._conn() as con:
+            con.execute("DELETE FROM staff WHERE Nome = ?", (nome,))
+        invalida("staff", self.path)
+
+    def salva(self, df):
+        """Sostituisce l'intera tabella in un'unica transazione."""
+        cols = [str(c) for c in df.columns]
+        with self._conn() as con:
+            con.execute("BEGIN IMMEDIATE")
+            self._aggiungi_colonne(con, cols)
+            con.execute("DELETE FROM staff")
+            elenco = ", ".join(f'"{c}"' for c in cols)
+            con.executemany(f'INSERT OR REPLACE INTO staff ({elenco}) VALUES ({", ".join("?" * len(cols))})',
+                            ([_valore(v) for v in r] for r in df.itertuples(index=False, name=None)))
+        invalida("staff", self.path)
+
+def _vuoto(col, v):
+    """v non dice nulla per col (vuoto o il default del modello canonico)."""
+    if v is None or str(v).strip().lower() in ("", "nan", "none", "nessuna", "nessuno"): return True
+    if col in FLAG: return not bool(v) or str(v).strip().upper() in ("0", "0.0", "FALSE")
+    if col in VOTI: return str(v) == str(VOTI[col])
+    return str(v).strip() == TESTI.get(col)
+
+def _come_nel_file(colonna, v):
+    """v come testo, nel formato dei numeri già presenti in colonna (1.0 se il file scrive 1.0)."""
+    if v is None or v is pd.NA: return ""
+    if hasattr(v, 'item'): v = v.item()
+    if isinstance(v, bool): v = int(v)
+    if isinstance(v, (int, float)):
+        if v != v: return ""
+        if float(v).is_integer():
+            decimale = colonna.str.fullmatch(r"-?\d+\.0").any() and not colonna.str.fullmatch(r"-?\d+").any()
+            return f"{float(v):.1f}" if decimale else str(int(v))
+        return str(v)
+    return str(v)
+
+def _versione_csv(df, nome):
+    i = df.index[df['Nome'] == nome] if not df.empty else []
+    if not len(i): return None
+    return str(df.at[i[0], 'Ultima_Modifica']) if 'Ultima_Modifica' in df.columns else ""
+
+def _timbra(record, nome_orig, versione, trovata):
+    """record con il nuovo Ultima_Modifica, dopo il controllo di versione (trovata(nome) -> versione o None)."""
+    chiave = nome_orig or record['Nome']
+    attuale = trovata(chiave)
+    controlla_versione(chiave, versione, attuale, nuovo=nome_orig is None)
+    if versione is not None and nome_orig and nome_orig != record['Nome']:
+        # Il nuovo nome non deve essere di un'altra scheda
+        controlla_versione(record['Nome'], versione, trovata(record['Nome']), nuovo=True)
+    return {**record, 'Ultima_Modifica': nuova_versione(attuale or "")}
+
+def _valore(v):
+    """Valore adatto a sqlite3: scalari numpy convertiti, NaN e NA come NULL."""
+    if v is pd.NA: return None
+    if hasattr(v, 'item'): v = v.item()
+    return None if isinstance(v, float) and v != v else v
+
+# --- 3. SCELTA BACKEND E IMPORTAZIONE ---
+
+def backend():
+    """Backend configurato da FV_BACKEND (default: csv)."""
+    if os.environ.get("FV_BACKEND", "csv").lower() == "sqlite":
+        return BackendSQLite(FILE_DB)
+    return BackendCSV(FILE_STAFF)
+
+def importa_csv(db_path=FILE_DB, files=FILE_IMPORT):
+    """Carica nel database i CSV esistenti; a parità di Nome vince il file che viene prima."""
+    frames = [normalizza_staff(pd.read_csv(f)) for f in files if os.path.exists(f)]
+    if not frames: return 0
+    tutti = pd.concat(frames, ignore_index=True).drop_duplicates('Nome', keep='first')
+    db = BackendSQLite(db_path)
+    esistenti = db.carica()
+    if not esistenti.empty:
+        tutti = pd.concat([tutti, esistenti[~esistenti['Nome'].isin(tutti['Nome'])]], ignore_index=True)
+    db.salva(tutti)
+    return len(tutti)
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "importa":
+        dest = sys.argv[2] if len(sys.argv) > 2 else FILE_DB
+        print(f"Importate {importa_csv(dest)} schede in {dest}")
+    else:
+        print(__doc__)
@@ -0,0 +1,197 @@
+"""Benchmark riproducibili senza Streamlit, su roster e carichi sintetici.
+
+Esempi:
+    python benchmark.py                                  # taglie 100..50000, 12 hotel
+    python benchmark.py --taglie 100,1000 --zone 300 --solver
+    python benchmark.py --confronta bench_abc1234.json   # segnala le regressioni
+
+Ogni fase viene cronometrata (migliore e mediana su più ripetizioni) e misurata
+a parte con tracemalloc per il picco di memoria. Il risultato va in un JSON con il
+commit corrente, così i file di commit diversi si possono confrontare.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import dati
+from carico import previsione
+from documenti import PDF_OK, genera_pdf_planning
+from planning import LISTA_HOTEL, ZONE_UNITE, calcola_fabbisogno, genera_schieramento
+from rating import calcola_rating, calcola_status
+from schema_staff import elimina_snapshot
+from solver import genera_schieramento_ottimo
+from vincoli import GrafoVincoli
+
+# Stesse colonne di Housekeeping_DB - Staff.csv
+COLONNE_STAFF = [
+    'Nome', 'Ruolo', 'Professionalita', 'Esperienza', 'Capacita_Guida', 'Tenuta_Fisica',
+    'Disponibilita', 'Empatia', 'Pendolare', 'Turno_Spezzato', 'Jolly', 'Riposo_Preferenziale',
+    'Zone_Padronanza', 'Lavora_Bene_Con', 'Non_Assegnare_A', 'Ultima_Modifica', 'Auto'
+]
+GIORNI = ["Nessuna", "Lunedì", "Martedì", "Mercoledì", "Giovedì", "Venerdì", "Sabato", "Domenica"]
+TAGLIE_DEFAULT = [100, 1000, 10000, 50000]
+SOGLIA_REGRESSIONE = 0.20
+SOGLIA_MINIMA_S = 0.001  # sotto il millisecondo è rumore
+PRIMO_GIORNO = date(2026, 1, 1)  # inizio dei giorni sintetici della previsione
+
+# --- 1. DATI SINTETICI ---
+
+def genera_zone(n_zone):
+    """I 12 hotel reali, oppure zone sintetiche quando ne servono di più."""
+    if n_zone <= len(LISTA_HOTEL): return LISTA_HOTEL[:n_zone]
+    return LISTA_HOTEL + [f"Zona {k:03d}" for k in range(n_zone - len(LISTA_HOTEL))]
+
+def genera_roster(n, zone, seed=0, quota_gov=1 / 15):
+    """Roster di n persone con lo schema del file staff reale."""
+    rnd = random.Random(seed)
+    nomi = [f"Staff {i:05d}" for i in range(n)]
+    righe = []
+    for i, nome in enumerate(nomi):
+        gov = rnd.random() < quota_gov
+        righe.append({
+            'Nome': nome, 'Ruolo': "Governante" if gov else "Cameriera",
+            'Professionalita': rnd.randint(4, 10), 'Esperienza': float(rnd.randint(3, 10)),
+            'Capacita_Guida': float(rnd.randint(3, 10)), 'Tenuta_Fisica': float(rnd.randint(4, 10)),
+            'Disponibilita': float(rnd.randint(4, 10)), 'Empatia': float(rnd.randint(4, 10)),
+            'Pendolare': float(rnd.random() < 0.4), 'Turno_Spezzato': float(rnd.random() < 0.3),
+            'Jolly': float(rnd.random() < 0.1), 'Riposo_Preferenziale': rnd.choice(GIORNI),
+            'Zone_Padronanza': ", ".join(rnd.sample(zone, min(len(zone), rnd.randint(1, 2)))),
+            'Lavora_Bene_Con': rnd.choice(nomi) if rnd.random() < 0.3 else "Nessuna",
+            'Non_Assegnare_A': rnd.choice(nomi + zone) if rnd.random() < 0.15 else "Nessuna",
+            'Ultima_Modifica': "", 'Auto': "",
+        })
+    return pd.DataFrame(righe, columns=COLONNE_STAFF)
+
+def genera_carichi(zone, seed=0, scala=1.0):
+    """Carichi giornalieri AI/FI/AG/FG/COP/BIAN per zona."""
+    rnd = random.Random(seed)
+    return {z: {"AI": int(rnd.randint(0, 12) * scala), "FI": int(rnd.randint(0, 25) * scala),
+                "AG": int(rnd.randint(0, 6) * scala), "FG": int(rnd.randint(0, 8) * scala),
+                "COP": int(rnd.randint(0, 10) * scala), "BIAN": int(rnd.randint(0, 8) * scala)} for z in zone}
+
+# --- 2. MISURA ---
+
+def misura(fn, ripetizioni):
+    """Tempi di fn() (migliore, mediana) e picco di memoria in una corsa a parte."""
+    tempi = []
+    for _ in range(ripetizioni):
+        t = time.perf_counter(); fn(); tempi.append(time.perf_counter() - t)
+    tracemalloc.start()
+    try:
+        fn(); _, picco = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"migliore_s": round(min(tempi), 6), "mediana_s": round(statistics.median(tempi), 6),
+            "picco_mb": round(picco / 2 ** 20, 3)}
+
+def fasi(n, zone, seed, solver, tempo_solver, tmp):
+    """Le fasi da misurare per una taglia: (nome, funzione, righe elaborate)."""
+    df = genera_roster(n, zone, seed)
+    cur = genera_carichi(zone, seed)
+    path = os.path.join(tmp, "staff.csv")
+    df.to_csv(path, index=False)
+    staff = dati.carica_staff(path)
+    esito = genera_schieramento(staff, pd.DataFrame(), cur, [], zone)
+
+    def carica_freddo():
+        dati.invalida("staff", path); elimina_snapshot(path); dati.carica_staff(path)
+
+    def carica_snapshot():
+        dati.invalida("staff", path); dati.carica_staff(path)
+
+    elenco = [
+        ("load_data_freddo", carica_freddo, n),
+        ("load_data_snapshot", carica_snapshot, n),
+        ("load_data_cache", lambda: dati.carica_staff(path), n),
+        ("fabbisogno", lambda: calcola_fabbisogno(cur, pd.DataFrame(), zone), len(zone)),
+        ("previsione_7g", lambda: previsione({PRIMO_GIORNO + timedelta(days=k): cur for k in range(7)}, pd.DataFrame(), scenari=1000, lista_hotel=zone), 7 * len(zone)),
+        ("grafo_vincoli", lambda: GrafoVincoli(staff, zone, ZONE_UNITE), n),
+        ("planning_greedy", lambda: genera_schieramento(staff, pd.DataFrame(), cur, [], zone), n),
+        ("rating", lambda: (calcola_rating(staff), calcola_status(staff)), n),
+    ]
+    if solver:
+        elenco.append(("planning_ottimo", lambda: genera_schieramento_ottimo(staff, pd.DataFrame(), cur, [], zone, tempo_max=tempo_solver), n))
+    if PDF_OK:
+        elenco.append(("pdf_planning", lambda: genera_pdf_planning("01/01/2026", esito['ris'], esito['spl'], []), len(esito['ris'])))
+    return elenco
+
+def esegui(taglie, n_zone, ripetizioni=3, seed=0, solver=False, tempo_solver=0.5, log=print):
+    zone = genera_zone(n_zone)
+    risultati = []
+    for n in taglie:
+        with tempfile.TemporaryDirectory(prefix="fv_bench_") as tmp:
+            for nome, fn, righe in fasi(n, zone, seed, solver, tempo_solver, tmp):
+                m = misura(fn, ripetizioni)
+                m.update({"fase": nome, "n_staff": n, "n_zone": len(zone),
+                          "righe_al_s": round(righe / m["mediana_s"], 1) if m["mediana_s"] > 0 else None})
+                risultati.append(m)
+                log(f"{nome:<18} n={n:<6} zone={len(zone):<4} {m['mediana_s'] * 1000:10.2f} ms  "
+                    f"{m['picco_mb']:8.2f} MB  {m['righe_al_s'] or 0:14.0f} righe/s")
+    return risultati
+
+# --- 3. CONFRONTO E MAIN ---
+
+def commit_corrente():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "sconosciuto"
+
+def confronta(vecchi, nuovi, soglia=SOGLIA_REGRESSIONE):
+    """Fasi la cui mediana è peggiorata più della soglia rispetto al file precedente."""
+    prima = {(r["fase"], r["n_staff"], r["n_zone"]): r for r in vecchi}
+    regressioni = []
+    for r in nuovi:
+        v = prima.get((r["fase"], r["n_staff"], r["n_zone"]))
+        if v and v["mediana_s"] > 0 and r["mediana_s"] > v["mediana_s"] * (1 + soglia) \
+                and r["mediana_s"] - v["mediana_s"] > SOGLIA_MINIMA_S:
+            regressioni.append({"fase": r["fase"], "n_staff": r["n_staff"], "n_zone": r["n_zone"],
+                                "prima_s": v["mediana_s"], "dopo_s": r["mediana_s"],
+                                "variazione": round(r["mediana_s"] / v["mediana_s"] - 1, 3)})
+    return regressioni
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark del planning housekeeping")
+    ap.add_argument("--taglie", default=",".join(map(str, TAGLIE_DEFAULT)), help="numero di staff, separati da virgola")
+    ap.add_argument("--zone", type=int, default=len(LISTA_HOTEL), help="numero di zone")
+    ap.add_argument("--ripetizioni", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--solver", action="store_true", help="misura anche la modalità ottimo")
+    ap.add_argument("--tempo-solver", type=float, default=0.5)
+    ap.add_argument("--output", help="file JSON dei risultati (default bench_<commit>.json)")
+    ap.add_argument("--confronta", help="JSON di un run precedente da confrontare")
+    a = ap.parse_args(argv)
+
+    commit = commit_corrente()
+    risultati = esegui([int(t) for t in a.taglie.split(",")], a.zone, a.ripetizioni, a.seed, a.solver, a.tempo_solver)
+    out = {"commit": commit, "data": datetime.now().isoformat(timespec="seconds"),
+           "python": platform.python_version(), "pandas": pd.__version__,
+           "parametri": {"zone": a.zone, "ripetizioni": a.ripetizioni, "seed": a.seed}, "risultati": risultati}
+    dest = a.output or f"bench_{commit}.json"
+    with open(dest, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    print(f"Risultati salvati in {dest}")
+
+    if a.confronta:
+        with open(a.confronta, encoding="utf-8") as f:
+            regressioni = confronta(json.load(f)["risultati"], risultati)
+        for r in regressioni:
+            print(f"⚠️ REGRESSIONE {r['fase']} n={r['n_staff']} zone={r['n_zone']}: "
+                  f"{r['prima_s'] * 1000:.2f} -> {r['dopo_s'] * 1000:.2f} ms ({r['variazione']:+.0%})")
+        return 1 if regressioni else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Carichi in blocco: ore di molti giorni in un colpo e previsioni Monte Carlo del personale.
+
+Un giorno è ore = carichi (H x 6) · minuti (H x 6) / 60 (planning.ore_carichi); qui lo
+stesso prodotto si fa su tutti i giorni e su migliaia di scenari insieme.
+
+Scenari: ogni giorno e hotel l'occupazione oscilla di un fattore Gamma con media 1 e
+coefficiente di variazione cv, comune a tutti i tipi di carico dell'hotel (se l'hotel è
+più pieno crescono insieme arrivi, fermate e coperture); dato il fattore, ogni carico è
+Poisson con media carico previsto x fattore.
+
+Per ogni zona e livello di confidenza q si riporta il quantile q sugli scenari di:
+    Ore        ore di lavoro della zona
+    Cameriere  turni pieni (ORE_TURNO) per quelle ore, almeno una come nel greedy
+    Part_Time  turni ridotti (ORE_RIDOTTE) se le stesse ore le coprissero solo part-time
+    Spezzati   turni ridotti per coperture e biancheria della zona
+La riga TOTALE è il quantile dei totali di ogni scenario, non la somma dei quantili di zona.
+"""
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from planning import (LISTA_HOTEL, ORE_RIDOTTE, ORE_TURNO, TIPI_CARICO, TIPI_SPEZZATI, matrice_carichi,
+                      matrice_tempi, matrice_zone, ordine_zone, ore_carichi)
+from prestazioni import misura
+
+LIVELLI = (0.5, 0.8, 0.95)
+SCENARI = 2000
+CV = 0.15                 # variabilità dell'occupazione giorno per giorno
+BLOCCO = 4_000_000        # carichi simulati per blocco di giorni (scenari x giorni x hotel x 6)
+TOTALE = "TOTALE"
+COLONNE = ["Data", "Zona", "Livello", "Ore", "Cameriere", "Part_Time", "Spezzati"]
+
+# --- 1. CARICHI DI PIÙ GIORNI ---
+
+def carichi_giorni(carichi, lista_hotel=LISTA_HOTEL):
+    """(giorni, array D x H x 6) da {data: cur_inp} oppure da un solo cur_inp (giorni = [None])."""
+    if carichi and all(isinstance(k, date) for k in carichi):
+        giorni = sorted(carichi)
+        return giorni, np.stack([matrice_carichi(carichi[g], lista_hotel) for g in giorni])
+    return [None], matrice_carichi(carichi or {}, lista_hotel)[None]
+
+def ore_giorni(carichi, conf_df, lista_hotel=LISTA_HOTEL):
+    """Ore per giorno (righe) e zona di pianificazione (colonne), più le ore degli spezzati."""
+    giorni, c = carichi_giorni(carichi, lista_hotel)
+    zone = ordine_zone(lista_hotel)
+    ore, spl = ore_carichi(c, matrice_tempi(conf_df, lista_hotel))
+    t = pd.DataFrame(ore @ matrice_zone(zone, lista_hotel).T, index=pd.Index(giorni, name="Data"), columns=zone)
+    t["Spezzati"] = spl
+    return t
+
+# --- 2. MONTE CARLO ---
+
+def simula_carichi(base, scenari, cv, rng):
+    """scenari x (forma di base) carichi interi attorno a base (... x H x 6)."""
+    if cv > 0: media = base * rng.gamma(1 / cv ** 2, cv ** 2, size=(scenari,) + base.shape[:-1] + (1,))
+    else: media = np.broadcast_to(base, (scenari,) + base.shape)
+    return rng.poisson(media).astype(np.float64)
+
+def _turni(ore, durata):
+    # Il greedy mette almeno una cameriera anche nelle zone senza carico
+    return np.maximum(np.ceil(ore / durata), 1)
+
+def _quantili(x, livelli):
+    return np.quantile(x, livelli, axis=0, method="inverted_cdf")
+
+@misura("previsione")
+def previsione(carichi, conf_df, livelli=LIVELLI, scenari=SCENARI, cv=CV, seed=0, lista_hotel=LISTA_HOTEL):
+    """Fabbisogno di personale per giorno, zona e livello di confidenza (vedi il docstring del modulo).
+
+    carichi: {data: cur_inp} (carichi previsti giorno per giorno) oppure un solo cur_inp.
+    Restituisce {"tabella": DataFrame con COLONNE, "scenari", "giorni", "secondi"}.
+    """
+    t0 = time.perf_counter()
+    giorni, base = carichi_giorni(carichi, lista_hotel)
+    minuti = matrice_tempi(conf_df, lista_hotel)
+    zone = ordine_zone(lista_hotel)
+    a = matrice_zone(zone, lista_hotel).T
+    solo_spl = np.zeros(len(TIPI_CARICO)); solo_spl[TIPI_SPEZZATI] = 1
+    livelli = np.asarray(livelli, dtype=float)
+    rng = np.random.default_rng(seed)
+    passo = max(1, BLOCCO // (scenari * base[0].size))
+    blocchi = []
+    for d0 in range(0, len(giorni), passo):
+        c = simula_carichi(base[d0:d0 + passo], scenari, cv, rng)        # S x d x H x 6
+        ore = ore_carichi(c, minuti)[0] @ a                              # S x d x Z
+        spl = ore_carichi(c * solo_spl, minuti)[0] @ a
+        cam, pt, n_spl = _turni(ore, ORE_TURNO), _turni(ore, ORE_RIDOTTE), np.ceil(spl / ORE_RIDOTTE)
+        # Totali per scenario: il pool spezzati è unico, si arrotonda sul totale delle ore
+        tot = [ore.sum(-1), cam.sum(-1), pt.sum(-1), np.ceil(spl.sum(-1) / ORE_RIDOTTE)]
+        per_zona = [np.concatenate([x, t[..., None]], axis=-1) for x, t in zip((ore, cam, pt, n_spl), tot)]
+        blocchi.append(np.stack([_quantili(x, livelli) for x in per_zona], axis=-1))   # L x d x (Z+1) x 4
+    q = np.concatenate(blocchi, axis=1)
+    nz, nd, nl = len(zone) + 1, len(giorni), len(livelli)
+    tab = pd.DataFrame({
+        "Data": np.repeat(np.array(giorni, dtype=object), nz * nl),
+        "Zona": np.tile(np.repeat(np.array(zone + [TOTALE], dtype=object), nl), nd),
+        "Livello": np.tile(livelli, nd * nz),
+    })
+    valori = q.transpose(1, 2, 0, 3).reshape(-1, 4)
+    tab["Ore"] = valori[:, 0].round(1)
+    for j, col in enumerate(["Cameriere", "Part_Time", "Spezzati"], start=1): tab[col] = valori[:, j].astype(int)
+    return {"tabella": tab, "scenari": scenari, "giorni": nd, "secondi": round(time.perf_counter() - t0, 3)}
+
+def picchi(tabella):
+    """Per zona e livello il giorno peggiore del periodo: quanto personale serve al massimo."""
+    return (tabella.groupby(["Zona", "Livello"], sort=False)[["Ore", "Cameriere", "Part_Time", "Spezzati"]].max()
+            .reset_index())
@@ -0,0 +1,152 @@
+"""Planning del giorno da riga di comando, senza Streamlit (per cron o altri scheduler).
+
+    python cli.py --carichi carichi.csv --data 19/10/2026 --formato pdf --uscita planning.pdf
+    python cli.py --pms export.csv --modo ottimo --tempo-max 20 --formato json
+
+Il file dei carichi ha le colonne Hotel, AI, FI, AG, FG, COP, BIAN (più Data gg/mm/aaaa se
+contiene più giorni: si prendono le righe di --data). In alternativa --pms legge
+l'esportazione del PMS come il tab Planning dell'app.
+
+Avvio a freddo: qui in testa si importa solo la libreria standard, così --help e gli
+errori sugli argomenti rispondono subito; pandas e il motore si caricano in main(), e
+reportlab solo se si chiede il PDF (documenti lo importa alla prima richiesta).
+Streamlit non viene mai importato. Con --tempi-avvio le fasi vanno su stderr.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, datetime
+
+_T0 = time.perf_counter()
+COLS_CARICHI = ["AI", "FI", "AG", "FG", "COP", "BIAN"]
+FORMATI = ("pdf", "csv", "json")
+
+def _argomenti(argv):
+    p = argparse.ArgumentParser(prog="cli.py", description="Genera il planning housekeeping di un giorno.")
+    fonte = p.add_mutually_exclusive_group(required=True)
+    fonte.add_argument("--carichi", help="CSV dei carichi: Hotel, AI, FI, AG, FG, COP, BIAN (e Data)")
+    fonte.add_argument("--pms", help="esportazione PMS (CSV o Excel)")
+    p.add_argument("--staff", default=None, help="CSV dello staff (default: quello dell'app)")
+    p.add_argument("--tempi", default=None, help="config tempi standard (default: quello dell'app)")
+    p.add_argument("--data", default=None, help="giorno gg/mm/aaaa (default: domani)")
+    p.add_argument("--assenti", default="", help="nomi assenti separati da virgola")
+    p.add_argument("--modo", choices=("greedy", "ottimo"), default="greedy")
+    p.add_argument("--tempo-max", type=float, default=None, help="secondi per il modo ottimo")
+    p.add_argument("--formato", choices=FORMATI, default=None, help="default: dall'estensione di --uscita, altrimenti json")
+    p.add_argument("--uscita", default="-", help="file di uscita ('-' = stdout, solo csv/json)")
+    p.add_argument("--tempi-avvio", action="store_true", help="scrive i tempi delle fasi su stderr")
+    return p.parse_args(argv)
+
+def _giorno(testo):
+    if not testo: return date.fromordinal(date.today().toordinal() + 1)
+    return datetime.strptime(testo.strip(), "%d/%m/%Y").date()
+
+def leggi_carichi(path, giorno):
+    """cur_inp {hotel: {AI, ..., BIAN}} dal CSV dei carichi, per il giorno se c'è la colonna Data."""
+    import pandas as pd
+    from zone import registro
+    t = pd.read_csv(path)
+    t.columns = [str(c).strip() for c in t.columns]
+    if 'Hotel' not in t.columns: raise ValueError(f"{path}: manca la colonna Hotel")
+    if 'Data' in t.columns:
+        giorni = pd.to_datetime(t['Data'].astype(str).str.strip(), format="%d/%m/%Y", errors='coerce').dt.date
+        t = t[giorni == giorno]
+        if t.empty: raise ValueError(f"{path}: nessuna riga per il {giorno:%d/%m/%Y}")
+    for c in COLS_CARICHI:
+        t[c] = pd.to_numeric(t[c], errors='coerce').fillna(0).astype(int) if c in t.columns else 0
+    reg, cur_inp = registro(), {}
+    for h, r in zip(t['Hotel'], t[COLS_CARICHI].itertuples(index=False)):
+        voce = cur_inp.setdefault(reg.canonico(h), dict.fromkeys(COLS_CARICHI, 0))
+        for c, v in zip(COLS_CARICHI, r): voce[c] += int(v)
+    return cur_inp
+
+def _scrivi(dati, uscita, binario):
+    if uscita == "-":
+        if binario: raise ValueError("il PDF va scritto su file: usa --uscita")
+        sys.stdout.write(dati); return
+    tmp = f"{uscita}.{os.getpid()}.tmp"
+    with open(tmp, "wb" if binario else "w", **({} if binario else {"encoding": "utf-8", "newline": ""})) as f:
+        f.write(dati)
+    os.replace(tmp, uscita)
+
+def main(argv=None):
+    a = _argomenti(argv)
+    fasi = {"avvio": time.perf_counter() - _T0}
+    formato = a.formato or {".pdf": "pdf", ".csv": "csv"}.get(os.path.splitext(a.uscita)[1].lower(), "json")
+    try:
+        giorno = _giorno(a.data)
+    except ValueError:
+        print(f"Data non valida: {a.data!r} (atteso gg/mm/aaaa)", file=sys.stderr); return 2
+
+    t = time.perf_counter()
+    import dati
+    import modello
+    from planning import genera_schieramento
+    fasi["import_motore"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    try:
+        df = dati.carica_staff(a.staff or dati.FILE_STAFF)
+        conf_df = dati.carica_tempi(a.tempi or dati.FILE_CONFIG)
+        if a.pms:
+            from pms import importa_pms
+            with open(a.pms, "rb") as f:
+                cur_inp = importa_pms(f, nome=a.pms)['carichi']
+        else:
+            cur_inp = leggi_carichi(a.carichi, giorno)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Errore nei dati: {e}", file=sys.stderr); return 1
+    if df.empty:
+        print(f"Nessuno staff in {a.staff or dati.FILE_STAFF}", file=sys.stderr); return 1
+    assenti = [n.strip() for n in a.assenti.split(",") if n.strip()]
+    ignoti = sorted(set(assenti) - set(df['Nome']))
+    if ignoti: print(f"Assenti non in anagrafica (ignorati): {', '.join(ignoti)}", file=sys.stderr)
+    fasi["dati"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    from storico import Storico
+    recenti = Storico().spezzati_recenti(giorno)
+    if a.modo == "ottimo":
+        from solver import TEMPO_MAX, genera_schieramento_ottimo
+        esito = genera_schieramento_ottimo(df, conf_df, cur_inp, assenti, recenti=recenti,
+                                           tempo_max=TEMPO_MAX if a.tempo_max is None else a.tempo_max)
+    else:
+        esito = genera_schieramento(df, conf_df, cur_inp, assenti, recenti=recenti)
+    piano = modello.da_esito(esito)
+    fasi["planning"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    data_str = f"{giorno:%d/%m/%Y}"
+    try:
+        if formato == "pdf":
+            import documenti
+            if not documenti.PDF_OK:
+                print("reportlab non installato: impossibile generare il PDF", file=sys.stderr); return 1
+            pdf = documenti.genera_pdf_planning(data_str, modello.righe_pdf(piano), esito['spl'], assenti)
+            _scrivi(pdf.getvalue(), a.uscita, True)
+        elif formato == "csv":
+            _scrivi(modello.tabella(piano).to_csv(index=False), a.uscita, False)
+        else:
+            fabb = esito.get('fabb') or {}
+            out = {"data": data_str, "modo": a.modo, "assenti": assenti, "spezzati": esito['spl'],
+                   "carico_spezzati_ore": esito.get('carico_spezzati_ore'), "serale": esito.get('serale', []),
+                   "zone": [{"zona": z, "fabbisogno_ore": round(fabb.get(z, 0), 1), "info": modello.info(aa),
+                             "squadra": [{"nome": x.nome, "ruolo": x.ruolo, "tipo": x.tipo} for x in aa]}
+                            for z, aa in modello.per_zona(piano).items()]}
+            if 'solver' in esito: out["solver"] = esito['solver']
+            _scrivi(json.dumps(out, ensure_ascii=False, indent=2, default=str) + "\n", a.uscita, False)
+    except (OSError, ValueError) as e:
+        print(f"Errore in scrittura: {e}", file=sys.stderr); return 1
+    fasi["uscita"] = time.perf_counter() - t
+
+    if a.tempi_avvio:
+        fasi["totale"] = time.perf_counter() - _T0
+        print(" ".join(f"{k}={v * 1000:.0f}ms" for k, v in fasi.items())
+              + f" streamlit={'si' if 'streamlit' in sys.modules else 'no'}"
+              + f" reportlab={'si' if 'reportlab' in sys.modules else 'no'}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""Scritture concorrenti sui file condivisi: blocco, scrittura atomica e versioni.
+
+Più governanti usano l'app insieme sugli stessi CSV. Ogni scrittura:
+    1. prende il blocco esclusivo del file (<file>.lock, flock/msvcrt del sistema
+       operativo, quindi vale anche tra processi e server diversi sulla stessa cartella);
+    2. rilegge lo stato attuale e controlla che il record non sia cambiato da quando
+       l'utente l'ha aperto (concorrenza ottimistica): se è cambiato solleva
+       ConflittoVersione invece di sovrascrivere;
+    3. scrive su un file temporaneo nella stessa cartella e lo sostituisce con os.replace.
+Le letture non prendono il blocco: grazie alla sostituzione atomica vedono sempre o il
+file vecchio o quello nuovo, mai uno scritto a metà. Il blocco dura solo il tempo della
+rilettura e della scrittura (pochi millisecondi per i CSV dell'app).
+
+La versione di una scheda staff è il timbro in Ultima_Modifica, rinnovato a ogni salvataggio.
+I database SQLite (archivio staff e storico) usano connetti_sqlite: il blocco lo tiene SQLite.
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:    # Windows
+    fcntl = None
+    import msvcrt
+
+import pandas as pd
+
+TIMEOUT_BLOCCO = 10.0   # secondi di attesa massima per il blocco
+FORMATO_VERSIONE = "%Y-%m-%d %H:%M:%S.%f"
+
+class ConflittoVersione(Exception):
+    """Il record è stato modificato (o creato, o eliminato) da un altro utente dopo la lettura."""
+
+    def __init__(self, chiave, attesa=None, trovata=None):
+        """attesa: versione letta (None se il record si stava creando); trovata: None se non c'è più."""
+        self.chiave, self.attesa, self.trovata = chiave, attesa, trovata
+        if trovata is None: stato = "eliminato"
+        elif attesa is None: stato = "già presente"
+        else: stato = "modificato" + (f" il {str(trovata)[:19]}" if trovata else "")
+        super().__init__(f"{chiave}: {stato} da un altro utente")
+
+# --- 1. BLOCCO ---
+
+_tenuti = threading.local()   # path -> profondità: il blocco è rientrante nello stesso thread
+# Le sessioni dello stesso server aspettano in coda su un lock di processo; solo chi lo
+# tiene prova il blocco del sistema operativo (che serve tra processi diversi)
+_locali = {}
+_lock_locali = threading.Lock()
+
+def _prova(fd):
+    try:
+        if fcntl: fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else: msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _rilascia(fd):
+    if fcntl: fcntl.flock(fd, fcntl.LOCK_UN)
+    else: msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def blocco_file(path, timeout=TIMEOUT_BLOCCO):
+    """Blocco esclusivo su path (tramite path.lock); TimeoutError se non arriva in tempo."""
+    chiave = os.path.abspath(path)
+    tenuti = _tenuti.__dict__
+    if tenuti.get(chiave):
+        tenuti[chiave] += 1
+        try: yield
+        finally: tenuti[chiave] -= 1
+        return
+    with _lock_locali:
+        locale = _locali.setdefault(chiave, threading.Lock())
+    limite = time.monotonic() + timeout
+    if not locale.acquire(timeout=timeout):
+        raise TimeoutError(f"{path}: file bloccato da un altro salvataggio da oltre {timeout}s")
+    try:
+        fd = os.open(f"{chiave}.lock", os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            attesa = 0.001
+            while not _prova(fd):
+                if time.monotonic() > limite:
+                    raise TimeoutError(f"{path}: file bloccato da un altro salvataggio da oltre {timeout}s")
+                time.sleep(attesa); attesa = min(attesa * 2, 0.01)
+            tenuti[chiave] = 1
+            try: yield
+            finally:
+                tenuti[chiave] = 0
+                _rilascia(fd)
+        finally:
+            os.close(fd)
+    finally:
+        locale.release()
+
+# --- 2. SCRITTURA ATOMICA ---
+
+def scrivi_atomico(path, scrivi, binario=False):
+    """scrivi(f) su un temporaneo accanto a path, poi fsync e os.replace al posto di path."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb" if binario else "w", **({} if binario else {"encoding": "utf-8", "newline": ""})) as f:
+            scrivi(f)
+            f.flush(); os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp): os.remove(tmp)
+        raise
+
+def scrivi_csv(df, path):
+    """DataFrame su CSV con sostituzione atomica (chi legge non vede mai il file a metà)."""
+    scrivi_atomico(path, lambda f: df.to_csv(f, index=False))
+
+# --- 3. VERSIONI ---
+
+def nuova_versione(precedente=""):
+    """Timbro per Ultima_Modifica, sempre diverso (e successivo) rispetto a precedente."""
+    adesso = datetime.now()
+    try:
+        prima = datetime.strptime(str(precedente), FORMATO_VERSIONE)
+        if adesso <= prima: adesso = prima + timedelta(microseconds=1)
+    except ValueError:
+        pass
+    return adesso.strftime(FORMATO_VERSIONE)
+
+def controlla_versione(chiave, attesa, trovata, nuovo=False):
+    """ConflittoVersione se il record non è più quello letto.
+
+    attesa: versione letta dall'utente (None = nessun controllo; "" per le schede senza timbro);
+    trovata: versione attuale (None se il record non esiste); nuovo: il record si sta creando.
+    """
+    if attesa is None: return
+    if nuovo:
+        if trovata is not None: raise ConflittoVersione(chiave, None, trovata)
+    elif trovata is None or str(trovata) != str(attesa):
+        raise ConflittoVersione(chiave, attesa, trovata)
+
+def unisci_modifiche(attuale, base, nuova, chiave, colonne):
+    """Tabella attuale con le righe cambiate tra base e nuova; le altre restano quelle attuali.
+
+    Una riga cambiata dall'utente che nel frattempo qualcun altro ha modificato su file
+    (diversa da base) solleva ConflittoVersione: le modifiche di righe diverse si sommano.
+    """
+    if attuale is None or attuale.empty or chiave not in attuale.columns: return nuova
+    b = {r[0]: r[1:] for r in base[[chiave] + colonne].itertuples(index=False, name=None)}
+    n = {r[0]: r[1:] for r in nuova[[chiave] + colonne].itertuples(index=False, name=None)}
+    a = {r[0]: r[1:] for r in attuale.reindex(columns=[chiave] + colonne).itertuples(index=False, name=None)}
+    cambiate = [k for k in n if k not in b or not _uguali(n[k], b[k])]
+    conflitti = [k for k in cambiate if k in a and not _uguali(a[k], b.get(k, n[k]))]
+    if conflitti: raise ConflittoVersione(", ".join(map(str, conflitti)), "base", "")
+    out = attuale.copy()
+    pos = {k: i for i, k in enumerate(out[chiave])}
+    for k in cambiate:
+        if k in pos:
+            for c, v in zip(colonne, n[k]):
+                if c not in out.columns: out[c] = pd.NA
+                out.iloc[pos[k], out.columns.get_loc(c)] = v
+        else:
+            out = pd.concat([out, nuova[nuova[chiave] == k]], ignore_index=True)
+    return out
+
+def _uguali(x, y):
+    return all(a == b or (pd.isna(a) and pd.isna(b)) for a, b in zip(x, y))
+
+# --- 4. SQLITE ---
+
+def connetti_sqlite(path):
+    """Connessione in autocommit che aspetta fino a TIMEOUT_BLOCCO i blocchi degli altri processi;
+    le transazioni si aprono con BEGIN IMMEDIATE dove servono."""
+    con = sqlite3.connect(path, timeout=TIMEOUT_BLOCCO, isolation_level=None)
+    con.execute(f"PRAGMA busy_timeout = {int(TIMEOUT_BLOCCO * 1000)}")
+    return Connessione(con)
+
+class Connessione:
+    """Context manager: COMMIT se tutto va bene, ROLLBACK in caso di errore, poi chiude."""
+
+    def __init__(self, con):
+        self.con = con
+
+    def execute(self, *a):
+        return self.con.execute(*a)
+
+    def executemany(self, *a):
+        return self.con.executemany(*a)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *_):
+        try:
+            if self.con.in_transaction:
+                self.con.execute("ROLLBACK" if tipo else "COMMIT")
+        finally:
+            self.con.close()
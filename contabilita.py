@@ -0,0 +1,141 @@
+"""Contabilità del planning mentre la governante modifica le squadre a mano.
+
+ContabilitaPiano tiene aggiornati, a ogni modifica, solo i conti toccati:
+    ore coperte per zona       GOV 0, STD ORE_TURNO, PT e SPL ORE_RIDOTTE (come nel greedy)
+    zone scoperte o in eccesso scoperta: ore sotto la soglia (fabbisogno, o un turno se
+                               la zona è senza carico); eccesso: almeno un turno pieno di troppo
+    assegnazioni per persona   chi è in più zone
+    disponibili rimaste        cameriere presenti non ancora in squadra
+    pool spezzati              quante del pool sono in squadra la mattina
+    vincoli                    zone vietate e persone incompatibili (grafo dei vincoli), assenti
+Aggiungere o togliere una persona costa O(1) più i suoi vincoli; sostituire una squadra
+costa quanto la differenza tra vecchia e nuova. Gli avvisi si leggono dagli insiemi già
+aggiornati, senza ripassare il planning.
+"""
+from modello import Assegnazione, per_zona
+from planning import ORE_IN_ZONA, ORE_RIDOTTE, ORE_TURNO
+from schema_staff import flag
+
+EPS = 1e-6
+
+def profili(df):
+    """{nome: (ruolo, part-time)} dalle schede, per dare il tipo a chi si aggiunge a mano."""
+    d = df.drop_duplicates('Nome')
+    pt = flag(d, 'Part_Time').tolist()
+    return {n: (str(r), p) for n, r, p in zip(d['Nome'], d['Ruolo'].astype(str), pt)}
+
+def nuova_assegnazione(nome, zona, prof, spl=()):
+    """Assegnazione per chi entra a mano in zona: tipo da ruolo, pool spezzati e part-time."""
+    ruolo, pt = prof.get(nome, ("Cameriera", False))
+    tipo = "GOV" if ruolo == "Governante" else ("SPL" if nome in spl else ("PT" if pt else "STD"))
+    return Assegnazione(nome, zona, ruolo, tipo)
+
+class ContabilitaPiano:
+
+    def __init__(self, assegnazioni, fabb, df, assenti=(), spl=(), carico_spl=0.0, grafo=None):
+        self.fabb, self.grafo = fabb, grafo
+        self.spl, self.carico_spl = list(spl), carico_spl
+        self.assenti = set(assenti)
+        self._prof = profili(df)
+        # Cameriere presenti, nell'ordine delle schede: l'universo delle disponibili
+        self.disponibili = [n for n, (r, _) in self._prof.items() if r == "Cameriera" and n not in self.assenti]
+        self._ordine = {n: i for i, n in enumerate(self.disponibili)}
+        self.squadre = {z: {a.nome: a for a in aa} for z, aa in per_zona(assegnazioni).items()}
+        self.ore = dict.fromkeys(self.squadre, 0.0)
+        self.conteggio = {}
+        self.rimaste = set(self.disponibili)
+        self.doppie, self.scoperte, self.eccesso = set(), set(), set()
+        self.vietate, self.incompatibili, self.assenti_in_squadra = set(), set(), set()
+        self._righe = {z: {} for z in self.squadre}   # zona -> {riga del grafo: nome}
+        self._spl = set(self.spl)
+        self.spl_in_squadra = 0
+        self.modifiche = 0
+        for z, sq in self.squadre.items():
+            for a in sq.values(): self._entra(a)
+            self._stato(z)
+
+    # --- 1. MODIFICHE ---
+
+    def sostituisci(self, zona, nomi):
+        """Squadra di zona = nomi (in quell'ordine); restano i tipi di chi c'era già."""
+        if zona not in self.squadre: self.squadre[zona], self.ore[zona], self._righe[zona] = {}, 0.0, {}
+        sq, nuovi = self.squadre[zona], dict.fromkeys(nomi)
+        for n in [n for n in sq if n not in nuovi]: self._esce(sq.pop(n))
+        entrate = {n: nuova_assegnazione(n, zona, self._prof, self._spl) for n in nuovi if n not in sq}
+        for a in entrate.values(): self._entra(a)
+        self.squadre[zona] = {n: sq[n] if n in sq else entrate[n] for n in nuovi}
+        self._stato(zona)
+        self.modifiche += 1
+
+    def _entra(self, a):
+        z, n = a.zona, a.nome
+        self.ore[z] += ORE_IN_ZONA[a.tipo]
+        c = self.conteggio[n] = self.conteggio.get(n, 0) + 1
+        if c == 1:
+            self.rimaste.discard(n)
+            if n in self._spl: self.spl_in_squadra += 1
+        elif c == 2: self.doppie.add(n)
+        if n in self.assenti: self.assenti_in_squadra.add((n, z))
+        r = self.grafo.indice(n) if self.grafo is not None else None
+        if r is None: return
+        if self.grafo.vietata(r, z): self.vietate.add((n, z))
+        righe = self._righe[z]
+        for j in self.grafo.esclusioni(r):
+            if j in righe: self.incompatibili.add((z, *sorted((n, righe[j]))))
+        righe[r] = n
+
+    def _esce(self, a):
+        z, n = a.zona, a.nome
+        self.ore[z] -= ORE_IN_ZONA[a.tipo]
+        c = self.conteggio[n] = self.conteggio[n] - 1
+        if c == 0:
+            del self.conteggio[n]
+            if n in self._ordine: self.rimaste.add(n)
+            if n in self._spl: self.spl_in_squadra -= 1
+        elif c == 1: self.doppie.discard(n)
+        self.assenti_in_squadra.discard((n, z))
+        r = self.grafo.indice(n) if self.grafo is not None else None
+        if r is None: return
+        self.vietate.discard((n, z))
+        righe = self._righe[z]
+        righe.pop(r, None)
+        for j in self.grafo.esclusioni(r):
+            if j in righe: self.incompatibili.discard((z, *sorted((n, righe[j]))))
+
+    def _stato(self, zona):
+        s = self.scarto(zona)
+        if s < -EPS: self.scoperte.add(zona)
+        else: self.scoperte.discard(zona)
+        if s >= ORE_TURNO - EPS: self.eccesso.add(zona)
+        else: self.eccesso.discard(zona)
+
+    # --- 2. LETTURE ---
+
+    def soglia(self, zona):
+        o = self.fabb.get(zona, 0)
+        return o if o > 0 else ORE_TURNO
+
+    def scarto(self, zona):
+        """Ore coperte meno soglia: negativo = zona scoperta."""
+        return self.ore.get(zona, 0.0) - self.soglia(zona)
+
+    def assegnazioni(self):
+        """Il planning corrente, zona per zona (anche chi è in due zone compare due volte)."""
+        return [a for sq in self.squadre.values() for a in sq.values()]
+
+    def elenco_rimaste(self):
+        """Disponibili non in squadra, con l'icona del turno, nell'ordine delle schede."""
+        return [nuova_assegnazione(n, None, self._prof, self._spl).etichetta() for n in sorted(self.rimaste, key=self._ordine.__getitem__)]
+
+    def capacita_spl(self):
+        return len(self.spl) * ORE_RIDOTTE
+
+    def avvisi(self):
+        """Righe leggibili dei problemi attuali, dai più gravi."""
+        righe = [f"{n} è in più zone: {', '.join(z for z, sq in self.squadre.items() if n in sq)}" for n in sorted(self.doppie)]
+        righe += [f"{n} è assente ma è in {z}" for n, z in sorted(self.assenti_in_squadra)]
+        righe += [f"{n} non va assegnata a {z}" for n, z in sorted(self.vietate)]
+        righe += [f"{a} e {b} non devono lavorare insieme ({z})" for z, a, b in sorted(self.incompatibili)]
+        righe += [f"{z} scoperta di {-self.scarto(z):.1f}h" for z in self.squadre if z in self.scoperte]
+        righe += [f"{z} in eccesso di {self.scarto(z):.1f}h" for z in self.squadre if z in self.eccesso]
+        return righe
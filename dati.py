@@ -0,0 +1,116 @@
+"""Accesso ai file dati con cache in memoria.
+
+Le tabelle lette restano in cache finché mtime e dimensione del file non cambiano
+(o finché non le riscriviamo noi), così i rerun di Streamlit non rileggono i CSV.
+La cache è a livello di modulo, quindi condivisa tra tutte le sessioni del server.
+Le scritture passano da concorrenza: blocco del file e sostituzione atomica.
+"""
+import os
+import threading
+
+import pandas as pd
+
+from concorrenza import blocco_file, scrivi_csv, unisci_modifiche
+from prestazioni import misura
+from schema_staff import canonico, carica_csv
+
+FILE_STAFF = 'Housekeeping_DB - Staff.csv'
+FILE_CONFIG = 'config_tempi.csv'
+
+_cache = {}   # (tabella, path assoluto) -> (firma file, DataFrame)
+_stats = {}   # tabella -> {"hit", "miss", "invalidazioni"}
+_lock = threading.Lock()
+
+# --- 1. PARSER ---
+
+def normalizza_staff(df):
+    """Tabella staff nel modello canonico di schema_staff (tipi, alias, default, niente NaN)."""
+    return canonico(df)
+
+def _parse_staff(path):
+    return carica_csv(path)
+
+def _parse_tempi(path):
+    return pd.read_csv(path)
+
+# --- 2. CACHE ---
+
+def _firma(path):
+    try:
+        s = os.stat(path)
+        return (s.st_mtime_ns, s.st_size)
+    except FileNotFoundError:
+        return None
+
+def versione(path):
+    """Firma (mtime, dimensione) di path: finché non cambia, carica_* restituisce gli stessi dati."""
+    return _firma(path)
+
+def leggi_con_cache(tabella, path, parser):
+    """parser(path) passando dalla cache; il parser deve restituire un DataFrame."""
+    chiave = (tabella, os.path.abspath(path))
+    firma = _firma(path)
+    with _lock:
+        c = _stats.setdefault(tabella, {"hit": 0, "miss": 0, "invalidazioni": 0})
+        voce = _cache.get(chiave)
+        if voce is not None and voce[0] == firma:
+            c["hit"] += 1
+            return voce[1].copy()
+        c["miss"] += 1
+        if voce is not None: c["invalidazioni"] += 1
+    df = parser(path) if firma is not None else pd.DataFrame()
+    with _lock:
+        _cache[chiave] = (firma, df)
+    return df.copy()
+
+def metti_in_cache(tabella, path, df, firma=None):
+    """Dopo una nostra scrittura la tabella scritta entra in cache con la firma nuova:
+    le altre sessioni non devono rileggere il file (tutte insieme) al prossimo rerun.
+    firma: quella presa subito dopo la scrittura (default: quella attuale del file)."""
+    with _lock:
+        _cache[(tabella, os.path.abspath(path))] = (_firma(path) if firma is None else firma, df)
+
+def invalida(tabella=None, path=None):
+    """Scarta le voci in cache (tutte, di una tabella o di un file)."""
+    with _lock:
+        for k in list(_cache):
+            if (tabella is None or k[0] == tabella) and (path is None or k[1] == os.path.abspath(path)):
+                del _cache[k]
+                _stats.setdefault(k[0], {"hit": 0, "miss": 0, "invalidazioni": 0})["invalidazioni"] += 1
+
+def statistiche_cache():
+    """Contatori hit/miss/invalidazioni per tabella."""
+    with _lock:
+        return {t: dict(c) for t, c in _stats.items()}
+
+# --- 3. API ---
+
+@misura("carica_staff")
+def carica_staff(path=FILE_STAFF):
+    """Tabella staff con colonne di default e Nome ripulito (vuota se manca il file)."""
+    return leggi_con_cache("staff", path, _parse_staff)
+
+def salva_staff(df, path=FILE_STAFF):
+    with blocco_file(path):
+        scrivi_csv(df, path)
+        firma = _firma(path)
+    # Il modello canonico per la cache si calcola fuori dal blocco: se nel frattempo il file
+    # cambia ancora, la firma non corrisponde e la prossima lettura lo rilegge
+    metti_in_cache("staff", path, normalizza_staff(df), firma)
+
+@misura("carica_tempi")
+def carica_tempi(path=FILE_CONFIG):
+    """Tabella config_tempi così com'è su file (vuota se manca)."""
+    return leggi_con_cache("tempi", path, _parse_tempi)
+
+def salva_tempi(df, path=FILE_CONFIG, base=None):
+    """Scrive i tempi; con base (la tabella da cui è partito l'editor) salva solo le righe
+    cambiate sopra il file attuale, e ConflittoVersione se qualcun altro ha cambiato le stesse."""
+    with blocco_file(path):
+        if base is not None:
+            attuale = carica_tempi(path)
+            if 'HOTEL' in attuale.columns: attuale['HOTEL'] = attuale['HOTEL'].astype(str).str.strip().str.upper()
+            colonne = [c for c in df.columns if c != 'HOTEL']
+            df = unisci_modifiche(attuale, base, df, 'HOTEL', colonne)
+        scrivi_csv(df, path)
+    invalida("tempi", path)
@@ -0,0 +1,223 @@
+"""Generazione dei PDF (scheda collaboratrice, esportazione di tutte le schede e planning del giorno)."""
+import hashlib
+import importlib.util
+import json
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+
+from prestazioni import misura
+from zone import registro
+
+# --- CONFIGURAZIONE PDF ---
+# reportlab si importa solo quando serve un PDF: chi non ne genera non paga l'import
+PDF_OK = importlib.util.find_spec("reportlab") is not None
+
+def _reportlab():
+    """(A4, canvas) di reportlab, importati alla prima richiesta."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    return A4, canvas
+
+SCHEDE_PER_BLOCCO = 25  # schede per task del pool nell'esportazione ZIP
+CACHE_PDF_MAX_BYTES = 32 * 2 ** 20
+
+@misura("pdf_scheda_staff")
+def pdf_scheda_staff(row):
+    buffer = BytesIO()
+    A4, canvas = _reportlab()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    _disegna_scheda(p, row)
+    p.save(); buffer.seek(0)
+    return buffer
+
+def _disegna_scheda(p, row):
+    """Una scheda su una pagina del canvas p."""
+    w, h = p._pagesize
+    p.setFont("Helvetica-Bold", 20); p.drawString(50, h-50, f"SCHEDA COLLABORATRICE: {row['Nome']}")
+    p.line(50, h-60, 540, h-60)
+    
+    y = h-90
+    p.setFont("Helvetica-Bold", 12); p.drawString(50, y, f"RUOLO: {row['Ruolo']}")
+    y -= 20; p.setFont("Helvetica", 11); p.drawString(50, y, f"Zone Padronanza: {row['Zone_Padronanza']}")
+    y -= 30
+    
+    p.setFont("Helvetica-Bold", 12); p.drawString(50, y, "DETTAGLI OPERATIVI:")
+    y -= 20; p.setFont("Helvetica", 11)
+    p.drawString(60, y, f"- Part-Time: {'SI' if row['Part_Time'] else 'NO'}")
+    p.drawString(200, y, f"- Jolly: {'SI' if row['Jolly'] else 'NO'}")
+    y -= 20
+    p.drawString(60, y, f"- Pendolare: {'SI' if row['Pendolare'] else 'NO'}")
+    p.drawString(200, y, f"- Viaggia con: {row['Viaggia_Con']}")
+    y -= 20
+    p.drawString(60, y, f"- Partner Preferito: {row['Lavora_Bene_Con']}")
+    p.drawString(200, y, f"- Riposo Pref: {row['Riposo_Pref']}")
+    
+    y -= 40
+    p.setFont("Helvetica-Bold", 12); p.drawString(50, y, "VALUTAZIONI (1-10):")
+    y -= 20; p.setFont("Helvetica", 11)
+    voci = [("Professionalità", 'Professionalita'), ("Esperienza", 'Esperienza'), ("Tenuta Fisica", 'Tenuta_Fisica'), 
+            ("Disponibilità", 'Disponibilita'), ("Empatia", 'Empatia'), ("Capacità Guida", 'Capacita_Guida')]
+    for label, col in voci:
+        p.drawString(60, y, f"{label}: {row[col]}/10")
+        y -= 15
+    p.showPage()
+
+# --- ESPORTAZIONE DI TUTTE LE SCHEDE ---
+
+def filtra_staff(df, ruoli=None, zone=None):
+    """Righe con Ruolo in ruoli e almeno una delle zone tra le Zone_Padronanza (None = nessun filtro)."""
+    m = df['Ruolo'].isin(ruoli) if ruoli else df['Nome'].notna()
+    if zone:
+        reg, zone = registro(), set(zone)
+        m &= df['Zone_Padronanza'].map(lambda s: not zone.isdisjoint(reg.coperte(s))).astype(bool)
+    return df[m]
+
+def _nome_file(nome, usati):
+    base = re.sub(r"[^\w\-]+", "_", str(nome)).strip("_") or "Scheda"
+    f = f"Scheda_{base}.pdf"; k = 1
+    while f in usati: k += 1; f = f"Scheda_{base}_{k}.pdf"
+    usati.add(f)
+    return f
+
+def _blocco_schede(righe):
+    """Worker: un PDF per scheda, restituiti come (nome, bytes)."""
+    return [(r['Nome'], pdf_scheda_staff(r).getvalue()) for r in righe]
+
+def esporta_schede(df, formato="pdf", processi=None, avanzamento=None):
+    """Tutte le schede di df in un unico PDF (formato 'pdf') o in uno ZIP di PDF ('zip').
+
+    Il risultato va in un file temporaneo su disco, restituito aperto e riavvolto, così
+    le schede non restano tutte in memoria. Lo ZIP è reso a blocchi in un pool di processi
+    e ogni blocco viene scritto nell'archivio appena arriva. Il PDF unico resta in un solo
+    processo (un documento reportlab non si divide tra processi) ma viene scritto sul file
+    temporaneo man mano. avanzamento(fatte, totale) viene chiamata durante il lavoro.
+    Restituisce {"file", "pagine", "secondi", "pagine_al_s"}.
+    """
+    righe = df.to_dict('records')
+    tot = len(righe); fatte = 0
+    out = tempfile.TemporaryFile()
+    t0 = time.perf_counter()
+    if formato == "zip":
+        blocchi = [righe[i:i + SCHEDE_PER_BLOCCO] for i in range(0, tot, SCHEDE_PER_BLOCCO)]
+        usati = set()
+        with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as z:
+            if len(blocchi) > 1 and processi != 1:
+                ex = ProcessPoolExecutor(max_workers=processi)
+                risultati = ex.map(_blocco_schede, blocchi)
+            else:
+                ex = None; risultati = map(_blocco_schede, blocchi)
+            try:
+                for blocco in risultati:
+                    for nome, pdf in blocco:
+                        z.writestr(_nome_file(nome, usati), pdf)
+                    fatte += len(blocco)
+                    if avanzamento: avanzamento(fatte, tot)
+            finally:
+                if ex: ex.shutdown()
+    else:
+        A4, canvas = _reportlab()
+        p = canvas.Canvas(out, pagesize=A4)
+        for r in righe:
+            _disegna_scheda(p, r); fatte += 1
+            if avanzamento and (fatte % SCHEDE_PER_BLOCCO == 0 or fatte == tot): avanzamento(fatte, tot)
+        p.save()
+    sec = time.perf_counter() - t0
+    out.seek(0)
+    return {"file": out, "pagine": tot, "secondi": round(sec, 3), "pagine_al_s": round(tot / sec, 1) if sec > 0 else None}
+
+@misura("pdf_planning")
+def genera_pdf_planning(data_str, schieramento, split_list, lista_assenti):
+    buffer = BytesIO()
+    A4, canvas = _reportlab()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    w, h = A4
+    p.setFont("Helvetica-Bold", 18); p.drawString(50, h-50, f"PLANNING - {data_str}")
+    p.line(50, h-60, 540, h-60); y = h-85
+    if lista_assenti:
+        p.setFont("Helvetica-Bold", 10); p.setFillColorRGB(0.7, 0, 0)
+        p.drawString(50, y, f"🛌 ASSENTI: {', '.join(lista_assenti)}")
+        y -= 25; p.setFillColorRGB(0,0,0)
+    for res in schieramento:
+        if y < 100: p.showPage(); y = h-70
+        p.setFont("Helvetica-Bold", 12); p.drawString(50, y, f"ZONA: {res['Hotel'].upper()}")
+        y -= 15; p.setFont("Helvetica", 10); p.drawString(60, y, f"Team: {res['Team']}")
+        y -= 25
+    p.save(); buffer.seek(0)
+    return buffer
+
+# --- CACHE DEI PDF DI PLANNING ---
+
+class CachePDF:
+    """LRU dei PDF di planning già generati, limitata in byte totali.
+
+    La chiave è lo sha256 del contenuto (data, squadre, spezzati, assenti): lo stesso
+    planning scaricato più volte viene generato una volta sola. prepara() avvia la
+    generazione in un thread di sfondo; pdf() aspetta quella in corso invece di rifarla.
+    """
+
+    def __init__(self, max_bytes=CACHE_PDF_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._voci = OrderedDict()   # chiave -> bytes
+        self._in_corso = {}          # chiave -> Future
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf_planning")
+        self.hit = self.miss = self.scartati = 0
+
+    @staticmethod
+    def chiave(data_str, schieramento, split_list, lista_assenti):
+        contenuto = json.dumps([data_str, [[r['Hotel'], r['Team']] for r in schieramento], list(split_list), list(lista_assenti)],
+                               ensure_ascii=False, default=str)
+        return hashlib.sha256(contenuto.encode("utf-8")).hexdigest()
+
+    def _metti(self, k, pdf):
+        with self._lock:
+            if k in self._voci: return
+            self._voci[k] = pdf; self._bytes += len(pdf)
+            while self._bytes > self.max_bytes and len(self._voci) > 1:
+                _, vecchio = self._voci.popitem(last=False)
+                self._bytes -= len(vecchio); self.scartati += 1
+
+    def _genera(self, k, args):
+        try:
+            pdf = genera_pdf_planning(*args).getvalue()
+            self._metti(k, pdf)
+            return pdf
+        finally:
+            with self._lock: self._in_corso.pop(k, None)
+
+    def prepara(self, data_str, schieramento, split_list, lista_assenti):
+        """Genera il PDF in sfondo se non è già in cache o in lavorazione."""
+        args = (data_str, schieramento, list(split_list), list(lista_assenti))
+        k = self.chiave(*args)
+        with self._lock:
+            if k in self._voci or k in self._in_corso: return k
+            self._in_corso[k] = self._pool.submit(self._genera, k, args)
+        return k
+
+    def pdf(self, data_str, schieramento, split_list, lista_assenti):
+        """Byte del PDF: dalla cache, dalla generazione in sfondo già avviata o generato ora."""
+        args = (data_str, schieramento, list(split_list), list(lista_assenti))
+        k = self.chiave(*args)
+        with self._lock:
+            if k in self._voci:
+                self._voci.move_to_end(k); self.hit += 1
+                return self._voci[k]
+            fut = self._in_corso.get(k)
+            if fut: self.hit += 1
+            else: self.miss += 1
+        return fut.result() if fut else self._genera(k, args)
+
+    def statistiche(self):
+        with self._lock:
+            tot = self.hit + self.miss
+            return {"voci": len(self._voci), "bytes": self._bytes, "hit": self.hit, "miss": self.miss,
+                    "scartati": self.scartati, "hit_rate": round(self.hit / tot, 3) if tot else None}
+
+cache_pdf = CachePDF()
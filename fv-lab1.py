@@ -1,199 +1,46 @@
 import streamlit as st
 import pandas as pd
-import os
+import importlib.util
 from datetime import datetime
 from io import BytesIO
+from archivio import backend
+from rating import calcola_rating, calcola_status
+from zone import registro
 
 # --- CONFIGURAZIONE PDF ---
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    PDF_OK = True
-except ImportError:
-    PDF_OK = False
-
-# --- COSTANTI ---
-FILE_STAFF = 'Housekeeping_DB - Staff.csv'
-FILE_CONFIG = 'config_tempi.csv'
-LISTA_HOTEL = [
-    "Hotel Castello", "Hotel Castello Garden", "Hotel Castello 4 Piano", 
-    "Cala del Forte", "Le Dune", "Villa del Parco", "Hotel Pineta", 
-    "Bouganville", "Le Palme", "Il Borgo", "Le Ville", "Spazi Comuni"
-]
-
-# --- 1. LOGICA DATI ---
-
-def load_data():
-    if os.path.exists(FILE_STAFF):
-        df = pd.read_csv(FILE_STAFF)
-        df.columns = [c.strip() for c in df.columns]
-        cols_default = {
-            'Part_Time': 0, 'Jolly': 0, 'Pendolare': 0, 'Riposo_Pref': '',
-            'Viaggia_Con': '', 'Lavora_Bene_Con': 'Nessuna', 'Zone_Padronanza': '',
-            'Professionalita': 5, 'Esperienza': 5, 'Tenuta_Fisica': 5, 
-            'Disponibilita': 5, 'Empatia': 5, 'Capacita_Guida': 5
-        }
-        for col, val in cols_default.items():
-            if col not in df.columns: df[col] = val
-        df['Nome'] = df['Nome'].astype(str).str.strip()
-        return df.fillna("")
-    return pd.DataFrame()
-
-def save_data(df):
-    df.to_csv(FILE_STAFF, index=False)
-
-def get_rating_bar(row):
-    try:
-        if 'overnante' in str(row.get('Ruolo', '')).lower(): return "⭐ (Coord.)"
-        v = (pd.to_numeric(row.get('Professionalita', 5))*0.25 + pd.to_numeric(row.get('Esperienza', 5))*0.20 + 
-             pd.to_numeric(row.get('Tenuta_Fisica', 5))*0.20 + pd.to_numeric(row.get('Disponibilita', 5))*0.15)
-        voto = round((v/2)*2)/2
-        return "🟩"*int(voto) + ("🟨" if (voto%1)>=0.5 else "")
-    except: return "⬜"*5
-
-# --- 2. LOGICA PDF ---
-
-def genera_pdf_planning(data_str, schieramento, assenti):
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    w, h = A4
-    p.setFont("Helvetica-Bold", 18); p.drawString(50, h-50, f"PLANNING - {data_str}")
-    p.line(50, h-60, 540, h-60); y = h-85
-    if assenti:
-        p.setFont("Helvetica-Bold", 10); p.setFillColorRGB(0.7, 0, 0)
-        p.drawString(50, y, f"🛌 ASSENTI: {', '.join(assenti)}")
-        y -= 25; p.setFillColorRGB(0,0,0)
-    for res in schieramento:
-        if y < 100: p.showPage(); y = h-70
-        p.setFont("Helvetica-Bold", 12); p.drawString(50, y, f"ZONA: {res['Hotel'].upper()}")
-        y -= 15; p.setFont("Helvetica", 10); p.drawString(60, y, f"Team: {res['Team']}")
-        y -= 25
-    p.save(); buffer.seek(0)
-    return buffer
+# reportlab si importa solo quando serve un PDF: chi non ne genera non paga l'import
+PDF_OK = importlib.util.find_spec("reportlab") is not None
 
-# --- 3. SEZIONI INTERFACCIA ---
-
-def sezione_staff(df):
-    nomi_db = sorted(df['Nome'].unique().tolist()) if not df.empty else []
-    sel_n = st.selectbox("Modifica collaboratrice:", ["--- NUOVA ---"] + nomi_db)
-    curr = df[df['Nome'] == sel_n].iloc[0] if sel_n != "--- NUOVA ---" else None
-    
-    with st.form("form_staff"):
-        c1, c2, c3 = st.columns(3)
-        f_nome = c1.text_input("Nome", value=str(curr['Nome']) if curr is not None else "")
-        f_ruolo = c2.selectbox("Ruolo", ["Cameriera", "Governante"], index=1 if curr and "overnante" in str(curr['Ruolo']).lower() else 0)
-        f_padro = c3.multiselect("Zone", LISTA_HOTEL, default=[z.strip() for z in str(curr['Zone_Padronanza']).split(",") if z.strip() in LISTA_HOTEL] if curr else [])
-        
-        st.divider()
-        # Qui puoi aggiungere gli slider e i checkbox come nel tuo codice originale
-        
-        if st.form_submit_button("💾 SALVA"):
-            # Logica di salvataggio (concat e save_data)
-            st.success("Salvato!")
-            st.rerun()
-
-def sezione_planning(df):
-    c_d, c_a = st.columns([1, 2])
-    data_p = c_d.date_input("Data:", datetime.now())
-    assenti = c_a.multiselect("🛌 Assenti:", sorted(df['Nome'].tolist()) if not df.empty else [])
-    
-    # Input carichi hotel
-    cur_inp = {}
-    for h in LISTA_HOTEL:
-        cols = st.columns([2, 1, 1, 1, 1, 1, 1])
-        cols[0].write(f"**{h}**")
-        cur_inp[h] = { "AI": cols[1].number_input("AI", 0, 100, 0, key=f"p_ai_{h}", label_visibility="collapsed") }
-        # ... aggiungi gli altri input (FI, AG, ecc) qui
-
-    if st.button("🚀 GENERA", use_container_width=True):
-        # Inserisci qui il tuo algoritmo di calcolo fabbisogno
-        st.session_state['res_v_fin'] = [{"Hotel": "Esempio", "Team": "Nome 1, Nome 2", "Info": "G:1 | Cam:2", "Req": 15.0}]
-        st.rerun()
-
-# --- 4. MAIN ---
-
-def main():
-    st.set_page_config(page_title="Forte Village Housekeeping", layout="wide")
-    df = load_data()
-    
-    t_dash, t_staff, t_tempi, t_plan = st.tabs(["🏆 Dashboard", "👥 Staff", "⚙️ Tempi", "🚀 Planning"])
-    
-    with t_dash:
-        if not df.empty:
-            df_v = df.copy()
-            df_v['Rating'] = df_v.apply(get_rating_bar, axis=1)
-            st.dataframe(df_v[['Nome', 'Ruolo', 'Rating', 'Zone_Padronanza']], use_container_width=True)
-            
-    with t_staff:
-        sezione_staff(df)
-        
-    with t_plan:
-        sezione_planning(df)
-
-if __name__ == "__main__":
-    main()import streamlit as st
-import pandas as pd
-import os
-from datetime import datetime
-from io import BytesIO
-
-# --- CONFIGURAZIONE PDF ---
-try:
+def _reportlab():
+    """(A4, canvas) di reportlab, importati alla prima richiesta."""
     from reportlab.lib.pagesizes import A4
     from reportlab.pdfgen import canvas
-    from reportlab.lib import colors
-    PDF_OK = True
-except ImportError:
-    PDF_OK = False
+    return A4, canvas
 
 # --- COSTANTI E CONFIGURAZIONE ---
 FILE_STAFF = 'Housekeeping_DB - Staff.csv'
 FILE_CONFIG = 'config_tempi.csv'
-LISTA_HOTEL = [
-    "Hotel Castello", "Hotel Castello Garden", "Hotel Castello 4 Piano", 
-    "Cala del Forte", "Le Dune", "Villa del Parco", "Hotel Pineta", 
-    "Bouganville", "Le Palme", "Il Borgo", "Le Ville", "Spazi Comuni"
-]
+LISTA_HOTEL = registro().hotel()
 
 # --- 1. FUNZIONI DI GESTIONE DATI ---
 
 def load_data():
-    """Carica i dati dello staff dal file CSV."""
-    if os.path.exists(FILE_STAFF):
-        df = pd.read_csv(FILE_STAFF)
-        df.columns = [c.strip() for c in df.columns]
-        cols_default = {
-            'Part_Time': 0, 'Jolly': 0, 'Pendolare': 0, 'Riposo_Pref': '',
-            'Viaggia_Con': '', 'Lavora_Bene_Con': 'Nessuna', 'Zone_Padronanza': '',
-            'Professionalita': 5, 'Esperienza': 5, 'Tenuta_Fisica': 5, 
-            'Disponibilita': 5, 'Empatia': 5, 'Capacita_Guida': 5
-        }
-        for col, val in cols_default.items():
-            if col not in df.columns: df[col] = val
-        df['Nome'] = df['Nome'].astype(str).str.strip()
-        return df.fillna("")
-    return pd.DataFrame(columns=['Nome', 'Ruolo'])
+    """Staff dal backend configurato, nel modello canonico di schema_staff (come app.py)."""
+    return backend().carica()
 
-def save_data(df):
-    """Salva il DataFrame su CSV."""
-    df.to_csv(FILE_STAFF, index=False)
+def save_data(record, nome_orig=None, versione=None):
+    """Salva una scheda con il controllo di versione del backend (come app.py).
 
-def get_rating_bar(row):
-    """Genera la barra visiva del rating."""
-    try:
-        if 'overnante' in str(row.get('Ruolo', '')).lower(): return "⭐ (Coord.)"
-        v = (pd.to_numeric(row.get('Professionalita', 5))*0.25 + 
-             pd.to_numeric(row.get('Esperienza', 5))*0.20 + 
-             pd.to_numeric(row.get('Tenuta_Fisica', 5))*0.20 + 
-             pd.to_numeric(row.get('Disponibilita', 5))*0.15)
-        voto = round((v/2)*2)/2
-        return "🟩"*int(voto) + ("🟨" if (voto%1)>=0.5 else "")
-    except: return "⬜"*5
+    versione: Ultima_Modifica letta all'apertura della scheda ("" per una scheda nuova);
+    solleva concorrenza.ConflittoVersione se nel frattempo qualcun altro l'ha cambiata.
+    """
+    return backend().upsert(record, nome_orig, versione)
 
 # --- 2. FUNZIONI PDF ---
 
 def genera_pdf_planning(data_str, schieramento, lista_assenti):
     buffer = BytesIO()
+    A4, canvas = _reportlab()
     p = canvas.Canvas(buffer, pagesize=A4)
     w, h = A4
     p.setFont("Helvetica-Bold", 18); p.drawString(50, h-50, f"PLANNING - {data_str}")
@@ -218,8 +65,12 @@ def tab_dashboard(df):
     st.header("🏆 Performance Staff")
     if not df.empty:
         df_v = df.copy()
-        df_v['Rating'] = df_v.apply(get_rating_bar, axis=1)
-        df_v['Status'] = df_v.apply(lambda r: ("🃏 " if r['Jolly'] else "") + ("🚌 " if r['Pendolare'] else ""), axis=1)
+        rt = calcola_rating(df_v)
+        df_v['Rating'] = rt['Rating']
+        df_v['Status'] = calcola_status(df_v)
+        non_validi = rt['Errori'] != ""
+        if non_validi.any():
+            st.warning("⚠️ Valutazioni non valide: " + "; ".join(f"{n} ({e})" for n, e in zip(df_v.loc[non_validi, 'Nome'], rt.loc[non_validi, 'Errori'])))
         st.dataframe(df_v[['Status', 'Nome', 'Ruolo', 'Rating', 'Zone_Padronanza', 'Lavora_Bene_Con']], 
                      use_container_width=True, hide_index=True)
     else:
@@ -237,7 +88,7 @@ def tab_anagrafica(df):
         f_nome = c1.text_input("Nome e Cognome", value=str(curr['Nome']) if curr is not None else "")
         f_ruolo = c2.selectbox("Ruolo", ["Cameriera", "Governante"], 
                                index=1 if curr is not None and "overnante" in str(curr['Ruolo']).lower() else 0)
-        def_padro = [z.strip() for z in str(curr['Zone_Padronanza']).split(",") if z.strip() in LISTA_HOTEL] if curr is not None else []
+        def_padro = list(dict.fromkeys(registro().canonico(z) for z in str(curr['Zone_Padronanza']).split(",") if registro().canonico(z) in LISTA_HOTEL)) if curr is not None else []
         f_padro = c3.multiselect("Zone di Padronanza", LISTA_HOTEL, default=def_padro)
         
         # ... (Resto dei campi del form semplificati per brevità, mantieni i tuoi slider e checkbox)
@@ -262,20 +113,20 @@ def main():
     # Inizializzazione dati
     df = load_data()
     
-    # Definizione Tab
-    t_dash, t_staff, t_tempi, t_plan = st.tabs(["🏆 Dashboard", "👥 Anagrafica", "⚙️ Tempi", "🚀 Planning"])
+    # Definizione Tab: con on_change="rerun" si disegna solo il tab aperto
+    t_dash, t_staff, t_tempi, t_plan = st.tabs(["🏆 Dashboard", "👥 Anagrafica", "⚙️ Tempi", "🚀 Planning"], key="sezione", on_change="rerun")
     
-    with t_dash:
-        tab_dashboard(df)
+    if t_dash.open:
+        with t_dash: tab_dashboard(df)
         
-    with t_staff:
-        tab_anagrafica(df)
+    if t_staff.open:
+        with t_staff: tab_anagrafica(df)
         
-    with t_tempi:
-        tab_tempi()
+    if t_tempi.open:
+        with t_tempi: tab_tempi()
         
-    with t_plan:
-        tab_planning(df)
+    if t_plan.open:
+        with t_plan: tab_planning(df)
 
 if __name__ == "__main__":
     main()
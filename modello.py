@@ -0,0 +1,63 @@
+"""Modello dell'assegnazione del giorno: un record per persona, le stringhe solo a video.
+
+In session_state il planning è una lista di Assegnazione (nome, zona, ruolo, tipo turno)
+nell'ordine delle zone; squadre, etichette con le icone, righe del PDF ed esportazioni
+si ricavano da qui, senza rileggere testi già formattati.
+"""
+import pandas as pd
+
+from planning import ICONE, info_team
+
+RUOLO_DI_TIPO = {"GOV": "Governante", "SPL": "Cameriera", "PT": "Cameriera", "STD": "Cameriera"}
+
+class Assegnazione:
+    """Una persona in una zona. tipo: GOV, SPL (spezzato), PT (part-time) o STD."""
+    __slots__ = ("nome", "zona", "ruolo", "tipo")
+
+    def __init__(self, nome, zona, ruolo, tipo):
+        self.nome, self.zona, self.ruolo, self.tipo = nome, zona, ruolo, tipo
+
+    def __repr__(self):
+        return f"Assegnazione({self.nome!r}, {self.zona!r}, {self.ruolo!r}, {self.tipo!r})"
+
+    def __eq__(self, altro):
+        return isinstance(altro, Assegnazione) and all(getattr(self, k) == getattr(altro, k) for k in self.__slots__)
+
+    def etichetta(self):
+        """Nome con l'icona del turno, come nel planning a video."""
+        return f"⭐ {self.nome} (Gov.)" if self.tipo == "GOV" else f"{ICONE[self.tipo]}{self.nome}"
+
+# --- 1. CONVERSIONI ---
+
+def da_esito(esito):
+    """Assegnazioni dall'esito di genera_schieramento / solver / ripianifica."""
+    return [Assegnazione(m['Nome'], r['Hotel'], RUOLO_DI_TIPO[m['Tipo']], m['Tipo'])
+            for r in esito['ris'] for m in r['Membri']]
+
+def a_ris(assegnazioni, fabb):
+    """Ritorno al formato 'ris' del motore (per ripianifica e per chi lo usa ancora)."""
+    return [{"Hotel": z, "Team": testo_team(aa), "Req": round(fabb.get(z, 0), 1), "Info": info(aa),
+             "Membri": [{"Nome": a.nome, "Tipo": a.tipo} for a in aa]} for z, aa in per_zona(assegnazioni).items()]
+
+def per_zona(assegnazioni):
+    """{zona: [Assegnazione]} nell'ordine in cui le zone compaiono."""
+    out = {}
+    for a in assegnazioni: out.setdefault(a.zona, []).append(a)
+    return out
+
+# --- 2. TESTI (solo a video, PDF, esportazioni) ---
+
+def testo_team(aa):
+    return ", ".join(a.etichetta() for a in aa)
+
+def info(aa):
+    return info_team([{"Tipo": a.tipo} for a in aa])
+
+def righe_pdf(assegnazioni):
+    """Righe per genera_pdf_planning: zona e nomi semplici (i font del PDF non hanno le emoji)."""
+    return [{"Hotel": z, "Team": ", ".join(a.nome for a in aa)} for z, aa in per_zona(assegnazioni).items()]
+
+def tabella(assegnazioni):
+    """Una riga per assegnazione, per le esportazioni CSV."""
+    return pd.DataFrame([{"Nome": a.nome, "Zona": a.zona, "Ruolo": a.ruolo, "Tipo": a.tipo} for a in assegnazioni],
+                        columns=["Nome", "Zona", "Ruolo", "Tipo"])
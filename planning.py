@@ -0,0 +1,264 @@
+"""Motore di pianificazione: fabbisogno ore e schieramento, senza Streamlit."""
+import heapq
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from prestazioni import misura
+from schema_staff import flag
+from vincoli import grafo_vincoli
+from zone import registro
+
+# --- COSTANTI ---
+# Zone, zone unite e priorità vengono dal registro (zone.csv)
+LISTA_HOTEL = registro().hotel()
+ZONE_UNITE = registro().unite()
+TEMPI_DEFAULT = {"AI": 60, "FI": 30, "AG": 45, "FG": 25}
+ORE_TURNO = 7.5      # turno pieno
+ORE_RIDOTTE = 5.0    # spezzati e part-time
+# Ore che coprono il fabbisogno della zona per tipo di turno: la governante non ne copre
+ORE_IN_ZONA = {"GOV": 0.0, "STD": ORE_TURNO, "PT": ORE_RIDOTTE, "SPL": ORE_RIDOTTE}
+
+ICONE = {"GOV": "⭐ ", "SPL": "🌙 ", "PT": "🕒 ", "STD": ""}
+
+# --- 1. TEMPI E FABBISOGNO ---
+
+def leggi_tempi(conf_df, lista_hotel=LISTA_HOTEL):
+    """Restituisce {hotel: {AI, FI, AG, FG}} in minuti, con i default dove manca la riga."""
+    reg, righe = registro(), {}
+    if conf_df is not None and not conf_df.empty:
+        conf_df = conf_df.copy()
+        conf_df.columns = [str(c).strip().upper() for c in conf_df.columns]
+        if 'HOTEL' in conf_df.columns:
+            for _, r in conf_df.drop_duplicates('HOTEL').iterrows():
+                righe.setdefault(reg.canonico(r['HOTEL']).upper(), r)
+    tempi = {}
+    for h in lista_hotel:
+        r = righe.get(reg.canonico(h).upper())
+        tempi[h] = {k: (r.get(k, v) if r is not None else v) for k, v in TEMPI_DEFAULT.items()}
+    return tempi
+
+# Il modello dei carichi è lineare: ore = carichi (N x 6) @ minuti per unità (6) / 60, per
+# hotel. Le colonne sono TIPI_CARICO; coperture a 1/3 di fermata, biancheria a 1/4.
+TIPI_CARICO = ["AI", "FI", "AG", "FG", "COP", "BIAN"]
+TIPI_SPEZZATI = [4, 5]   # COP e BIAN: il lavoro del pomeriggio per gli spezzati
+
+def matrice_tempi(conf_df, lista_hotel=LISTA_HOTEL):
+    """Minuti per unità di carico, una riga per hotel e una colonna per TIPI_CARICO (H x 6)."""
+    tempi = leggi_tempi(conf_df, lista_hotel)
+    t = np.array([[float(tempi[h][k]) for k in TEMPI_DEFAULT] for h in lista_hotel]).reshape(len(lista_hotel), 4)
+    return np.column_stack([t, t[:, 1] / 3, t[:, 1] / 4])
+
+def matrice_carichi(cur_inp, lista_hotel=LISTA_HOTEL):
+    """cur_inp {hotel: {AI, ..., BIAN}} come matrice H x 6 (zero dove manca)."""
+    return np.array([[cur_inp.get(h, {}).get(k, 0) for k in TIPI_CARICO] for h in lista_hotel], dtype=float).reshape(len(lista_hotel), 6)
+
+def ore_carichi(carichi, minuti):
+    """Ore per hotel e ore per gli spezzati da carichi (... x H x 6) e minuti (H x 6).
+
+    Le dimensioni in testa (giorni, scenari) restano: un solo prodotto per tutto il lotto.
+    I minuti si moltiplicano per 12 (i terzi e i quarti di fermata diventano interi), così
+    con tempi interi le somme sono esatte in qualunque ordine le faccia einsum.
+    """
+    m12 = minuti * 12
+    ore = np.einsum('...hk,hk->...h', carichi, m12) / 720
+    spl = np.einsum('...hk,hk->...', carichi[..., TIPI_SPEZZATI], m12[:, TIPI_SPEZZATI]) / 720
+    return ore, spl
+
+def matrice_zone(zone, lista_hotel=LISTA_HOTEL):
+    """Z x H: ore delle zone (hotel o zone unite) come somma delle ore degli hotel."""
+    pos, unite = {h: j for j, h in enumerate(lista_hotel)}, registro().unite()
+    a = np.zeros((len(zone), len(lista_hotel)))
+    for i, z in enumerate(zone):
+        for m in unite.get(z, [z]):
+            if m in pos: a[i, pos[m]] = 1
+    return a
+
+@misura("fabbisogno")
+def calcola_fabbisogno(cur_inp, conf_df, lista_hotel=LISTA_HOTEL):
+    """Ore richieste per zona (con le zone unite) e ore di COP + BIANC per gli spezzati."""
+    ore, spl = ore_carichi(matrice_carichi(cur_inp, lista_hotel), matrice_tempi(conf_df, lista_hotel))
+    fabb = dict(zip(lista_hotel, ore.tolist()))
+    for unita, membri in registro().unite().items():
+        fabb[unita] = sum(fabb.get(m, 0) for m in membri)
+    return fabb, round(float(spl), 1)
+
+def ordine_zone(lista_hotel=LISTA_HOTEL):
+    """Zone nell'ordine di riempimento: per priorità del registro, i gruppi al posto dei membri."""
+    return registro().ordine(lista_hotel)
+
+# --- 2. SPEZZATI ---
+# Il pool si dimensiona sulle ore di coperture e biancheria (una persona ogni ORE_RIDOTTE)
+# e si sceglie tra chi può fare lo spezzato; i compiti della sera vengono poi divisi per
+# zona tra le persone del pool, bilanciando le ore.
+
+def n_spezzati(carico_spl):
+    """Persone nel pool per carico_spl ore di COP + BIANC (per eccesso)."""
+    return max(0, math.ceil(round(carico_spl / ORE_RIDOTTE, 6)))
+
+def ordine_spezzati(attive, gi=None, grafo=None, recenti=None):
+    """Posizioni in attive delle cameriere che possono fare lo spezzato, in ordine di scelta.
+
+    Possono quelle con Turno_Spezzato (tutte le cameriere se il file non ne segna nessuna).
+    Vengono prima quelle che non viaggiano in auto con altre (il turno sarebbe diverso da
+    quello della compagna), poi chi ne ha fatti meno di recente (recenti = {nome: turni}),
+    poi chi ha più Tenuta_Fisica, infine l'ordine di file.
+    """
+    nomi = attive['Nome'].tolist()
+    cam = [i for i, r in enumerate(attive['Ruolo'].tolist()) if r == 'Cameriera']
+    ok = flag(attive, 'Turno_Spezzato')
+    if ok[cam].any(): cam = [i for i in cam if ok[i]]
+    tenuta = (pd.to_numeric(attive['Tenuta_Fisica'], errors='coerce').fillna(0).tolist()
+              if 'Tenuta_Fisica' in attive.columns else [0] * len(nomi))
+    in_auto = [grafo is not None and gi is not None and gi[i] >= 0 and bool(grafo.in_auto[gi[i]]) for i in range(len(nomi))]
+    recenti = recenti or {}
+    return sorted(cam, key=lambda i: (in_auto[i], recenti.get(nomi[i], 0), -tenuta[i], i))
+
+def ore_serali(cur_inp, conf_df, lista_hotel=LISTA_HOTEL):
+    """{zona di pianificazione: ore di COP + BIANC}, solo le zone che ne hanno."""
+    c = matrice_carichi(cur_inp, lista_hotel)
+    solo = np.zeros_like(c); solo[:, TIPI_SPEZZATI] = c[:, TIPI_SPEZZATI]
+    zone = ordine_zone(lista_hotel)
+    ore = matrice_zone(zone, lista_hotel) @ ore_carichi(solo, matrice_tempi(conf_df, lista_hotel))[0]
+    return {z: o for z, o in zip(zone, ore.tolist()) if o > 0}
+
+def compiti_serali(ore_zona, pool):
+    """Coperture e biancheria della sera ({zona: ore}) divise tra le persone del pool.
+
+    Ogni zona diventa compiti da al più ORE_RIDOTTE; i compiti, dal più lungo, vanno a chi
+    ha meno ore finora (LPT), così il pool resta bilanciato. Restituisce [{Nome, Zona, Ore}]
+    nell'ordine del pool.
+    """
+    if not pool: return []
+    compiti = []
+    for z, ore in ore_zona.items():
+        while ore > 1e-9:
+            compiti.append((min(ore, ORE_RIDOTTE), z)); ore -= ORE_RIDOTTE
+    carico, quote = [(0.0, k) for k in range(len(pool))], {}
+    for ore, z in sorted(compiti, key=lambda c: -c[0]):
+        c, k = heapq.heappop(carico)
+        quote[(k, z)] = quote.get((k, z), 0.0) + ore
+        heapq.heappush(carico, (c + ore, k))
+    return [{"Nome": pool[k], "Zona": z, "Ore": round(o, 2)} for (k, z), o in sorted(quote.items(), key=lambda kv: kv[0][0])]
+
+# --- 3. SCHIERAMENTO ---
+
+def info_team(membri):
+    """Riga riassuntiva G/Cam/Pome per un team."""
+    n_gov = sum(1 for m in membri if m['Tipo'] == "GOV")
+    n_cam = len(membri) - n_gov
+    n_spl = sum(1 for m in membri if m['Tipo'] == "SPL")
+    n_pt = sum(1 for m in membri if m['Tipo'] == "PT")
+    n_std = n_cam - n_spl - n_pt
+    return f"G:{n_gov} | Cam:{n_cam} (Coppie:{n_cam/2}) | Pome:{n_std} | 🕒:{n_pt} 🌙:{n_spl}"
+
+def team_str(membri):
+    """Team nel formato testuale mostrato a video e nel PDF."""
+    return ", ".join(f"⭐ {m['Nome']} (Gov.)" if m['Tipo'] == "GOV" else f"{ICONE[m['Tipo']]}{m['Nome']}" for m in membri)
+
+@misura("indici")
+def costruisci_indici(attive, zone, grafo=None, n_spl=0, recenti=None):
+    """Indici costruiti una volta per run: ruoli, part-time, zona -> governanti, pool spezzati
+    (n_spl persone, vedi ordine_spezzati) e (con il grafo dei vincoli) la riga del grafo per
+    ogni persona attiva (-1 se manca)."""
+    nomi = attive['Nome'].tolist()
+    ruoli = attive['Ruolo'].tolist()
+    padro = attive['Zone_Padronanza'].tolist()
+    pt = flag(attive, 'Part_Time').tolist()
+    gov = [i for i, r in enumerate(ruoli) if r == 'Governante']
+    cam = [i for i, r in enumerate(ruoli) if r == 'Cameriera']
+    # Zona -> governanti che la padroneggiano (anche tramite la zona madre o il gruppo)
+    reg = registro()
+    gov_per_zona = {zona: [] for zona in zone}
+    for i in gov:
+        for zona in reg.coperte(padro[i]):
+            if zona in gov_per_zona: gov_per_zona[zona].append(i)
+    gi = grafo.righe(nomi) if grafo is not None else [-1] * len(nomi)
+    spl = ordine_spezzati(attive, gi, grafo, recenti)[:n_spl]
+    return {"nomi": nomi, "pt": pt, "cam": cam, "gov_per_zona": gov_per_zona, "spl": spl, "gi": gi, "grafo": grafo}
+
+def genera_schieramento(df, conf_df, cur_inp, assenti=(), lista_hotel=LISTA_HOTEL, grafo=None, recenti=None):
+    """Schieramento greedy del giorno.
+
+    Restituisce un dict con 'ris' (una voce per zona: Hotel, Team, Req, Info, Membri),
+    'spl' (pool spezzati, dimensionato sulle ore di COP + BIANC), 'serale' (compiti della
+    sera per persona del pool, vedi compiti_serali) e 'carico_spezzati_ore'. recenti =
+    {nome: spezzati fatti di recente} fa ruotare il pool. Rispetta il grafo dei vincoli
+    (costruito da df se non passato): zone vietate e persone incompatibili sono saltate,
+    compagne d'auto e coppie preferite vengono prese subito dopo.
+    """
+    return schieramento_greedy(df, conf_df, cur_inp, assenti, lista_hotel, grafo, recenti)[0]
+
+@misura("planning_greedy")
+def schieramento_greedy(df, conf_df, cur_inp, assenti=(), lista_hotel=LISTA_HOTEL, grafo=None, recenti=None):
+    """(esito, indici, zone in ordine): genera_schieramento con gli indici del giorno
+    (costruisci_indici, None senza staff), per il solver che riparte da qui."""
+    fabb, carico_spl = calcola_fabbisogno(cur_inp, conf_df, lista_hotel)
+    z_ord = ordine_zone(lista_hotel)
+    if df.empty:
+        return {"ris": [], "spl": [], "serale": [], "carico_spezzati_ore": carico_spl, "fabb": fabb}, None, z_ord
+
+    g = grafo if grafo is not None else grafo_vincoli(df, lista_hotel, ZONE_UNITE)
+    idx = costruisci_indici(df[~df['Nome'].isin(assenti)], z_ord, g, n_spezzati(carico_spl), recenti)
+    nomi, pt, cam, gi = idx['nomi'], idx['pt'], idx['cam'], idx['gi']
+    spl = set(idx['spl'])
+    pool_spl = [nomi[i] for i in idx['spl']]
+    # Riga del grafo -> indice attivo (-1 se assente), per le compagne d'auto e le coppie
+    attiva = np.full(len(g.nomi), -1, dtype=np.int64)
+    if gi:
+        gi_np = np.array(gi); presenti = gi_np >= 0
+        attiva[gi_np[presenti]] = np.flatnonzero(presenti)
+    is_cam = bytearray(len(nomi))
+    for i in cam: is_cam[i] = 1
+
+    def ammessa(i, zona, righe_team):
+        r = gi[i]
+        return r < 0 or not (g.vietata(r, zona) or g.esclusioni(r) & righe_team)
+
+    with misura("allocazione_zone"):
+        # Le cameriere vengono prese in ordine di file con un cursore; quelle saltate per un
+        # vincolo restano in 'rimandate' per le zone successive
+        ris, assegnato, cur, rimandate = [], bytearray(len(nomi)), 0, []
+        for zona in z_ord:
+            o_n, membri, o_f, righe_team = fabb.get(zona, 0), [], 0, set()
+            for i in idx['gov_per_zona'][zona]:
+                if not assegnato[i] and ammessa(i, zona, righe_team):
+                    membri.append({"Nome": nomi[i], "Tipo": "GOV"}); assegnato[i] = 1
+                    if gi[i] >= 0: righe_team.add(gi[i])
+
+            soglia = o_n if o_n > 0 else ORE_TURNO
+            # In una zona una rimandata scartata resta scartata (righe_team cresce soltanto):
+            # si scorre rimandate una volta sola con p, togliendo all'inizio le già assegnate
+            rimandate[:] = [k for k in rimandate if not assegnato[k]]
+            p, prossime = 0, deque()
+            while o_f < soglia:
+                i = None
+                while prossime and i is None:
+                    k = prossime.popleft()
+                    if not assegnato[k] and ammessa(k, zona, righe_team): i = k
+                while i is None and p < len(rimandate):
+                    k = rimandate[p]; p += 1
+                    if not assegnato[k] and ammessa(k, zona, righe_team): i = k
+                while i is None and cur < len(cam):
+                    k = cam[cur]; cur += 1
+                    if assegnato[k]: continue
+                    if ammessa(k, zona, righe_team): i = k
+                    else: rimandate.append(k)
+                if i is None: break
+                tipo = "SPL" if i in spl else ("PT" if pt[i] else "STD")
+                membri.append({"Nome": nomi[i], "Tipo": tipo}); assegnato[i] = 1
+                o_f += ORE_RIDOTTE if tipo != "STD" else ORE_TURNO
+                r = gi[i]
+                if r >= 0:
+                    righe_team.add(r)
+                    vicine = (attiva[j] for j in g.compagni_auto(r) + list(g.preferite(r)))
+                    prossime.extend(int(k) for k in vicine if k >= 0 and is_cam[k] and not assegnato[k])
+
+            if membri:
+                ris.append({"Hotel": zona, "Team": team_str(membri), "Req": round(o_n, 1), "Info": info_team(membri), "Membri": membri})
+
+    esito = {"ris": ris, "spl": pool_spl, "serale": compiti_serali(ore_serali(cur_inp, conf_df, lista_hotel), pool_spl),
+             "carico_spezzati_ore": carico_spl, "fabb": fabb}
+    return esito, idx, z_ord
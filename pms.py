@@ -0,0 +1,189 @@
+"""Importazione dei carichi del giorno dall'esportazione camere del PMS.
+
+Il file del PMS ha una riga per camera; servono le colonne (nomi alternativi tra parentesi):
+    Camera (Room, Numero)       numero della camera
+    Stato (Status, Tipo)        ARRIVO / FERMATA / PARTENZA (anche ARR, STAY, DEP, ...)
+    Gruppo (Group)              facoltativa: non vuota o 1 = camera di gruppo
+    Copertura (Turndown)        facoltativa: 1 = copertura serale
+    Biancheria (Linen)          facoltativa: 1 = cambio biancheria
+
+Le camere vanno alle zone con config_camere.csv, una riga per intervallo di numeri di
+camera (estremi compresi, senza sovrapposizioni; Zona può essere un alias di zone.csv):
+    Da,A,Zona
+    101,399,Hotel Castello
+    401,499,Castello 4 Piano
+La copia nel repository è un esempio da adattare alla numerazione reale. Il file viene letto a blocchi
+(CSV con pandas, Excel con openpyxl in sola lettura se installato) e ogni blocco è
+sommato nella tabella zona x categoria, quindi il file non sta mai tutto in memoria.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from dati import leggi_con_cache
+from planning import LISTA_HOTEL
+from zone import registro
+
+FILE_CAMERE = 'config_camere.csv'
+RIGHE_BLOCCO = 20000
+CATEGORIE = ["AI", "FI", "AG", "FG", "COP", "BIAN"]
+
+ALIAS = {
+    'Camera': ['camera', 'room', 'numero', 'n_camera', 'room_number'],
+    'Stato': ['stato', 'status', 'tipo', 'movimento'],
+    'Gruppo': ['gruppo', 'group', 'codice_gruppo'],
+    'Copertura': ['copertura', 'coperture', 'turndown', 'cop'],
+    'Biancheria': ['biancheria', 'linen', 'bian', 'cambio_biancheria'],
+}
+# Stato PMS -> arrivo (pulizia completa) o fermata. La partenza senza arrivo si rifà come un arrivo.
+STATI = {
+    'ARRIVO': 'A', 'ARR': 'A', 'A': 'A', 'IN': 'A', 'ARRIVAL': 'A',
+    'PARTENZA': 'A', 'DEP': 'A', 'P': 'A', 'OUT': 'A', 'DEPARTURE': 'A',
+    'FERMATA': 'F', 'STAY': 'F', 'F': 'F', 'OCC': 'F', 'STAYOVER': 'F',
+}
+_SI = {'1', '1.0', 'SI', 'SÌ', 'S', 'X', 'TRUE', 'Y', 'YES'}
+
+# --- 1. CONFIGURAZIONE CAMERE ---
+
+def _parse_camere(path):
+    t = pd.read_csv(path)
+    t.columns = [str(c).strip() for c in t.columns]
+    mancanti = {'Da', 'A', 'Zona'} - set(t.columns)
+    if mancanti: raise ValueError(f"{path}: mancano le colonne {', '.join(sorted(mancanti))}")
+    t = t[['Da', 'A', 'Zona']].astype({'Da': int, 'A': int, 'Zona': str}).sort_values('Da', ignore_index=True)
+    if (t['A'] < t['Da']).any(): raise ValueError(f"{path}: intervallo con A < Da")
+    sovrapposti = t['Da'].to_numpy()[1:] <= t['A'].to_numpy()[:-1]
+    if sovrapposti.any():
+        i = int(np.flatnonzero(sovrapposti)[0])
+        raise ValueError(f"{path}: intervalli sovrapposti {t.at[i, 'Da']}-{t.at[i, 'A']} e {t.at[i + 1, 'Da']}-{t.at[i + 1, 'A']}")
+    return t
+
+def carica_camere(path=FILE_CAMERE):
+    """Tabella intervalli camere -> zona, ordinata per Da (vuota se manca il file)."""
+    return leggi_con_cache("camere", path, _parse_camere)
+
+class MappaCamere:
+    """Numero camera -> indice zona con una ricerca binaria sugli inizi degli intervalli."""
+
+    def __init__(self, camere, zone):
+        self.zone = list(zone)
+        pos = {z: i for i, z in enumerate(self.zone)}
+        reg = registro()
+        nomi = [reg.canonico(z) for z in camere['Zona']]
+        sconosciute = sorted(set(nomi) - set(pos))
+        if sconosciute: raise ValueError(f"Zone non in elenco nella configurazione camere: {', '.join(sconosciute)}")
+        self.da = camere['Da'].to_numpy(dtype=np.int64)
+        self.a = camere['A'].to_numpy(dtype=np.int64)
+        self.zona = np.array([pos[z] for z in nomi], dtype=np.int64)
+
+    def __call__(self, numeri):
+        """Indice zona per ogni numero (float, NaN ammessi); -1 se fuori da ogni intervallo."""
+        ok = ~np.isnan(numeri)
+        n = np.where(ok, numeri, -1).astype(np.int64)
+        i = np.searchsorted(self.da, n, side='right') - 1
+        dentro = ok & (i >= 0) & (n <= self.a[np.maximum(i, 0)])
+        return np.where(dentro, self.zona[np.maximum(i, 0)], -1)
+
+# --- 2. LETTURA A BLOCCHI ---
+
+def _colonne(intestazione):
+    """{nome canonico: nome nel file} riconoscendo gli alias, senza distinguere maiuscole."""
+    norm = {str(c).strip().lower().replace(" ", "_"): c for c in intestazione if c is not None}
+    trovate = {}
+    for canonico, alias in ALIAS.items():
+        for a in alias:
+            if a in norm: trovate[canonico] = norm[a]; break
+    mancanti = {'Camera', 'Stato'} - set(trovate)
+    if mancanti: raise ValueError(f"Esportazione PMS senza colonna {', '.join(sorted(mancanti))}")
+    return trovate
+
+def _separatore(f):
+    """',' o ';' (CSV esportati con Excel in italiano) guardando la prima riga."""
+    if isinstance(f, str):
+        with open(f, encoding="utf-8-sig", errors="replace") as fh: riga = fh.readline()
+    else:
+        riga = f.readline(); f.seek(0)
+        if isinstance(riga, bytes): riga = riga.decode("utf-8", errors="replace")
+    return ";" if riga.count(";") > riga.count(",") else ","
+
+def _blocchi_csv(f):
+    sep = _separatore(f)
+    testa = pd.read_csv(f, nrows=0, sep=sep, encoding="utf-8-sig")
+    col = _colonne(testa.columns)
+    if hasattr(f, 'seek'): f.seek(0)
+    for b in pd.read_csv(f, sep=sep, usecols=list(col.values()), dtype=str, chunksize=RIGHE_BLOCCO, encoding="utf-8-sig"):
+        yield b.rename(columns={v: k for k, v in col.items()})
+
+def _blocchi_excel(f):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Per i file Excel serve openpyxl (pip install openpyxl)")
+    wb = load_workbook(f, read_only=True, data_only=True)
+    try:
+        righe = wb.active.iter_rows(values_only=True)
+        intestazione = next(righe, None)
+        if intestazione is None: return
+        col = _colonne(intestazione)
+        idx = {k: list(intestazione).index(v) for k, v in col.items()}
+        blocco = []
+        for r in righe:
+            blocco.append([r[i] for i in idx.values()])
+            if len(blocco) == RIGHE_BLOCCO:
+                yield pd.DataFrame(blocco, columns=list(idx), dtype=str); blocco = []
+        if blocco: yield pd.DataFrame(blocco, columns=list(idx), dtype=str)
+    finally:
+        wb.close()
+
+def blocchi(f, nome=None):
+    """Blocchi (DataFrame con colonne canoniche) da un percorso o da un file caricato."""
+    nome = nome or getattr(f, 'name', f if isinstance(f, str) else "")
+    ext = os.path.splitext(str(nome))[1].lower()
+    return _blocchi_excel(f) if ext in ('.xlsx', '.xlsm') else _blocchi_csv(f)
+
+# --- 3. AGGREGAZIONE ---
+
+def _si(s):
+    return s.fillna("").astype(str).str.strip().str.upper().isin(_SI).to_numpy()
+
+def importa_pms(f, camere=None, zone=LISTA_HOTEL, nome=None):
+    """Legge l'esportazione PMS e restituisce i carichi per zona pronti per cur_inp.
+
+    Restituisce {"carichi": {zona: {AI, FI, AG, FG, COP, BIAN}}, "righe", "fuori_zona"
+    (camere non coperte dalla configurazione), "stato_ignoto", "secondi"}.
+    """
+    t0 = time.perf_counter()
+    camere = carica_camere() if camere is None else camere
+    if camere.empty:
+        raise ValueError(f"Manca la configurazione camere ({FILE_CAMERE}): serve un CSV con colonne Da, A, Zona, "
+                         "una riga per intervallo di numeri di camera (es. 101,399,Hotel Castello)")
+    mappa = MappaCamere(camere, zone)
+    nz = len(mappa.zone)
+    tot = np.zeros(nz * len(CATEGORIE), dtype=np.int64)
+    righe = fuori = ignoti = 0
+
+    for b in blocchi(f, nome):
+        righe += len(b)
+        numeri = pd.to_numeric(b['Camera'].str.strip(), errors='coerce').to_numpy(dtype=float)
+        z = mappa(numeri)
+        stato = b['Stato'].fillna("").str.strip().str.upper().map(STATI).to_numpy()
+        arrivo, fermata = stato == 'A', stato == 'F'
+        gruppo = (b['Gruppo'].fillna("").str.strip().replace({"0": "", "0.0": "", "nan": "", "None": ""}) != "").to_numpy() \
+            if 'Gruppo' in b.columns else np.zeros(len(b), bool)
+        valide = z >= 0
+        fuori += int((~valide).sum()); ignoti += int((valide & ~arrivo & ~fermata).sum())
+        # Categoria: AI=0, FI=1, AG=2, FG=3 (gruppo sposta di 2); -1 se stato ignoto
+        cat = np.where(arrivo, 0, np.where(fermata, 1, -1)) + np.where(gruppo, 2, 0)
+        m = valide & (arrivo | fermata)
+        tot += np.bincount(z[m] * len(CATEGORIE) + cat[m], minlength=tot.size)
+        for k, c in ((4, 'Copertura'), (5, 'Biancheria')):
+            if c in b.columns:
+                mc = valide & _si(b[c])
+                tot += np.bincount(z[mc] * len(CATEGORIE) + k, minlength=tot.size)
+
+    tot = tot.reshape(nz, len(CATEGORIE))
+    carichi = {zona: dict(zip(CATEGORIE, map(int, tot[i]))) for i, zona in enumerate(mappa.zone)}
+    return {"carichi": carichi, "righe": righe, "fuori_zona": fuori, "stato_ignoto": ignoti,
+            "secondi": round(time.perf_counter() - t0, 3)}
@@ -0,0 +1,91 @@
+"""Tempi per fase dell'app: context manager / decoratore quasi gratuito quando è spento.
+
+    with misura("fabbisogno"): ...
+    @misura("pdf_planning")
+    def genera_pdf_planning(...): ...
+
+Si accende per tutto il processo con FV_PRESTAZIONI=1 o attiva(), oppure solo per il
+thread corrente con attiva_qui() (lo script di una sessione Streamlit); spento, misura()
+non legge l'orologio e non tocca i contatori. I dati raccolti sono a livello di processo
+e finiscono nel pannello Performance dell'app e nel JSON di rapporto().
+"""
+import functools
+import os
+import threading
+import time
+from datetime import datetime
+
+_attivo = os.environ.get("FV_PRESTAZIONI", "") not in ("", "0")
+_fasi = {}        # fase -> [chiamate, totale s, massimo s, ultimo s]
+_contatori = {}   # nome -> conteggio
+_dal = datetime.now()
+_lock = threading.Lock()
+_qui = threading.local()   # accensione del solo thread corrente
+
+def attiva(si=True):
+    global _attivo
+    _attivo = bool(si)
+
+def attiva_qui(si=True):
+    _qui.attivo = bool(si)
+
+def attivo():
+    return _attivo or getattr(_qui, "attivo", False)
+
+def registra(fase, secondi):
+    with _lock:
+        v = _fasi.get(fase)
+        if v is None: _fasi[fase] = [1, secondi, secondi, secondi]
+        else: v[0] += 1; v[1] += secondi; v[2] = max(v[2], secondi); v[3] = secondi
+
+def conta(nome, n=1):
+    if not attivo(): return
+    with _lock:
+        _contatori[nome] = _contatori.get(nome, 0) + n
+
+class misura:
+    """Cronometra un blocco (with) o ogni chiamata di una funzione (decoratore)."""
+    __slots__ = ("fase", "_t0")
+
+    def __init__(self, fase):
+        self.fase = fase
+
+    def __enter__(self):
+        self._t0 = time.perf_counter() if attivo() else None
+        return self
+
+    def __exit__(self, *_):
+        if self._t0 is not None: registra(self.fase, time.perf_counter() - self._t0)
+        return False
+
+    def __call__(self, fn):
+        fase = self.fase
+
+        @functools.wraps(fn)
+        def misurata(*a, **k):
+            if not attivo(): return fn(*a, **k)
+            t0 = time.perf_counter()
+            try:
+                return fn(*a, **k)
+            finally:
+                registra(fase, time.perf_counter() - t0)
+        return misurata
+
+def tabella():
+    """Una riga per fase, dalla più costosa in totale."""
+    with _lock:
+        righe = [{"Fase": f, "Chiamate": n, "Totale_s": round(tot, 4), "Media_ms": round(tot / n * 1000, 2),
+                  "Max_ms": round(mx * 1000, 2), "Ultima_ms": round(ult * 1000, 2)} for f, (n, tot, mx, ult) in _fasi.items()]
+    return sorted(righe, key=lambda r: -r["Totale_s"])
+
+def rapporto(**extra):
+    """Fasi, contatori ed eventuali sezioni extra (es. statistiche delle cache) in un dict per il JSON."""
+    with _lock:
+        contatori = dict(_contatori)
+    return {"dal": _dal.isoformat(timespec="seconds"), "al": datetime.now().isoformat(timespec="seconds"),
+            "attivo": attivo(), "fasi": tabella(), "contatori": contatori, **extra}
+
+def azzera():
+    global _dal
+    with _lock:
+        _fasi.clear(); _contatori.clear(); _dal = datetime.now()
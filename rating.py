@@ -0,0 +1,52 @@
+"""Punteggio e barra di rating dello staff, calcolati su tutta la tabella in una volta."""
+import numpy as np
+import pandas as pd
+
+from schema_staff import flag
+
+PESI = {'Professionalita': 0.25, 'Esperienza': 0.20, 'Tenuta_Fisica': 0.20, 'Disponibilita': 0.15}
+RATING_COORD = "⭐ (Coord.)"
+RATING_ERRORE = "⚠️ n.d."
+
+_barre = []
+
+def _barra(k):
+    """Barra per il voto k/2 (k mezzi punti): 🟩 per punto intero, 🟨 per il mezzo."""
+    while len(_barre) <= k:
+        n = len(_barre)
+        _barre.append("🟩" * (n // 2) + ("🟨" if n % 2 else ""))
+    return _barre[k]
+
+def calcola_rating(df):
+    """Punteggio pesato, barra e colonne non valide per ogni riga di df.
+
+    Restituisce un DataFrame con lo stesso indice e le colonne Punteggio (NaN se non
+    calcolabile), Rating ed Errori (colonne non numeriche o negative, '' se la riga è buona).
+    Una colonna assente vale 5 come nei default di load_data; le governanti non hanno voto.
+    """
+    n = len(df)
+    valori = np.column_stack([pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float) if c in df.columns else np.full(n, 5.0)
+                              for c in PESI]) if n else np.empty((0, len(PESI)))
+    # Somma nello stesso ordine del calcolo riga per riga, così gli arrotondamenti coincidono
+    punteggio = np.zeros(n)
+    for j, w in enumerate(PESI.values()):
+        punteggio = punteggio + valori[:, j] * w
+
+    gov = df['Ruolo'].astype(str).str.lower().str.contains('overnante', regex=False).to_numpy() if 'Ruolo' in df.columns else np.zeros(n, bool)
+    cattivi = (np.isnan(valori) | (valori < 0)) & ~gov[:, None]
+    validi = ~cattivi.any(axis=1)
+    errori = np.full(n, "", dtype=object)
+    nomi_col = list(PESI)
+    for i in np.flatnonzero(~validi):
+        errori[i] = ", ".join(c for c, m in zip(nomi_col, cattivi[i]) if m)
+
+    # round() di Python arrotonda al pari, come np.rint: il voto è rint(v)/2
+    k = np.where(validi & ~gov, np.rint(np.nan_to_num(punteggio)), 0).astype(int)
+    tabella = np.array([_barra(i) for i in range(k.max() + 1 if n else 1)], dtype=object)
+    barre = np.where(gov, RATING_COORD, np.where(validi, tabella[k], RATING_ERRORE))
+
+    return pd.DataFrame({"Punteggio": np.where(validi & ~gov, punteggio, np.nan), "Rating": barre, "Errori": errori}, index=df.index)
+
+def calcola_status(df):
+    """Icone 🃏 (Jolly) e 🚌 (Pendolare) per riga."""
+    return pd.Series(np.where(flag(df, 'Jolly'), "🃏 ", "") + np.where(flag(df, 'Pendolare'), "🚌 ", ""), index=df.index, dtype=object)
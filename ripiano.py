@@ -0,0 +1,145 @@
+"""Ripianificazione incrementale: parte dallo schieramento già fatto e tocca solo ciò che è cambiato.
+
+Una zona viene ricalcolata solo se è cambiato il suo fabbisogno o se ha perso qualcuno
+(assente, o passato agli spezzati). Le zone fissate a mano restano come sono, tolte le
+assenti. Chi serve viene preso prima tra le libere (con la padronanza della zona davanti),
+poi dalle zone che hanno ore in avanzo; chi avanza torna libera. Il risultato elenca gli
+spostamenti persona per persona.
+"""
+from planning import (LISTA_HOTEL, ORE_RIDOTTE, ORE_TURNO, ZONE_UNITE, calcola_fabbisogno, compiti_serali,
+                      info_team, n_spezzati, ordine_spezzati, ordine_zone, ore_serali, team_str)
+from prestazioni import misura
+from schema_staff import flag
+from vincoli import grafo_vincoli
+from zone import registro
+
+EPS = 1e-6
+
+def _ore(m):
+    return 0.0 if m['Tipo'] == "GOV" else (ORE_TURNO if m['Tipo'] == "STD" else ORE_RIDOTTE)
+
+def _soglia(fabb, zona):
+    o_n = fabb.get(zona, 0)
+    return o_n if o_n > 0 else ORE_TURNO
+
+def _padroneggia(padro, zona):
+    return zona in padro
+
+@misura("ripianifica")
+def ripianifica(prev, df, conf_df, cur_inp, assenti=(), lista_hotel=LISTA_HOTEL, fissati=None, grafo=None, recenti=None):
+    """Nuovo schieramento a partire da prev (l'esito di genera_schieramento o di una ripianificazione).
+
+    fissati: {zona: [nomi]} squadre modificate a mano da tenere così come sono.
+    Restituisce lo stesso dict di genera_schieramento più 'spostamenti' ([{Nome, Da, A}],
+    None = libera o assente), 'zone_ricalcolate' e 'scoperte' ({zona: ore mancanti}).
+    Chi entra in una zona rispetta zone vietate ed esclusioni del grafo dei vincoli.
+    """
+    fissati = fissati or {}
+    g = grafo if grafo is not None else grafo_vincoli(df, lista_hotel, ZONE_UNITE)
+    assenti = set(assenti)
+    fabb, carico_spl = calcola_fabbisogno(cur_inp, conf_df, lista_hotel)
+    z_ord = ordine_zone(lista_hotel)
+    fabb_prev = prev.get('fabb') or {r['Hotel']: r['Req'] for r in prev['ris']}
+
+    attive = df[~df['Nome'].isin(assenti)]
+    ruolo = dict(zip(attive['Nome'], attive['Ruolo']))
+    reg = registro()
+    padro = dict(zip(attive['Nome'], (reg.coperte(v) for v in attive['Zone_Padronanza'])))
+    pt = dict(zip(attive['Nome'], flag(attive, 'Part_Time').tolist()))
+    ordine = {n: k for k, n in enumerate(attive['Nome'])}
+
+    # Pool spezzati sul nuovo carico: restano le presenti, si completa come nel greedy
+    n_spl = n_spezzati(carico_spl)
+    spl = [n for n in prev.get('spl', []) if n in ruolo][:n_spl]
+    nomi_att = attive['Nome'].tolist()
+    for i in ordine_spezzati(attive, g.righe(nomi_att), g, recenti):
+        if len(spl) >= n_spl: break
+        if nomi_att[i] not in spl: spl.append(nomi_att[i])
+    spl_set = set(spl)
+
+    def tipo(n):
+        if ruolo[n] == 'Governante': return "GOV"
+        return "SPL" if n in spl_set else ("PT" if pt[n] else "STD")
+
+    squadre = {z: [] for z in z_ord}
+    tipo_prima = {}
+    for r in prev['ris']:
+        if r['Hotel'] in squadre: squadre[r['Hotel']] = [m['Nome'] for m in r['Membri']]
+        tipo_prima.update((m['Nome'], m['Tipo']) for m in r['Membri'])
+    prima = {n: z for z, nn in squadre.items() for n in nn}
+
+    toccate = {z for z in z_ord if abs(fabb.get(z, 0) - fabb_prev.get(z, 0)) > 0.05}
+    for z, nn in squadre.items():
+        presenti = [n for n in nn if n in ruolo]
+        # Chi è diventata spezzato (o non lo è più) cambia le ore coperte dalla zona
+        if len(presenti) < len(nn) or any(tipo(n) != tipo_prima[n] for n in presenti): toccate.add(z)
+        squadre[z] = presenti
+
+    # Le squadre fissate vincono su tutto: chi vi compare lascia la zona in cui era
+    fissate = {z: [n for n in nn if n in ruolo] for z, nn in fissati.items() if z in squadre}
+    bloccate = {n for nn in fissate.values() for n in nn}
+    for z in squadre:
+        if z in fissate: squadre[z] = list(fissate[z])
+        else:
+            tolte = [n for n in squadre[z] if n in bloccate]
+            if tolte: squadre[z] = [n for n in squadre[z] if n not in bloccate]; toccate.add(z)
+    toccate -= set(fissate)
+
+    assegnate = {n for nn in squadre.values() for n in nn}
+    libere = [n for n in attive['Nome'] if n not in assegnate]
+
+    def coperto(z):
+        return sum(_ore({"Tipo": tipo(n)}) for n in squadre[z])
+
+    def ammessa(n, z):
+        r = g.indice(n)
+        if r is None: return True
+        return not g.vietata(r, z) and not any(g.incompatibili(r, g.indice(m)) for m in squadre[z] if g.indice(m) is not None)
+
+    # Prima si libera chi avanza, così può andare dove manca
+    for z in [z for z in z_ord if z in toccate]:
+        cam = [n for n in squadre[z] if ruolo[n] != 'Governante']
+        while cam and coperto(z) - _ore({"Tipo": tipo(cam[-1])}) >= _soglia(fabb, z) - EPS:
+            n = cam.pop(); squadre[z].remove(n); libere.append(n)
+    libere.sort(key=ordine.get)
+
+    scoperte = {}
+    for z in [z for z in z_ord if z in toccate]:
+        if not any(ruolo[n] == 'Governante' for n in squadre[z]):
+            gov = next((n for n in libere if ruolo[n] == 'Governante' and _padroneggia(padro[n], z) and ammessa(n, z)), None)
+            if gov: squadre[z].insert(0, gov); libere.remove(gov)
+        while coperto(z) < _soglia(fabb, z) - EPS:
+            n = next((n for n in libere if ruolo[n] == 'Cameriera' and _padroneggia(padro[n], z) and ammessa(n, z)), None) \
+                or next((n for n in libere if ruolo[n] == 'Cameriera' and ammessa(n, z)), None)
+            if n is None:
+                n = _da_zona_in_avanzo(squadre, z, z_ord, fissate, fabb, ruolo, tipo, coperto, ammessa)
+                if n is None: break
+            else:
+                libere.remove(n)
+            squadre[z].append(n)
+        if coperto(z) < _soglia(fabb, z) - EPS and fabb.get(z, 0) > 0:
+            scoperte[z] = round(_soglia(fabb, z) - coperto(z), 1)
+
+    ris = []
+    for z in z_ord:
+        membri = [{"Nome": n, "Tipo": tipo(n)} for n in squadre[z]]
+        if membri:
+            ris.append({"Hotel": z, "Team": team_str(membri), "Req": round(fabb.get(z, 0), 1), "Info": info_team(membri), "Membri": membri})
+
+    dopo = {n: z for z, nn in squadre.items() for n in nn}
+    spostamenti = [{"Nome": n, "Da": prima.get(n), "A": dopo.get(n)}
+                   for n in sorted(set(prima) | set(dopo), key=lambda n: ordine.get(n, -1))
+                   if prima.get(n) != dopo.get(n)]
+    return {"ris": ris, "spl": spl, "serale": compiti_serali(ore_serali(cur_inp, conf_df, lista_hotel), spl),
+            "carico_spezzati_ore": carico_spl, "fabb": fabb,
+            "spostamenti": spostamenti, "zone_ricalcolate": [z for z in z_ord if z in toccate], "scoperte": scoperte}
+
+def _da_zona_in_avanzo(squadre, z, z_ord, fissate, fabb, ruolo, tipo, coperto, ammessa):
+    """Toglie l'ultima cameriera da una zona che resta coperta anche senza di lei."""
+    for d in reversed(z_ord):
+        if d == z or d in fissate: continue
+        cam = [n for n in squadre[d] if ruolo[n] == 'Cameriera']
+        if cam and ammessa(cam[-1], z) and coperto(d) - _ore({"Tipo": tipo(cam[-1])}) >= _soglia(fabb, d) - EPS:
+            squadre[d].remove(cam[-1])
+            return cam[-1]
+    return None
@@ -0,0 +1,142 @@
+"""Schema canonico della tabella staff e caricamento con snapshot binario.
+
+I tre CSV del repository hanno colonne diverse (Riposo_Preferenziale al posto di
+Riposo_Pref, Auto o Part_Time presenti solo in alcuni, voti scritti 7 o 7.0, flag
+1/1.0/True). Qui ogni variante diventa lo stesso modello:
+    voti (Professionalita, ...)           Int8, vuoto = default, non numerico = NA
+    flag (Part_Time, Jolly, ...)          bool
+    Ruolo                                 categoria (Cameriera, Governante)
+    testi (Zone_Padronanza, ...)          str, senza NaN
+Turno_Spezzato e Part_Time restano distinti: il primo dice che la persona può fare lo
+spezzato serale, il secondo è il contratto a ore ridotte; non sono alias l'uno dell'altro.
+
+La validazione si fa una volta al caricamento e i problemi restano in df.attrs['problemi'].
+Il DataFrame già tipizzato viene salvato accanto al CSV (.<nome>.pkl) con la firma del
+file: al prossimo avvio, se il CSV non è cambiato, si legge lo snapshot invece di rifare
+parsing e conversioni.
+"""
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+VERSIONE = 1   # da incrementare quando cambia SCHEMA: gli snapshot vecchi vengono ignorati
+
+RUOLI = ["Cameriera", "Governante"]
+VOTI = {'Professionalita': 5, 'Esperienza': 5, 'Tenuta_Fisica': 5, 'Disponibilita': 5, 'Empatia': 5, 'Capacita_Guida': 5}
+FLAG = ['Part_Time', 'Turno_Spezzato', 'Jolly', 'Pendolare']
+TESTI = {'Riposo_Pref': '', 'Viaggia_Con': '', 'Lavora_Bene_Con': 'Nessuna', 'Non_Assegnare_A': 'Nessuna',
+         'Zone_Padronanza': '', 'Ultima_Modifica': ''}
+# Nome nei file vecchi -> nome canonico
+ALIAS = {'Riposo_Preferenziale': 'Riposo_Pref'}
+
+_SI = {'1', '1.0', 'TRUE', 'SI', 'SÌ', 'S', 'X', 'Y', 'YES'}
+_NO = {'', '0', '0.0', 'FALSE', 'NO', 'N', 'NAN', 'NONE'}
+
+# --- 1. CONVERSIONE ---
+
+def _vuoti(s):
+    return s.isna().to_numpy() | (s.astype(str).str.strip().isin(['', 'nan', 'None'])).to_numpy()
+
+def canonico(df):
+    """DataFrame staff (una qualunque delle varianti) nel modello canonico tipizzato."""
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    problemi = []
+    for vecchio, nuovo in ALIAS.items():
+        if vecchio not in df.columns: continue
+        if nuovo in df.columns:
+            # Entrambe presenti: vale la canonica, la vecchia riempie solo i buchi
+            vuoti = _vuoti(df[nuovo])
+            df.loc[vuoti, nuovo] = df.loc[vuoti, vecchio]
+            df = df.drop(columns=vecchio)
+        else:
+            df = df.rename(columns={vecchio: nuovo})
+    if 'Nome' not in df.columns: df['Nome'] = ""
+    df['Nome'] = df['Nome'].fillna("").astype(str).str.strip()
+
+    ruolo = df['Ruolo'].fillna("").astype(str).str.strip() if 'Ruolo' in df.columns else pd.Series("Cameriera", index=df.index)
+    ruolo = ruolo.where(~ruolo.str.lower().str.contains('overnante', regex=False), "Governante")
+    ruolo = ruolo.where(~ruolo.str.lower().str.contains('cameriera', regex=False), "Cameriera")
+    altri = sorted(set(ruolo.unique()) - set(RUOLI))
+    if altri: problemi.append(f"Ruolo sconosciuto: {', '.join(map(repr, altri))}")
+    df['Ruolo'] = pd.Categorical(ruolo, categories=RUOLI + altri)
+
+    for c, default in VOTI.items():
+        if c not in df.columns: df[c] = default
+        if pd.api.types.is_numeric_dtype(df[c]):
+            num = df[c]; vuoti = num.isna().to_numpy()
+        else:
+            num = pd.to_numeric(df[c], errors='coerce'); vuoti = _vuoti(df[c])
+        cattivi = num.isna().to_numpy() & ~vuoti
+        if cattivi.any(): problemi.append(f"{c} non numerico per: {', '.join(df.loc[cattivi, 'Nome'])}")
+        df[c] = num.mask(vuoti, default).round().astype("Int8")
+
+    for c in FLAG:
+        if c not in df.columns: df[c] = False; continue
+        if pd.api.types.is_bool_dtype(df[c]): continue
+        if pd.api.types.is_numeric_dtype(df[c]):
+            df[c] = df[c].fillna(0).to_numpy() != 0; continue
+        s = df[c].fillna("").astype(str).str.strip().str.upper()
+        ignoti = ~s.isin(_SI | _NO)
+        if ignoti.any(): problemi.append(f"{c} non è 0/1 per: {', '.join(df.loc[ignoti.to_numpy(), 'Nome'])}")
+        df[c] = s.isin(_SI).to_numpy()
+
+    for c, default in TESTI.items():
+        if c not in df.columns: df[c] = default
+        s = df[c].fillna("").astype(str).str.strip()
+        df[c] = s.where(s != 'nan', "")
+    tipizzate = set(VOTI) | set(FLAG) | {'Ruolo'}
+    for c in df.columns:
+        if c not in tipizzate and df[c].isna().any(): df[c] = df[c].fillna("")
+
+    vuoti = df['Nome'] == ""
+    if vuoti.any(): problemi.append(f"{int(vuoti.sum())} righe senza Nome")
+    doppi = df.loc[df['Nome'].duplicated() & ~vuoti, 'Nome'].unique().tolist()
+    if doppi: problemi.append(f"Nomi ripetuti: {', '.join(doppi)}")
+    df.attrs['problemi'] = problemi
+    return df
+
+def flag(df, col):
+    """Colonna flag come array bool, anche da tabelle non ancora passate da canonico()."""
+    if col not in df.columns: return np.zeros(len(df), bool)
+    s = df[col]
+    if s.dtype == bool: return s.to_numpy()
+    return s.fillna("").astype(str).str.strip().str.upper().isin(_SI).to_numpy()
+
+# --- 2. SNAPSHOT ---
+
+def percorso_snapshot(path):
+    d, f = os.path.split(os.path.abspath(path))
+    return os.path.join(d, f".{f}.pkl")
+
+def _firma(path):
+    s = os.stat(path)
+    return (VERSIONE, pd.__version__, s.st_mtime_ns, s.st_size)
+
+def carica_csv(path):
+    """Tabella canonica di un CSV staff, dallo snapshot se il file non è cambiato."""
+    firma, snap = _firma(path), percorso_snapshot(path)
+    try:
+        with open(snap, 'rb') as f:
+            voce = pickle.load(f)
+        if voce['firma'] == firma: return voce['df']
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError, TypeError, AttributeError, ImportError):
+        pass
+    df = canonico(pd.read_csv(path))
+    tmp = f"{snap}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            pickle.dump({"firma": firma, "df": df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, snap)
+    except OSError:
+        # Cartella in sola lettura: si va avanti senza snapshot
+        if os.path.exists(tmp): os.remove(tmp)
+    return df
+
+def elimina_snapshot(path):
+    try:
+        os.remove(percorso_snapshot(path))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,181 @@
+"""Planning di più giorni: riposi della settimana e schieramenti giornalieri in parallelo.
+
+I riposi si decidono prima, in un unico passaggio (sono l'unica cosa che lega i giorni
+tra loro): il giorno preferito (Riposo_Pref / Riposo_Preferenziale) quando cade nel
+periodo, gli altri sui giorni con più personale in avanzo rispetto al fabbisogno,
+ruotando da una settimana all'altra chi riposa in quali giorni. I part-time riposano
+quanto basta a restare nel tetto di ore settimanali. Anche il pool dei turni spezzati
+ruota da un giorno all'altro: chi lo fa un giorno passa in fondo alla fila il giorno
+dopo. Il pool dipende solo dai presenti e dai carichi, quindi si sceglie giorno per
+giorno con il greedy (che nel modo greedy è già il planning); nel modo ottimo i giorni,
+con il loro conteggio dei turni spezzati, vengono poi risolti in un pool di processi.
+"""
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from planning import LISTA_HOTEL, ORE_TURNO, ORE_RIDOTTE, matrice_carichi, matrice_tempi, ore_carichi, schieramento_greedy
+from schema_staff import flag
+from solver import TEMPO_MAX, genera_schieramento_ottimo
+from zone import registro
+
+GIORNI_SETTIMANA = ["Lunedì", "Martedì", "Mercoledì", "Giovedì", "Venerdì", "Sabato", "Domenica"]
+RIPOSI_SETTIMANA = 1          # giorni di riposo ogni 7 per il tempo pieno
+ORE_MAX_PT_SETTIMANA = 25.0   # tetto settimanale dei part-time
+
+# --- 1. RIPOSI ---
+
+def periodo(dal, al):
+    """Date dal..al comprese."""
+    return [dal + timedelta(days=k) for k in range((al - dal).days + 1)]
+
+def riposo_preferito(r):
+    """Riposo preferito della persona: nome del giorno, data (date) o None."""
+    v = str(r.get('Riposo_Pref', "") or "").strip() or str(r.get('Riposo_Preferenziale', "") or "").strip()
+    if v in GIORNI_SETTIMANA: return v
+    try:
+        return datetime.strptime(v, "%d/%m/%Y").date()
+    except ValueError:
+        return None
+
+def giorni_di_riposo(n_giorni, part_time):
+    """Quanti riposi servono in n_giorni: 1 su 7 per il tempo pieno, il tetto ore per i part-time."""
+    riposi = n_giorni * RIPOSI_SETTIMANA // 7
+    if part_time:
+        lavorabili = int(ORE_MAX_PT_SETTIMANA * n_giorni / 7 // ORE_RIDOTTE)
+        riposi = max(riposi, n_giorni - lavorabili)
+    return min(riposi, n_giorni)
+
+def pianifica_riposi(df, giorni, fabb_giorno, assenti_giorno=None):
+    """Assegna i riposi del periodo. Restituisce {nome: [date di riposo]}.
+
+    fabb_giorno: {data: ore richieste totali}; i riposi liberi vanno sui giorni con
+    più ore di personale disponibile oltre il fabbisogno.
+    """
+    assenti_giorno = {g: set(v) for g, v in (assenti_giorno or {}).items()}
+    n = len(giorni)
+    riposi = {nome: [] for nome in df['Nome']}
+    if n == 0 or df.empty: return riposi
+
+    pt = flag(df, 'Part_Time').tolist()
+    ore_persona = [ORE_RIDOTTE if p else ORE_TURNO for p in pt]
+    # Ore disponibili per giorno meno il fabbisogno: dove avanza di più si riposa di più
+    disponibili = {g: sum(o for nome, o in zip(df['Nome'], ore_persona) if nome not in assenti_giorno.get(g, ())) for g in giorni}
+    avanzo = {g: disponibili[g] - fabb_giorno.get(g, 0) for g in giorni}
+    settimana = giorni[0].isocalendar()[1]
+
+    for k, (_, r) in enumerate(df.iterrows()):
+        nome = r['Nome']
+        gia_via = {g for g in giorni if nome in assenti_giorno.get(g, ())}
+        # Le assenze già note contano come giorni non lavorati
+        da_dare = max(0, giorni_di_riposo(n, pt[k]) - len(gia_via))
+        pref = riposo_preferito(r)
+        if pref is not None and da_dare > 0:
+            scelti = [g for g in giorni if (g == pref if isinstance(pref, date) else GIORNI_SETTIMANA[g.weekday()] == pref) and g not in gia_via]
+            for g in scelti[:da_dare]:
+                riposi[nome].append(g); avanzo[g] -= ore_persona[k]
+        # Rotazione: lo scarto cambia ogni settimana, così a parità di avanzo non riposa sempre la stessa
+        rot = (zlib.crc32(nome.encode()) + settimana) % n
+        while len(riposi[nome]) < da_dare:
+            liberi = [g for g in giorni if g not in riposi[nome] and g not in gia_via]
+            if not liberi: break
+            g = max(liberi, key=lambda g: (avanzo[g], -((giorni.index(g) - rot) % n)))
+            riposi[nome].append(g); avanzo[g] -= ore_persona[k]
+    return riposi
+
+# --- 2. GIORNI IN PARALLELO ---
+
+_contesto = {}
+
+def _inizializza(df, conf_df, lista_hotel, tempo_max):
+    _contesto.update(df=df, conf_df=conf_df, lista_hotel=lista_hotel, tempo_max=tempo_max)
+
+def _ottimizza_giorno(args):
+    # Solver di un giorno a partire dal suo greedy, già calcolato nel passo in sequenza
+    g, cur_inp, assenti, recenti, partenza = args
+    c = _contesto
+    return g, genera_schieramento_ottimo(c['df'], c['conf_df'], cur_inp, assenti, c['lista_hotel'], tempo_max=c['tempo_max'],
+                                         recenti=recenti, partenza=partenza)
+
+def genera_periodo(df, conf_df, carichi, dal, al, assenti_giorno=None, lista_hotel=LISTA_HOTEL,
+                   modo="greedy", tempo_max=TEMPO_MAX, processi=None, recenti=None):
+    """Planning dal..al compresi.
+
+    carichi: {data: cur_inp} oppure un solo cur_inp valido per tutti i giorni.
+    assenti_giorno: {data: [nomi]} per ferie e malattie già note.
+    processi: numero di processi; None = uno per giorno in modalità ottimo, nessun pool col greedy.
+    recenti: {nome: turni spezzati} prima del periodo (Storico.spezzati_recenti); ogni giorno
+    aggiunge il suo pool per i giorni seguenti.
+    Restituisce riposi, esiti giornalieri, ore settimanali per persona e sforamenti del tetto part-time.
+    """
+    giorni = periodo(dal, al)
+    assenti_giorno = assenti_giorno or {}
+    per_giorno = carichi if carichi and all(isinstance(k, date) for k in carichi) else {g: carichi for g in giorni}
+    # Ore del giorno (solo hotel, senza doppioni delle zone unite) per tutti i giorni in un prodotto
+    ore, _ = ore_carichi(np.stack([matrice_carichi(per_giorno.get(g, {}), lista_hotel) for g in giorni]), matrice_tempi(conf_df, lista_hotel))
+    fabb_giorno = dict(zip(giorni, ore.sum(axis=1).tolist()))
+    riposi = pianifica_riposi(df, giorni, fabb_giorno, assenti_giorno)
+
+    a_riposo = {g: set() for g in giorni}
+    for nome, gg in riposi.items():
+        for g in gg: a_riposo[g].add(nome)
+    # Greedy in ordine di giorno: il pool spezzati di ciascuno passa al giorno dopo. In modalità
+    # ottimo il solver riparte dal greedy di ogni giorno, in parallelo
+    rec, lavori, esiti = dict(recenti or {}), [], {}
+    for g in giorni:
+        cur_inp, assenti, rec_g = per_giorno.get(g, {}), sorted(set(assenti_giorno.get(g, ())) | a_riposo[g]), dict(rec)
+        partenza = schieramento_greedy(df, conf_df, cur_inp, assenti, lista_hotel, recenti=rec_g)
+        esiti[g] = partenza[0]
+        lavori.append((g, cur_inp, assenti, rec_g, partenza))
+        for nome in esiti[g]['spl']: rec[nome] = rec.get(nome, 0) + 1
+
+    if modo == "ottimo":
+        if processi is None: processi = len(giorni)
+        if processi > 1 and len(giorni) > 1:
+            with ProcessPoolExecutor(max_workers=min(processi, len(giorni)), initializer=_inizializza,
+                                     initargs=(df, conf_df, lista_hotel, tempo_max)) as ex:
+                esiti = dict(ex.map(_ottimizza_giorno, lavori))
+        else:
+            _inizializza(df, conf_df, lista_hotel, tempo_max)
+            esiti = dict(map(_ottimizza_giorno, lavori))
+
+    ore = {nome: 0.0 for nome in df['Nome']}
+    for esito in esiti.values():
+        for r in esito['ris']:
+            for m in r['Membri']:
+                if m['Tipo'] != "GOV": ore[m['Nome']] += ORE_TURNO if m['Tipo'] == "STD" else ORE_RIDOTTE
+    pt = dict(zip(df['Nome'], flag(df, 'Part_Time').tolist()))
+    tetto = ORE_MAX_PT_SETTIMANA * len(giorni) / 7
+    sforamenti = [n for n, h in ore.items() if pt.get(n) and h > tetto + 1e-9]
+    return {"giorni": esiti, "riposi": riposi, "ore": ore, "sforamenti": sforamenti}
+
+def carichi_da_tabella(t):
+    """{data: cur_inp} da una tabella con colonne Data (gg/mm/aaaa), Hotel, AI, FI, AG, FG, COP, BIAN.
+
+    Hotel può essere un alias del registro zone (come in cli.leggi_carichi); le righe dello
+    stesso giorno e della stessa zona si sommano."""
+    reg, carichi = registro(), {}
+    for _, r in t.iterrows():
+        g = datetime.strptime(str(r['Data']).strip(), "%d/%m/%Y").date()
+        v = pd.to_numeric(pd.Series([r.get(k, 0) for k in ("AI", "FI", "AG", "FG", "COP", "BIAN")]), errors='coerce').fillna(0)
+        voce = carichi.setdefault(g, {}).setdefault(reg.canonico(r['Hotel']), dict.fromkeys(("AI", "FI", "AG", "FG", "COP", "BIAN"), 0))
+        for k, n in zip(voce, v.astype(int).tolist()): voce[k] += n
+    return carichi
+
+def tabella_periodo(df, risultato):
+    """Una riga per persona, una colonna per giorno: zona, 'Riposo' o vuoto."""
+    giorni = sorted(risultato['giorni'])
+    colonna = {g: f"{GIORNI_SETTIMANA[g.weekday()][:3]} {g:%d/%m}" for g in giorni}
+    righe = {nome: dict.fromkeys(colonna.values(), "") for nome in df['Nome']}
+    for g in giorni:
+        col = colonna[g]
+        for r in risultato['giorni'][g]['ris']:
+            for m in r['Membri']: righe[m['Nome']][col] = r['Hotel']
+        for nome, gg in risultato['riposi'].items():
+            if g in gg: righe[nome][col] = "🛌 Riposo"
+    t = pd.DataFrame.from_dict(righe, orient="index")
+    t.insert(0, "Ore", pd.Series(risultato['ore']))
+    return t
@@ -0,0 +1,323 @@
+"""Modalità "ottimo": assegnazione cameriere -> zone come problema di flusso a costo minimo.
+
+Il modello lavora in ore: ogni cameriera porta la sua capacità (7.5 o 5.0) e ogni zona
+chiede le ore del fabbisogno. L'obiettivo da minimizzare è
+
+    PEN_SCOPERTO * ore scoperte + PEN_ECCESSO * ore in eccesso
+    + COSTO_FUORI_ZONA * ore lavorate fuori dalle Zone_Padronanza
+    + PEN_COPPIA * coppie Lavora_Bene_Con al lavoro in zone diverse
+
+con Non_Assegnare_A (zone o persone) come vincolo rigido. Le governanti si mettono
+prima della ricerca, come nel greedy: le cameriere che una governante esclude non possono
+andare nella sua zona. Il rilassamento continuo
+(ore frazionabili, senza vincoli di esclusione) si risolve esattamente con un max-flow
+sugli archi di padronanza e dà il limite inferiore per il gap. La soluzione intera
+parte dall'arrotondamento del flusso e viene migliorata con ricerca locale fino al
+tempo massimo; se non batte il greedy si torna al greedy.
+"""
+import random
+import time
+from collections import deque
+
+from planning import LISTA_HOTEL, ORE_TURNO, ORE_RIDOTTE, ZONE_UNITE, info_team, schieramento_greedy, team_str
+from prestazioni import misura
+from vincoli import grafo_vincoli
+from zone import registro
+
+PEN_SCOPERTO = 100.0
+PEN_ECCESSO = 0.5
+COSTO_FUORI_ZONA = 1.0
+PEN_COPPIA = 2.0
+TEMPO_MAX = 0.5  # secondi di ricerca
+
+# --- 1. DATI DEL MODELLO ---
+
+def _governanti(idx, z_ord):
+    """{zona: [indici attivi delle governanti]} come nel greedy: una governante va nella prima
+    delle sue zone non vietata e senza governanti con cui non deve lavorare."""
+    g, gi, messe, out = idx['grafo'], idx['gi'], set(), {}
+    for zona in z_ord:
+        righe = set()
+        for i in idx['gov_per_zona'][zona]:
+            r = gi[i]
+            if i in messe or (r >= 0 and (g.vietata(r, zona) or g.esclusioni(r) & righe)): continue
+            out.setdefault(zona, []).append(i); messe.add(i)
+            if r >= 0: righe.add(r)
+    return out
+
+def _costruisci_modello(attive, z_ord, fabb, idx, governanti=None):
+    """Capacità, domande, padronanze, esclusioni e coppie sugli indici delle cameriere.
+
+    Esclusioni, zone vietate e coppie vengono dal grafo dei vincoli; le compagne d'auto
+    contano come coppie (devono stare nella stessa zona). governanti = {zona: [indici]}
+    già piazzate: le zone delle governanti che una cameriera esclude le sono vietate."""
+    cam, g, gi = idx['cam'], idx['grafo'], idx['gi']
+    pool = set(idx['spl'])
+    # Zona pianificata -> indice; la padronanza arriva già estesa a zone figlie e gruppi
+    zona_di = {z: k for k, z in enumerate(z_ord)}
+    reg = registro()
+
+    padro = attive['Zone_Padronanza'].tolist()
+    loc = {gi[i]: k for k, i in enumerate(cam) if gi[i] >= 0}
+    cap, tipo, padr, vietate, escl, coppie = [], [], [], [], [], []
+    for i in cam:
+        t = "SPL" if i in pool else ("PT" if idx['pt'][i] else "STD")
+        tipo.append(t); cap.append(ORE_RIDOTTE if t != "STD" else ORE_TURNO)
+        padr.append({zona_di[z] for z in reg.coperte(padro[i]) if z in zona_di})
+        r = gi[i]
+        if r < 0:
+            vietate.append(set()); escl.append(set()); coppie.append(set()); continue
+        vietate.append({z for z, zona in enumerate(z_ord) if g.vietata(r, zona)})
+        escl.append({loc[j] for j in g.esclusioni(r) if j in loc})
+        coppie.append({loc[j] for j in g.preferite(r) | set(g.compagni_auto(r)) if j in loc} - escl[-1])
+    for k in range(len(cam)):
+        coppie[k].discard(k); escl[k].discard(k)
+    for zona, govs in (governanti or {}).items():
+        for i in govs:
+            if gi[i] < 0: continue
+            for j in g.esclusioni(gi[i]):
+                if j in loc: vietate[loc[j]].add(zona_di[zona])
+
+    esperte = [[] for _ in z_ord]
+    for k, zs in enumerate(padr):
+        for z in zs: esperte[z].append(k)
+    dom = [(fabb.get(z, 0) if fabb.get(z, 0) > 0 else ORE_TURNO) for z in z_ord]
+    return {"cam": cam, "cap": cap, "tipo": tipo, "padr": padr, "esperte": esperte,
+            "vietate": vietate, "escl": escl, "coppie": coppie, "dom": dom}
+
+# --- 2. LIMITE INFERIORE (rilassamento continuo) ---
+
+def _max_flow_padronanza(mod):
+    """Max-flow (Dinic) persona -> zona sui soli archi di padronanza, in decimi d'ora."""
+    n, nz = len(mod['cap']), len(mod['dom'])
+    S, T = n + nz, n + nz + 1
+    g = [[] for _ in range(n + nz + 2)]  # archi: [dest, capacità residua, indice inverso]
+
+    def arco(u, v, c):
+        g[u].append([v, c, len(g[v])]); g[v].append([u, 0, len(g[u]) - 1])
+
+    for i in range(n):
+        arco(S, i, int(round(mod['cap'][i] * 10)))
+        for z in mod['padr'][i]: arco(i, n + z, 10 ** 9)
+    for z in range(nz):
+        arco(n + z, T, int(round(mod['dom'][z] * 10)))
+
+    flusso = 0
+    while True:
+        liv = [-1] * len(g); liv[S] = 0; q = deque([S])
+        while q:
+            u = q.popleft()
+            for v, c, _ in g[u]:
+                if c > 0 and liv[v] < 0: liv[v] = liv[u] + 1; q.append(v)
+        if liv[T] < 0: break
+        it = [0] * len(g)
+
+        def spingi(u, f):
+            if u == T: return f
+            while it[u] < len(g[u]):
+                e = g[u][it[u]]
+                if e[1] > 0 and liv[e[0]] == liv[u] + 1:
+                    d = spingi(e[0], min(f, e[1]))
+                    if d > 0:
+                        e[1] -= d; g[e[0]][e[2]][1] += d
+                        return d
+                it[u] += 1
+            return 0
+
+        while True:
+            f = spingi(S, 10 ** 12)
+            if f == 0: break
+            flusso += f
+
+    # Flusso per persona: zona che riceve la quota maggiore
+    zona_flusso = [None] * n
+    for i in range(n):
+        migliore = 0
+        for v, c, r in g[i]:
+            if n <= v < n + nz:
+                f = g[v][r][1]
+                if f > migliore: migliore, zona_flusso[i] = f, v - n
+    return flusso / 10, zona_flusso
+
+def _costo_zona_minimo(d, capacita):
+    """Minimo di (PEN_SCOPERTO - COSTO_FUORI_ZONA) * scoperto + PEN_ECCESSO * eccesso
+    su tutte le ore raggiungibili sommando turni interi."""
+    d10, caps = int(round(d * 10)), sorted({int(round(c * 10)) for c in capacita})
+    if not caps: return (PEN_SCOPERTO - COSTO_FUORI_ZONA) * d
+    raggiungibili = bytearray(d10 + caps[-1] + 1); raggiungibili[0] = 1
+    for h in range(len(raggiungibili)):
+        if raggiungibili[h]:
+            for c in caps:
+                if h + c < len(raggiungibili): raggiungibili[h + c] = 1
+    return min((PEN_SCOPERTO - COSTO_FUORI_ZONA) * max(0, d10 - h) / 10 + PEN_ECCESSO * max(0, h - d10) / 10
+               for h in range(len(raggiungibili)) if raggiungibili[h])
+
+def limite_inferiore(mod, flusso_padr):
+    """Il migliore di due limiti validi: il rilassamento continuo (eccesso e coppie a 0)
+    e lo stesso con l'eccesso minimo dovuto ai turni interi, zona per zona."""
+    tot_cap, tot_dom = sum(mod['cap']), sum(mod['dom'])
+    coperte = min(tot_cap, tot_dom)
+    continuo = PEN_SCOPERTO * (tot_dom - coperte) + COSTO_FUORI_ZONA * (coperte - flusso_padr)
+    turni = COSTO_FUORI_ZONA * (tot_dom - flusso_padr) + sum(_costo_zona_minimo(d, set(mod['cap'])) for d in mod['dom'])
+    return max(continuo, turni)
+
+# --- 3. SOLUZIONE INTERA ---
+
+class _Stato:
+    """Assegnazione corrente con ore per zona e compagne per zona, aggiornate in O(grado)."""
+
+    def __init__(self, mod):
+        self.mod = mod
+        self.zona = [None] * len(mod['cap'])
+        self.ore = [0.0] * len(mod['dom'])
+        self.membri = [set() for _ in mod['dom']]
+
+    def costo_zona(self, z, h):
+        d = self.mod['dom'][z]
+        return PEN_SCOPERTO * max(0.0, d - h) + PEN_ECCESSO * max(0.0, h - d)
+
+    def ammesso(self, i, z):
+        if z is None: return True
+        if z in self.mod['vietate'][i]: return False
+        return not any(self.zona[j] == z for j in self.mod['escl'][i])
+
+    def separate(self, i, z):
+        """Coppie di i al lavoro in una zona diversa da z (0 se i non lavora)."""
+        if z is None: return 0
+        return sum(1 for j in self.mod['coppie'][i] if self.zona[j] is not None and self.zona[j] != z)
+
+    def delta(self, i, b):
+        """Variazione dell'obiettivo spostando i nella zona b (None = non assegnata)."""
+        a, c, m = self.zona[i], self.mod['cap'][i], self.mod
+        if a == b: return 0.0
+        d = PEN_COPPIA * (self.separate(i, b) - self.separate(i, a))
+        if a is not None:
+            d += self.costo_zona(a, self.ore[a] - c) - self.costo_zona(a, self.ore[a])
+            d -= COSTO_FUORI_ZONA * c * (a not in m['padr'][i])
+        if b is not None:
+            d += self.costo_zona(b, self.ore[b] + c) - self.costo_zona(b, self.ore[b])
+            d += COSTO_FUORI_ZONA * c * (b not in m['padr'][i])
+        return d
+
+    def sposta(self, i, b):
+        a, c = self.zona[i], self.mod['cap'][i]
+        if a is not None: self.ore[a] -= c; self.membri[a].discard(i)
+        if b is not None: self.ore[b] += c; self.membri[b].add(i)
+        self.zona[i] = b
+
+    def obiettivo(self):
+        m, tot = self.mod, sum(self.costo_zona(z, h) for z, h in enumerate(self.ore))
+        for i, z in enumerate(self.zona):
+            if z is None: continue
+            tot += COSTO_FUORI_ZONA * m['cap'][i] * (z not in m['padr'][i])
+            tot += PEN_COPPIA * sum(1 for j in m['coppie'][i] if j > i and self.zona[j] is not None and self.zona[j] != z)
+        return tot
+
+def _arrotonda(stato, zona_flusso):
+    """Assegna ognuna alla zona dove va la sua quota di flusso, poi copre i buchi."""
+    mod = stato.mod
+    for i, z in enumerate(zona_flusso):
+        if z is not None and stato.ammesso(i, z) and stato.ore[z] < mod['dom'][z]:
+            stato.sposta(i, z)
+    liberi = [i for i in range(len(mod['cap'])) if stato.zona[i] is None]
+    for z in sorted(range(len(mod['dom'])), key=lambda z: stato.ore[z] - mod['dom'][z]):
+        if stato.ore[z] >= mod['dom'][z]: continue
+        # Prima chi conosce la zona, poi le altre
+        liberi.sort(key=lambda i: (z not in mod['padr'][i], i))
+        resto = []
+        for i in liberi:
+            if stato.ore[z] < mod['dom'][z] and stato.ammesso(i, z): stato.sposta(i, z)
+            else: resto.append(i)
+        liberi = resto
+
+def _ricerca_locale(stato, scadenza, lb, rnd):
+    """Spostamenti e scambi migliorativi finché c'è tempo o non si trova più nulla."""
+    mod, n, nz = stato.mod, len(stato.mod['cap']), len(stato.mod['dom'])
+    if n == 0: return
+    obj, fallite, limite = stato.obiettivo(), 0, max(2000, 20 * n)
+    while fallite < limite and obj - lb > 1e-9:
+        if (fallite & 255) == 0 and time.perf_counter() > scadenza: break
+        i = rnd.randrange(n); a = stato.zona[i]
+        scoperte = [z for z in range(nz) if stato.ore[z] < mod['dom'][z]] if rnd.random() < 0.3 else []
+        mete = list(mod['padr'][i]) + [stato.zona[j] for j in mod['coppie'][i] if stato.zona[j] is not None] + scoperte + [None, rnd.randrange(nz)]
+        b = rnd.choice(mete)
+        if b == a: fallite += 1; continue
+        if stato.ammesso(i, b):
+            d = stato.delta(i, b)
+            if d < -1e-9:
+                stato.sposta(i, b); obj += d; fallite = 0; continue
+        # Scambio con una persona della zona di destinazione o con una non assegnata
+        j = None
+        if a is not None and b is not None and stato.membri[b]: j = rnd.choice(tuple(stato.membri[b]))
+        elif a is not None and b is None: j = rnd.choice(mod['esperte'][a]) if mod['esperte'][a] else rnd.randrange(n)
+        if j is not None and stato.zona[j] == b and j != i:
+            d1 = stato.delta(i, None); stato.sposta(i, None)
+            d2 = stato.delta(j, a) if stato.ammesso(j, a) else None
+            if d2 is not None:
+                stato.sposta(j, a)
+                d3 = stato.delta(i, b) if stato.ammesso(i, b) else None
+                if d3 is not None and d1 + d2 + d3 < -1e-9:
+                    stato.sposta(i, b); obj += d1 + d2 + d3; fallite = 0; continue
+                stato.sposta(j, b)
+            stato.sposta(i, a)
+        fallite += 1
+
+def _stato_da_greedy(mod, ris, nomi, z_ord):
+    """Ricostruisce lo stato del modello dallo schieramento greedy, per confrontarlo."""
+    stato, pos = _Stato(mod), {nomi[i]: k for k, i in enumerate(mod['cam'])}
+    for r in ris:
+        z = z_ord.index(r['Hotel'])
+        for m in r['Membri']:
+            if m['Tipo'] != "GOV" and m['Nome'] in pos: stato.sposta(pos[m['Nome']], z)
+    return stato
+
+# --- 4. API ---
+
+@misura("planning_ottimo")
+def genera_schieramento_ottimo(df, conf_df, cur_inp, assenti=(), lista_hotel=LISTA_HOTEL, tempo_max=TEMPO_MAX, seed=0, grafo=None, recenti=None,
+                               partenza=None):
+    """Come genera_schieramento, con la ricerca dell'assegnazione ottima entro tempo_max secondi.
+
+    Il dict restituito ha in più la chiave 'solver' con modo usato, obiettivo, limite
+    inferiore, gap relativo e tempo impiegato. partenza: il risultato di schieramento_greedy
+    per gli stessi ingressi, se già calcolato. Il tempo massimo chiude la ricerca senza
+    errori; un'eccezione è un errore di programma e non viene nascosta dal greedy.
+    """
+    t0 = time.perf_counter()
+    if partenza is None:
+        g = grafo if grafo is not None or df.empty else grafo_vincoli(df, lista_hotel, ZONE_UNITE)
+        partenza = schieramento_greedy(df, conf_df, cur_inp, assenti, lista_hotel, g, recenti)
+    greedy, idx, z_ord = partenza
+    if idx is None:
+        greedy['solver'] = {"modo": "greedy", "motivo": "nessuno staff"}
+        return greedy
+    # Indici, pool spezzati e fabbisogno sono quelli del greedy
+    attive, fabb = df[~df['Nome'].isin(assenti)], greedy['fabb']
+    governanti = _governanti(idx, z_ord)
+    mod = _costruisci_modello(attive, z_ord, fabb, idx, governanti)
+    flusso, zona_flusso = _max_flow_padronanza(mod)
+    lb = limite_inferiore(mod, flusso)
+
+    stato = _Stato(mod)
+    _arrotonda(stato, zona_flusso)
+    _ricerca_locale(stato, t0 + tempo_max, lb, random.Random(seed))
+    obj = stato.obiettivo()
+    obj_greedy = _stato_da_greedy(mod, greedy['ris'], idx['nomi'], z_ord).obiettivo()
+
+    info = {"obiettivo": round(obj, 2), "limite_inferiore": round(lb, 2),
+            "gap": round((obj - lb) / max(abs(obj), 1.0), 4), "obiettivo_greedy": round(obj_greedy, 2),
+            "tempo": round(time.perf_counter() - t0, 3)}
+    if obj >= obj_greedy:
+        greedy['solver'] = dict(info, modo="greedy", motivo="il greedy non è peggiore")
+        return greedy
+
+    # Governanti come piazzate prima della ricerca, cameriere dalla soluzione del solver
+    ris, nomi = [], idx['nomi']
+    for z, zona in enumerate(z_ord):
+        membri = [{"Nome": nomi[i], "Tipo": "GOV"} for i in governanti.get(zona, [])]
+        for k in sorted(stato.membri[z], key=lambda k: mod['cam'][k]):
+            membri.append({"Nome": nomi[mod['cam'][k]], "Tipo": mod['tipo'][k]})
+        if membri:
+            ris.append({"Hotel": zona, "Team": team_str(membri), "Req": round(fabb.get(zona, 0), 1), "Info": info_team(membri), "Membri": membri})
+    return {"ris": ris, "spl": greedy['spl'], "serale": greedy['serale'], "carico_spezzati_ore": greedy['carico_spezzati_ore'],
+            "fabb": fabb, "solver": dict(info, modo="ottimo")}
@@ -0,0 +1,131 @@
+"""Storico dei planning: ogni planning finale del giorno resta archiviato, in sola aggiunta.
+
+SQLite (FV_STORICO, default storico_planning.db) con due tabelle:
+    piani         una riga per archiviazione (data del planning, quando, impronta)
+    assegnazioni  una riga per persona: data, nome, zona, ruolo, tipo turno, ore in zona
+I trigger rifiutano UPDATE e DELETE: per correggere un giorno si archivia di nuovo e
+le interrogazioni usano l'ultima archiviazione di ogni data. Gli indici su data, nome
+e zona tengono veloci le interrogazioni su più stagioni; le somme si fanno in SQL, quindi
+in memoria arriva solo il risultato aggregato, mai lo storico intero.
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from concorrenza import connetti_sqlite
+from planning import ORE_IN_ZONA, ORE_TURNO
+
+FILE_STORICO = os.environ.get("FV_STORICO", "storico_planning.db")
+GIORNI_ROTAZIONE_SPL = 14   # finestra per far girare i turni spezzati
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS piani (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT NOT NULL,
+    archiviato TEXT NOT NULL,
+    impronta TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS assegnazioni (
+    piano INTEGER NOT NULL REFERENCES piani(id),
+    data TEXT NOT NULL,
+    nome TEXT NOT NULL,
+    zona TEXT NOT NULL,
+    ruolo TEXT,
+    tipo TEXT NOT NULL,
+    ore REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS piani_data ON piani(data, id);
+CREATE INDEX IF NOT EXISTS ass_piano ON assegnazioni(piano);
+CREATE INDEX IF NOT EXISTS ass_data ON assegnazioni(data);
+CREATE INDEX IF NOT EXISTS ass_nome ON assegnazioni(nome, data);
+CREATE INDEX IF NOT EXISTS ass_zona ON assegnazioni(zona, data);
+CREATE TRIGGER IF NOT EXISTS piani_no_update BEFORE UPDATE ON piani
+    BEGIN SELECT RAISE(ABORT, 'storico in sola aggiunta'); END;
+CREATE TRIGGER IF NOT EXISTS piani_no_delete BEFORE DELETE ON piani
+    BEGIN SELECT RAISE(ABORT, 'storico in sola aggiunta'); END;
+CREATE TRIGGER IF NOT EXISTS ass_no_update BEFORE UPDATE ON assegnazioni
+    BEGIN SELECT RAISE(ABORT, 'storico in sola aggiunta'); END;
+CREATE TRIGGER IF NOT EXISTS ass_no_delete BEFORE DELETE ON assegnazioni
+    BEGIN SELECT RAISE(ABORT, 'storico in sola aggiunta'); END;
+"""
+
+# Ultima archiviazione di ogni data nell'intervallo
+_ULTIMI = "SELECT max(id) FROM piani WHERE data BETWEEN ? AND ? GROUP BY data"
+
+def _iso(d):
+    """date, datetime o 'gg/mm/aaaa' -> 'aaaa-mm-gg' (ordinabile come testo)."""
+    if isinstance(d, str): d = datetime.strptime(d.strip(), "%d/%m/%Y")
+    return d.strftime("%Y-%m-%d")
+
+class Storico:
+
+    def __init__(self, path=FILE_STORICO):
+        self.path = path
+        with self._conn() as con:
+            con.con.executescript(SCHEMA)
+
+    def _conn(self):
+        return connetti_sqlite(self.path)
+
+    # --- SCRITTURA ---
+
+    def archivia(self, data, assegnazioni):
+        """Aggiunge il planning del giorno (lista di Assegnazione). Restituisce l'id del piano,
+        o None se è identico all'ultimo già archiviato per quella data."""
+        g = _iso(data)
+        righe = [(a.nome, a.zona, a.ruolo, a.tipo, ORE_IN_ZONA.get(a.tipo, ORE_TURNO)) for a in assegnazioni]
+        impronta = hashlib.sha256(repr(sorted(righe)).encode()).hexdigest()
+        with self._conn() as con:
+            con.execute("BEGIN IMMEDIATE")
+            ultima = con.execute("SELECT impronta FROM piani WHERE data = ? ORDER BY id DESC LIMIT 1", (g,)).fetchone()
+            if ultima and ultima[0] == impronta: return None
+            piano = con.execute("INSERT INTO piani (data, archiviato, impronta) VALUES (?, ?, ?)",
+                                (g, datetime.now().isoformat(timespec="seconds"), impronta)).lastrowid
+            con.executemany("INSERT INTO assegnazioni VALUES (?, ?, ?, ?, ?, ?, ?)", ((piano, g) + r for r in righe))
+        return piano
+
+    # --- INTERROGAZIONI (dal..al compresi) ---
+
+    def _query(self, sql, params):
+        with self._conn() as con:
+            return pd.read_sql_query(sql, con.con, params=params)
+
+    def carico_persone(self, dal, al):
+        """Per persona: giorni lavorati, ore in zona, giorni da spezzato e zone diverse."""
+        return self._query(f"""
+            SELECT nome AS Nome, count(DISTINCT data) AS Giorni, sum(ore) AS Ore,
+                   sum(tipo = 'SPL') AS Spezzati, count(DISTINCT zona) AS Zone
+            FROM assegnazioni WHERE piano IN ({_ULTIMI})
+            GROUP BY nome ORDER BY Ore DESC, nome""", (_iso(dal), _iso(al)))
+
+    def rotazione_zone(self, dal, al, nome=None):
+        """Quante volte ogni persona è stata in ogni zona (di una sola persona se nome)."""
+        filtro, params = ("AND nome = ?", (_iso(dal), _iso(al), nome)) if nome else ("", (_iso(dal), _iso(al)))
+        return self._query(f"""
+            SELECT nome AS Nome, zona AS Zona, count(*) AS Volte, max(data) AS Ultima
+            FROM assegnazioni WHERE piano IN ({_ULTIMI}) {filtro}
+            GROUP BY nome, zona ORDER BY nome, Volte DESC""", params)
+
+    def ore_zone(self, dal, al, per_giorno=False):
+        """Ore in zona per hotel nell'intervallo (una riga per hotel e giorno se per_giorno)."""
+        giorno = "data AS Data, " if per_giorno else ""
+        gruppo = "data, zona" if per_giorno else "zona"
+        return self._query(f"""
+            SELECT {giorno}zona AS Zona, sum(ore) AS Ore, count(*) AS Persone
+            FROM assegnazioni WHERE piano IN ({_ULTIMI})
+            GROUP BY {gruppo} ORDER BY {gruppo}""", (_iso(dal), _iso(al)))
+
+    def spezzati_recenti(self, giorno, giorni=GIORNI_ROTAZIONE_SPL):
+        """{nome: turni spezzati} nei giorni prima di giorno, per far ruotare il pool."""
+        al = datetime.strptime(_iso(giorno), "%Y-%m-%d") - timedelta(days=1)
+        t = self._query(f"""
+            SELECT nome, count(*) AS n FROM assegnazioni
+            WHERE piano IN ({_ULTIMI}) AND tipo = 'SPL' GROUP BY nome""", (_iso(al - timedelta(days=giorni - 1)), _iso(al)))
+        return dict(zip(t['nome'], t['n'].astype(int).tolist()))
+
+    def giorni(self):
+        """Prima e ultima data archiviata (None, None se lo storico è vuoto)."""
+        with self._conn() as con:
+            return con.execute("SELECT min(data), max(data) FROM piani").fetchone()
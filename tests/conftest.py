@@ -0,0 +1,21 @@
+"""Dati di prova comuni: schede staff minime e carichi per zona."""
+import pandas as pd
+import pytest
+
+from schema_staff import canonico
+
+COLONNE_STAFF = ["Nome", "Ruolo", "Zone_Padronanza", "Non_Assegnare_A"]
+
+@pytest.fixture
+def staff():
+    """staff(righe): tabella canonica da righe [Nome, Ruolo, Zone_Padronanza, Non_Assegnare_A]."""
+    def crea(righe):
+        return canonico(pd.DataFrame(righe, columns=COLONNE_STAFF))
+    return crea
+
+@pytest.fixture
+def carichi():
+    """carichi(zone, AI=..., ...): cur_inp con gli stessi valori per ogni zona, 0 dove mancano."""
+    def crea(zone, **valori):
+        return {z: {k: valori.get(k, 0) for k in ["AI", "FI", "AG", "FG", "COP", "BIAN"]} for z in zone}
+    return crea
@@ -0,0 +1,89 @@
+"""Backend di archiviazione dello staff (archivio.py)."""
+import shutil
+
+import pandas as pd
+import pytest
+
+from archivio import BackendCSV, BackendSQLite, importa_csv
+from concorrenza import ConflittoVersione
+
+ORIGINALE = "Housekeeping_DB - Staff.csv"
+
+@pytest.fixture
+def csv_staff(tmp_path):
+    """Copia del file staff del repository: il CSV nel formato vecchio (7.0, 1.0, Riposo_Preferenziale)."""
+    path = tmp_path / "staff.csv"
+    shutil.copy(ORIGINALE, path)
+    return BackendCSV(str(path))
+
+@pytest.fixture
+def db_staff(tmp_path):
+    """Database SQLite con le schede del file staff del repository."""
+    db = BackendSQLite(str(tmp_path / "staff.db"))
+    db.salva(BackendCSV(ORIGINALE).carica())
+    return db
+
+@pytest.fixture(params=["csv_staff", "db_staff"])
+def archivio(request):
+    return request.getfixturevalue(request.param)
+
+def _scheda(b, nome):
+    return {k: v for k, v in b.trova(nome).items() if k not in ("Ultima_Modifica",)}
+
+def test_upsert_csv_cambia_solo_la_riga_nel_formato_del_file(csv_staff):
+    prima = open(csv_staff.path, encoding="utf-8").read().splitlines()
+    versione = csv_staff.trova("Doralice")['Ultima_Modifica']
+    csv_staff.upsert({**_scheda(csv_staff, "Doralice"), "Jolly": True, "Riposo_Pref": "Mercoledì"}, "Doralice", versione)
+    dopo = open(csv_staff.path, encoding="utf-8").read().splitlines()
+    assert dopo[0] == prima[0]
+    cambiate = [(a, b) for a, b in zip(prima, dopo) if a != b]
+    assert len(cambiate) == 1 and len(dopo) == len(prima)
+    vecchia, nuova = (r.split(",") for r in cambiate[0])
+    intestazione = prima[0].split(",")
+    assert nuova[intestazione.index("Jolly")] == "1.0"
+    assert nuova[intestazione.index("Riposo_Preferenziale")] == "Mercoledì"
+    assert nuova[intestazione.index("Esperienza")] == vecchia[intestazione.index("Esperienza")] == "6.0"
+
+def test_upsert_csv_aggiunge_una_colonna_solo_se_la_scheda_la_usa(csv_staff):
+    csv_staff.upsert({"Nome": "Nuova", "Ruolo": "Cameriera", "Viaggia_Con": "Nessuna", "Part_Time": 0}, None, "")
+    assert open(csv_staff.path, encoding="utf-8").readline().strip().split(",")[-1] == "Auto"
+    csv_staff.upsert({"Nome": "Altra", "Ruolo": "Cameriera", "Part_Time": 1}, None, "")
+    assert open(csv_staff.path, encoding="utf-8").readline().strip().split(",")[-1] == "Part_Time"
+    assert bool(csv_staff.trova("Altra")['Part_Time']) and not csv_staff.trova("Nuova")['Part_Time']
+
+def test_versione_vecchia_solleva_conflitto(archivio):
+    letta = archivio.trova("Doralice")['Ultima_Modifica']
+    nuova = archivio.upsert({"Nome": "Doralice", "Empatia": 9}, "Doralice", letta)
+    with pytest.raises(ConflittoVersione):
+        archivio.upsert({"Nome": "Doralice", "Empatia": 3}, "Doralice", letta)
+    assert int(float(archivio.trova("Doralice")['Empatia'])) == 9
+    archivio.upsert({"Nome": "Doralice", "Empatia": 3}, "Doralice", nuova)
+    assert int(float(archivio.trova("Doralice")['Empatia'])) == 3
+
+def test_nuova_scheda_o_cambio_nome_su_un_nome_esistente(archivio):
+    with pytest.raises(ConflittoVersione):
+        archivio.upsert({"Nome": "Doralice", "Ruolo": "Cameriera"}, None, "")
+    letta = archivio.trova("Gliceria")['Ultima_Modifica']
+    with pytest.raises(ConflittoVersione):
+        archivio.upsert({"Nome": "Doralice"}, "Gliceria", letta)
+
+def test_upsert_sqlite_tocca_solo_i_campi_passati(db_staff):
+    prima = db_staff.carica()
+    letta = db_staff.trova("Doralice")['Ultima_Modifica']
+    db_staff.upsert({"Nome": "Dora", "Empatia": 2}, "Doralice", letta)
+    dopo = db_staff.carica()
+    assert len(dopo) == len(prima) and "Doralice" not in set(dopo['Nome'])
+    dora = db_staff.trova("Dora")
+    assert dora['Empatia'] == 2 and dora['Zone_Padronanza'] == "Le Dune"
+    altre = lambda df: df[~df['Nome'].isin(["Doralice", "Dora"])].reset_index(drop=True)
+    pd.testing.assert_frame_equal(altre(dopo), altre(prima))
+
+def test_importa_csv_vince_il_primo_file(tmp_path):
+    a, b, db = tmp_path / "a.csv", tmp_path / "b.csv", str(tmp_path / "staff.db")
+    pd.DataFrame({"Nome": ["Anna", "Bea"], "Ruolo": ["Cameriera", "Cameriera"], "Empatia": [9, 8]}).to_csv(a, index=False)
+    pd.DataFrame({"Nome": ["Bea", "Cloe"], "Ruolo": ["Governante", "Cameriera"], "Empatia": [1, 7]}).to_csv(b, index=False)
+    BackendSQLite(db).upsert({"Nome": "Dora", "Ruolo": "Cameriera"})
+    assert importa_csv(db, [str(a), str(b), str(tmp_path / "manca.csv")]) == 4
+    archivio = BackendSQLite(db)
+    assert archivio.trova("Bea")['Ruolo'] == "Cameriera" and archivio.trova("Bea")['Empatia'] == 8
+    assert {"Anna", "Bea", "Cloe", "Dora"} == set(archivio.carica()['Nome'])
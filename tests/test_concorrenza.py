@@ -0,0 +1,78 @@
+"""Blocco, scrittura atomica e versioni (concorrenza.py) e salvataggio dei tempi (dati.salva_tempi)."""
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from concorrenza import (ConflittoVersione, blocco_file, controlla_versione, nuova_versione, scrivi_atomico,
+                         unisci_modifiche)
+from dati import carica_tempi, salva_tempi
+
+TEMPI = pd.DataFrame({"HOTEL": ["A", "B"], "AI": [10, 10], "FI": [20, 20]})
+
+def test_versione_vecchia_solleva_conflitto():
+    controlla_versione("Anna", "v1", "v1")
+    controlla_versione("Anna", None, "v2")
+    with pytest.raises(ConflittoVersione, match="modificato"):
+        controlla_versione("Anna", "v1", "v2")
+    with pytest.raises(ConflittoVersione, match="eliminato"):
+        controlla_versione("Anna", "v1", None)
+    with pytest.raises(ConflittoVersione, match="già presente"):
+        controlla_versione("Anna", "", "v1", nuovo=True)
+
+def test_nuova_versione_sempre_successiva():
+    futura = "2999-01-01 00:00:00.000000"
+    assert nuova_versione(futura) > futura
+    v = nuova_versione()
+    assert nuova_versione(v) > v
+
+def test_unisci_modifiche_somma_righe_diverse():
+    attuale = TEMPI.assign(AI=[11, 10])           # un altro utente ha cambiato A
+    nuova = TEMPI.assign(FI=[20, 22])             # questo utente ha cambiato B
+    out = unisci_modifiche(attuale, TEMPI, nuova, "HOTEL", ["AI", "FI"])
+    assert out.to_dict("list") == {"HOTEL": ["A", "B"], "AI": [11, 10], "FI": [20, 22]}
+
+def test_unisci_modifiche_aggiunge_le_righe_nuove():
+    nuova = pd.concat([TEMPI, pd.DataFrame({"HOTEL": ["C"], "AI": [5], "FI": [5]})], ignore_index=True)
+    out = unisci_modifiche(TEMPI.assign(AI=[11, 10]), TEMPI, nuova, "HOTEL", ["AI", "FI"])
+    assert out['HOTEL'].tolist() == ["A", "B", "C"] and out['AI'].tolist() == [11, 10, 5]
+
+def test_unisci_modifiche_stessa_riga_in_conflitto():
+    with pytest.raises(ConflittoVersione, match="A"):
+        unisci_modifiche(TEMPI.assign(AI=[11, 10]), TEMPI, TEMPI.assign(AI=[12, 10]), "HOTEL", ["AI", "FI"])
+
+def test_salva_tempi_con_base(tmp_path):
+    path = str(tmp_path / "tempi.csv")
+    salva_tempi(TEMPI, path)
+    salva_tempi(TEMPI.assign(AI=[11, 10]), path, TEMPI)
+    salva_tempi(TEMPI.assign(FI=[20, 22]), path, TEMPI)
+    assert carica_tempi(path)[["HOTEL", "AI", "FI"]].to_dict("list") == {"HOTEL": ["A", "B"], "AI": [11, 10], "FI": [20, 22]}
+    with pytest.raises(ConflittoVersione):
+        salva_tempi(TEMPI.assign(AI=[12, 10]), path, TEMPI)
+    assert carica_tempi(path)['AI'].tolist() == [11, 10]
+
+def test_scrittura_atomica_non_tocca_il_file_se_fallisce(tmp_path):
+    path = str(tmp_path / "f.csv")
+    scrivi_atomico(path, lambda f: f.write("vecchio"))
+    def rotta(f):
+        f.write("a metà"); raise OSError("disco pieno")
+    with pytest.raises(OSError):
+        scrivi_atomico(path, rotta)
+    assert open(path, encoding="utf-8").read() == "vecchio"
+    assert os.listdir(tmp_path) == ["f.csv"]
+
+def test_blocco_rientrante_ed_esclusivo(tmp_path):
+    path = str(tmp_path / "f.csv")
+    errori = []
+    def altro():
+        try:
+            with blocco_file(path, timeout=0.05): pass
+        except TimeoutError as e:
+            errori.append(e)
+    with blocco_file(path):
+        with blocco_file(path):
+            t = threading.Thread(target=altro); t.start(); t.join()
+    assert len(errori) == 1
+    t = threading.Thread(target=altro); t.start(); t.join()
+    assert len(errori) == 1
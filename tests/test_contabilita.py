@@ -0,0 +1,62 @@
+"""Contabilità incrementale del planning (contabilita.py) contro il ricalcolo da zero."""
+import random
+
+import pytest
+
+from contabilita import ContabilitaPiano, nuova_assegnazione, profili
+from vincoli import grafo_vincoli
+
+ZONE = ["Hotel Castello", "Le Dune", "Villa del Parco"]
+FABB = {"Hotel Castello": 15.0, "Le Dune": 7.5, "Villa del Parco": 0}
+
+@pytest.fixture
+def squadre(staff):
+    df = staff([["Gov C", "Governante", "Hotel Castello", ""],
+                ["Gov D", "Governante", "Le Dune", ""],
+                ["Gov V", "Governante", "Villa del Parco", ""],
+                ["Anna", "Cameriera", "Hotel Castello", "Le Dune"],
+                ["Bea", "Cameriera", "Le Dune", "Anna"],
+                ["Cloe", "Cameriera", "Hotel Castello", ""],
+                ["Dora", "Cameriera", "Villa del Parco", "Gov C"],
+                ["Elsa", "Cameriera", "Le Dune", ""],
+                ["Fede", "Cameriera", "Hotel Castello", ""]])
+    df.loc[df['Nome'] == "Fede", 'Part_Time'] = True
+    prof = profili(df)
+    iniziali = [nuova_assegnazione(n, z, prof) for z, nn in
+                [("Hotel Castello", ["Gov C", "Anna"]), ("Le Dune", ["Gov D", "Bea"]), ("Villa del Parco", ["Gov V"])] for n in nn]
+    return df, iniziali, grafo_vincoli(df, ZONE, {})
+
+def _conti(c):
+    return {"ore": {z: round(o, 6) for z, o in c.ore.items()}, "scoperte": c.scoperte, "eccesso": c.eccesso,
+            "doppie": c.doppie, "rimaste": c.rimaste, "spl": c.spl_in_squadra, "vietate": c.vietate,
+            "incompatibili": c.incompatibili, "assenti": c.assenti_in_squadra, "avvisi": c.avvisi()}
+
+@pytest.mark.parametrize("seme", range(5))
+def test_modifiche_incrementali_come_il_ricalcolo(squadre, seme):
+    df, iniziali, grafo = squadre
+    rnd = random.Random(seme)
+    args = dict(df=df, assenti=["Elsa"], spl=["Cloe"], carico_spl=5.0, grafo=grafo)
+    c = ContabilitaPiano(iniziali, FABB, **args)
+    cameriere = [n for n, (r, _) in profili(df).items() if r == "Cameriera"]
+    for _ in range(30):
+        z = rnd.choice(ZONE)
+        gov = [n for n in c.squadre[z] if c.squadre[z][n].tipo == "GOV"]
+        c.sostituisci(z, gov + rnd.sample(cameriere, rnd.randint(0, 4)))
+        assert _conti(c) == _conti(ContabilitaPiano(c.assegnazioni(), FABB, **args))
+    assert c.modifiche == 30
+
+def test_avvisi_di_una_squadra_modificata(squadre):
+    df, iniziali, grafo = squadre
+    c = ContabilitaPiano(iniziali, FABB, df, assenti=["Elsa"], grafo=grafo)
+    assert c.avvisi() == ["Hotel Castello scoperta di 7.5h", "Villa del Parco scoperta di 7.5h"]
+    c.sostituisci("Le Dune", ["Gov D", "Bea", "Anna", "Elsa"])
+    assert c.avvisi() == ["Anna è in più zone: Hotel Castello, Le Dune",
+                          "Elsa è assente ma è in Le Dune",
+                          "Anna non va assegnata a Le Dune",
+                          "Anna e Bea non devono lavorare insieme (Le Dune)",
+                          "Hotel Castello scoperta di 7.5h",
+                          "Villa del Parco scoperta di 7.5h",
+                          "Le Dune in eccesso di 15.0h"]
+    c.sostituisci("Le Dune", ["Gov D", "Bea"])
+    assert c.avvisi() == ["Hotel Castello scoperta di 7.5h", "Villa del Parco scoperta di 7.5h"]
+    assert "Anna" not in c.rimaste and "Cloe" in c.rimaste
@@ -0,0 +1,49 @@
+"""Cache dei file dati (dati.py): riletti solo quando cambiano."""
+import pandas as pd
+
+import dati
+from dati import carica_staff, carica_tempi, invalida, salva_staff, statistiche_cache, versione
+
+def _scrivi(path, righe):
+    pd.DataFrame(righe, columns=["Nome", "Ruolo"]).to_csv(path, index=False)
+
+def _conti(tabella):
+    return statistiche_cache().get(tabella, {"hit": 0, "miss": 0, "invalidazioni": 0})
+
+def test_seconda_lettura_dalla_cache_come_copia(tmp_path):
+    path = str(tmp_path / "staff.csv")
+    _scrivi(path, [["Anna", "Cameriera"]])
+    prima = _conti("staff")
+    df = carica_staff(path)
+    df.loc[0, 'Nome'] = "Modificata"
+    assert carica_staff(path)['Nome'].tolist() == ["Anna"]
+    dopo = _conti("staff")
+    assert (dopo['miss'] - prima['miss'], dopo['hit'] - prima['hit']) == (1, 1)
+
+def test_file_cambiato_da_fuori_viene_riletto(tmp_path):
+    path = str(tmp_path / "staff.csv")
+    _scrivi(path, [["Anna", "Cameriera"]])
+    carica_staff(path)
+    firma = versione(path)
+    _scrivi(path, [["Anna", "Cameriera"], ["Bea", "Governante"]])
+    assert versione(path) != firma
+    prima = _conti("staff")
+    assert carica_staff(path)['Nome'].tolist() == ["Anna", "Bea"]
+    assert _conti("staff")['invalidazioni'] == prima['invalidazioni'] + 1
+
+def test_file_mancante_e_poi_creato(tmp_path):
+    path = str(tmp_path / "config_tempi.csv")
+    assert carica_tempi(path).empty and versione(path) is None
+    pd.DataFrame({"HOTEL": ["A"], "AI": [60]}).to_csv(path, index=False)
+    assert carica_tempi(path)['AI'].tolist() == [60]
+
+def test_salvataggio_aggiorna_la_cache_senza_rilettura(tmp_path, monkeypatch):
+    path = str(tmp_path / "staff.csv")
+    _scrivi(path, [["Anna", "Cameriera"]])
+    df = carica_staff(path)
+    salva_staff(pd.concat([df, df.assign(Nome="Bea")], ignore_index=True), path)
+    monkeypatch.setattr(dati, "_parse_staff", None)
+    assert carica_staff(path)['Nome'].tolist() == ["Anna", "Bea"]
+    invalida("staff", path)
+    monkeypatch.undo()
+    assert carica_staff(path)['Nome'].tolist() == ["Anna", "Bea"]
@@ -0,0 +1,44 @@
+"""Carichi del giorno dall'esportazione PMS (pms.py)."""
+import pandas as pd
+import pytest
+
+from pms import MappaCamere, carica_camere, importa_pms
+
+ZONE = ["Hotel Castello", "Hotel Castello 4 Piano", "Le Dune"]
+CAMERE = pd.DataFrame({"Da": [101, 401, 501], "A": [399, 499, 520], "Zona": ["Castello", "4 Piano", "Dune"]})
+
+def test_intervalli_e_alias_di_zona():
+    mappa = MappaCamere(CAMERE, ZONE)
+    numeri = [101, 399, 400, 401, 499, 520, 521, 50, float("nan")]
+    assert mappa(pd.Series(numeri, dtype=float).to_numpy()).tolist() == [0, 0, -1, 1, 1, 2, -1, -1, -1]
+
+def test_zona_non_in_elenco():
+    with pytest.raises(ValueError, match="Villa del Parco"):
+        MappaCamere(pd.DataFrame({"Da": [1], "A": [9], "Zona": ["Villa"]}), ZONE)
+
+def test_configurazione_con_intervalli_sovrapposti(tmp_path):
+    path = tmp_path / "config_camere.csv"
+    path.write_text("Da,A,Zona\n101,300,Castello\n250,399,Dune\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="sovrapposti"):
+        carica_camere(str(path))
+
+def test_importa_csv_con_punto_e_virgola_e_colonne_inglesi(tmp_path):
+    path = tmp_path / "pms.csv"
+    path.write_text("Room;Status;Group;Turndown;Linen\n"
+                    "101;ARR;;1;0\n"
+                    "102;STAY;;0;1\n"
+                    "410;DEP;G12;1;1\n"
+                    "505;stay;0;;\n"
+                    "506;???;;;\n"
+                    "999;ARR;;1;\n", encoding="utf-8")
+    r = importa_pms(str(path), CAMERE, ZONE)
+    assert r['carichi'] == {
+        "Hotel Castello": {"AI": 1, "FI": 1, "AG": 0, "FG": 0, "COP": 1, "BIAN": 1},
+        "Hotel Castello 4 Piano": {"AI": 0, "FI": 0, "AG": 1, "FG": 0, "COP": 1, "BIAN": 1},
+        "Le Dune": {"AI": 0, "FI": 1, "AG": 0, "FG": 0, "COP": 0, "BIAN": 0},
+    }
+    assert (r['righe'], r['fuori_zona'], r['stato_ignoto']) == (6, 1, 1)
+
+def test_senza_configurazione_camere(tmp_path):
+    with pytest.raises(ValueError, match="configurazione camere"):
+        importa_pms(str(tmp_path / "pms.csv"), pd.DataFrame(), ZONE)
@@ -0,0 +1,54 @@
+"""Ripianificazione incrementale (ripiano.py)."""
+import pandas as pd
+import pytest
+
+from planning import genera_schieramento
+from ripiano import ripianifica
+
+ZONE = ["Hotel Castello", "Le Dune"]
+
+@pytest.fixture
+def piano(staff, carichi):
+    """Una governante e una cameriera per zona, più due libere (prima quella delle Dune)."""
+    df = staff([["Gov C", "Governante", "Hotel Castello", ""],
+                ["Gov D", "Governante", "Le Dune", ""],
+                ["Cam 0", "Cameriera", "Hotel Castello", ""],
+                ["Cam 1", "Cameriera", "Le Dune", ""],
+                ["Cam 2", "Cameriera", "Le Dune", ""],
+                ["Cam 3", "Cameriera", "Hotel Castello", ""]])
+    cur = carichi(ZONE, AI=4)
+    prev = genera_schieramento(df, pd.DataFrame(), cur, lista_hotel=ZONE)
+    assert _squadre(prev) == {"Hotel Castello": ["Gov C", "Cam 0"], "Le Dune": ["Gov D", "Cam 1"]}
+    return prev, df, cur
+
+def _squadre(esito):
+    return {r['Hotel']: [m['Nome'] for m in r['Membri']] for r in esito['ris']}
+
+def test_senza_cambiamenti_non_sposta_nessuno(piano):
+    prev, df, cur = piano
+    r = ripianifica(prev, df, pd.DataFrame(), cur, lista_hotel=ZONE)
+    assert r['spostamenti'] == [] and r['zone_ricalcolate'] == []
+    assert _squadre(r) == _squadre(prev)
+
+def test_assente_sostituita_da_una_libera_con_la_padronanza(piano):
+    prev, df, cur = piano
+    r = ripianifica(prev, df, pd.DataFrame(), cur, ["Cam 0"], lista_hotel=ZONE)
+    assert r['zone_ricalcolate'] == ["Hotel Castello"]
+    assert _squadre(r) == {"Hotel Castello": ["Gov C", "Cam 3"], "Le Dune": ["Gov D", "Cam 1"]}
+    assert r['spostamenti'] == [{"Nome": "Cam 0", "Da": "Hotel Castello", "A": None},
+                                {"Nome": "Cam 3", "Da": None, "A": "Hotel Castello"}]
+    assert r['scoperte'] == {}
+
+def test_squadra_fissata_resta_com_e(piano):
+    prev, df, cur = piano
+    r = ripianifica(prev, df, pd.DataFrame(), cur, lista_hotel=ZONE, fissati={"Le Dune": ["Gov D", "Cam 2"]})
+    assert _squadre(r) == {"Hotel Castello": ["Gov C", "Cam 0"], "Le Dune": ["Gov D", "Cam 2"]}
+    assert {s['Nome'] for s in r['spostamenti']} == {"Cam 1", "Cam 2"}
+
+def test_carico_in_aumento_prende_prima_chi_padroneggia_la_zona(piano, carichi):
+    prev, df, _ = piano
+    cur = {**carichi(ZONE, AI=4), "Hotel Castello": carichi(ZONE, AI=8)["Hotel Castello"]}
+    r = ripianifica(prev, df, pd.DataFrame(), cur, lista_hotel=ZONE)
+    assert r['zone_ricalcolate'] == ["Hotel Castello"]
+    assert _squadre(r)["Hotel Castello"][:3] == ["Gov C", "Cam 0", "Cam 3"]
+    assert _squadre(r)["Le Dune"] == ["Gov D", "Cam 1"]
@@ -0,0 +1,46 @@
+"""Regressioni del planning di più giorni (settimana.py)."""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import solver
+from settimana import carichi_da_tabella, genera_periodo
+
+ZONE = ["Hotel Castello", "Le Dune"]
+LUNEDI = date(2026, 10, 19)
+
+@pytest.fixture
+def giorno(staff, carichi):
+    """Venti cameriere sulle due zone e un carico con coperture e biancheria."""
+    return staff([[f"Cam {i}", "Cameriera", ZONE[i % 2], ""] for i in range(20)]), carichi(ZONE, AI=4, FI=8, COP=8, BIAN=8)
+
+def test_pool_spezzati_ruota_tra_i_giorni(giorno):
+    df, cur = giorno
+    r = genera_periodo(df, pd.DataFrame(), cur, LUNEDI, date(2026, 10, 20), lista_hotel=ZONE)
+    ieri, oggi = (r['giorni'][g]['spl'] for g in sorted(r['giorni']))
+    assert ieri and oggi
+    assert not set(ieri) & set(oggi)
+
+def test_recenti_iniziali_vanno_in_fondo(giorno):
+    df, cur = giorno
+    prima = genera_periodo(df, pd.DataFrame(), cur, LUNEDI, LUNEDI, lista_hotel=ZONE)['giorni'][LUNEDI]['spl']
+    dopo = genera_periodo(df, pd.DataFrame(), cur, LUNEDI, LUNEDI, lista_hotel=ZONE, recenti=dict.fromkeys(prima, 1))['giorni'][LUNEDI]['spl']
+    assert not set(prima) & set(dopo)
+
+def test_ottimo_riparte_dal_greedy_del_giorno(giorno, monkeypatch):
+    df, cur = giorno
+    greedy = genera_periodo(df, pd.DataFrame(), cur, LUNEDI, date(2026, 10, 20), lista_hotel=ZONE)
+    # Il solver non deve rifare il greedy: il pool spezzati resta quello del passo in sequenza
+    monkeypatch.setattr(solver, "schieramento_greedy", None)
+    r = genera_periodo(df, pd.DataFrame(), cur, LUNEDI, date(2026, 10, 20), lista_hotel=ZONE, modo="ottimo", processi=1, tempo_max=0.2)
+    for g, esito in r['giorni'].items():
+        assert esito['solver']['modo'] in ("ottimo", "greedy")
+        assert esito['spl'] == greedy['giorni'][g]['spl']
+
+def test_carichi_da_tabella_risolve_gli_alias():
+    t = pd.DataFrame({"Data": ["19/10/2026", "19/10/2026", "20/10/2026"], "Hotel": ["Castello", "Hotel Castello", "Dune"],
+                      "AI": [2, 3, 4], "FI": [1, 0, 0]})
+    carichi = carichi_da_tabella(t)
+    assert carichi[LUNEDI] == {"Hotel Castello": {"AI": 5, "FI": 1, "AG": 0, "FG": 0, "COP": 0, "BIAN": 0}}
+    assert list(carichi[date(2026, 10, 20)]) == ["Le Dune"]
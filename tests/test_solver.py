@@ -0,0 +1,46 @@
+"""Regressioni del modo "ottimo" (solver.py)."""
+import pandas as pd
+import pytest
+
+import solver
+from planning import schieramento_greedy
+from solver import genera_schieramento_ottimo
+
+ZONE = ["Hotel Castello", "Le Dune"]
+
+def test_cameriera_esclusa_dalla_governante_non_va_nella_sua_zona(staff, carichi):
+    df = staff([["Gov A", "Governante", "Hotel Castello", ""],
+                ["Cam 0", "Cameriera", "Hotel Castello", "Gov A"],
+                ["Cam 1", "Cameriera", "Le Dune", ""]])
+    esito = genera_schieramento_ottimo(df, pd.DataFrame(), carichi(ZONE, AI=7), lista_hotel=ZONE, tempo_max=0.2)
+    squadre = {r['Hotel']: {m['Nome'] for m in r['Membri']} for r in esito['ris']}
+    assert "Gov A" in squadre["Hotel Castello"]
+    assert "Cam 0" not in squadre["Hotel Castello"]
+
+def test_governanti_incompatibili_in_zone_diverse(staff, carichi):
+    df = staff([["Gov A", "Governante", "Hotel Castello", ""],
+                ["Gov B", "Governante", "Hotel Castello, Le Dune", "Gov A"],
+                ["Cam 0", "Cameriera", "Hotel Castello", ""],
+                ["Cam 1", "Cameriera", "Le Dune", ""]])
+    esito = genera_schieramento_ottimo(df, pd.DataFrame(), carichi(ZONE, AI=7), lista_hotel=ZONE, tempo_max=0.2)
+    for r in esito['ris']:
+        assert {"Gov A", "Gov B"} - {m['Nome'] for m in r['Membri']}, r['Hotel']
+
+def test_riparte_dal_greedy_passato(staff, carichi, monkeypatch):
+    df = staff([["Gov A", "Governante", "Hotel Castello", ""],
+                ["Cam 0", "Cameriera", "Hotel Castello", ""],
+                ["Cam 1", "Cameriera", "Le Dune", ""]])
+    cur = carichi(ZONE, AI=7)
+    partenza = schieramento_greedy(df, pd.DataFrame(), cur, lista_hotel=ZONE)
+    atteso = genera_schieramento_ottimo(df, pd.DataFrame(), cur, lista_hotel=ZONE, tempo_max=0.2)
+    monkeypatch.setattr(solver, "schieramento_greedy", None)
+    esito = genera_schieramento_ottimo(df, pd.DataFrame(), cur, lista_hotel=ZONE, tempo_max=0.2, partenza=partenza)
+    assert esito['ris'] == atteso['ris']
+
+def test_errore_del_solver_non_ricade_sul_greedy(staff, carichi, monkeypatch):
+    df = staff([["Gov A", "Governante", "Hotel Castello", ""],
+                ["Cam 0", "Cameriera", "Hotel Castello", ""]])
+    def rotto(mod): raise KeyError("zona")
+    monkeypatch.setattr(solver, "_max_flow_padronanza", rotto)
+    with pytest.raises(KeyError):
+        genera_schieramento_ottimo(df, pd.DataFrame(), carichi(ZONE, AI=7), lista_hotel=ZONE, tempo_max=0.2)
@@ -0,0 +1,43 @@
+"""Grafo dei vincoli (vincoli.py): zone vietate e gerarchia del registro."""
+import pandas as pd
+
+from contabilita import ContabilitaPiano
+from modello import da_esito
+from planning import genera_schieramento
+from solver import genera_schieramento_ottimo
+from vincoli import GrafoVincoli
+from zone import registro
+
+PIANO = "Hotel Castello 4 Piano"
+ZONE = ["Hotel Castello", PIANO]
+
+def _df(staff):
+    return staff([["Cam 0", "Cameriera", PIANO, "Hotel Castello"],
+                  ["Cam 1", "Cameriera", "Hotel Castello", ""],
+                  ["Cam 2", "Cameriera", "Hotel Castello", ""]])
+
+def test_divieto_sul_padre_vale_per_i_figli(staff):
+    reg = registro()
+    g = GrafoVincoli(_df(staff), reg.hotel(), reg.unite())
+    r = g.indice("Cam 0")
+    assert g.vietata(r, "Hotel Castello") and g.vietata(r, PIANO)
+    assert not g.vietata(r, "Le Dune")
+
+def test_divieto_sul_membro_vale_per_il_gruppo(staff):
+    reg = registro()
+    g = GrafoVincoli(staff([["Cam 0", "Cameriera", "Le Palme", "Garden"]]), reg.hotel(), reg.unite())
+    assert g.vietata(0, "Hotel Castello Garden") and g.vietata(0, "Palme & Garden")
+
+def test_planning_non_usa_la_zona_figlia_vietata(staff, carichi):
+    df = _df(staff)
+    for esito in (genera_schieramento(df, pd.DataFrame(), carichi([PIANO], AI=20), lista_hotel=[PIANO]),
+                  genera_schieramento_ottimo(df, pd.DataFrame(), carichi([PIANO], AI=20), lista_hotel=[PIANO], tempo_max=0.2)):
+        assert all("Cam 0" not in {m['Nome'] for m in r['Membri']} for r in esito['ris'])
+
+def test_contabilita_segnala_la_zona_figlia_vietata(staff, carichi):
+    df = _df(staff)
+    reg = registro()
+    esito = genera_schieramento(df, pd.DataFrame(), carichi(ZONE, AI=4), lista_hotel=ZONE)
+    cont = ContabilitaPiano(da_esito(esito), esito['fabb'], df, grafo=GrafoVincoli(df, reg.hotel(), reg.unite()))
+    cont.sostituisci(PIANO, ["Cam 0"])
+    assert ("Cam 0", PIANO) in cont.vietate
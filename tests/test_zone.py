@@ -0,0 +1,44 @@
+"""Registro delle zone (zone.py) sul zone.csv del repository."""
+import pytest
+
+from zone import RegistroZone, _leggi, registro
+
+def test_nomi_e_alias_si_risolvono_al_nome_canonico():
+    reg = registro()
+    for nome in ["Hotel Castello 4° piano", "castello  4 piano", "4 Piano", "castello_4p"]:
+        assert reg.canonico(nome) == "Hotel Castello 4 Piano"
+    assert reg.risolvi("Hotel Le Palme") == "palme"
+    assert reg.risolvi("Zona che non c'è") is None
+    assert reg.canonico(" Zona che non c'è ") == "Zona che non c'è"
+
+def test_la_padronanza_copre_discendenti_e_gruppi():
+    reg = registro()
+    assert reg.coperte("Castello") == {"Hotel Castello", "Hotel Castello 4 Piano"}
+    assert reg.coperte("4 Piano") == {"Hotel Castello 4 Piano"}
+    assert reg.coperte("Garden, Dune") == {"Hotel Castello Garden", "Palme & Garden", "Le Dune"}
+    assert reg.coperte("Magazzino") == {"Magazzino"}
+
+def test_ordine_priorita_e_gruppi():
+    reg = registro()
+    nomi = ["Le Dune", "Le Palme", "Hotel Castello 4 Piano", "Hotel Castello Garden", "Hotel Castello", "Altro"]
+    assert reg.ordine(nomi) == ["Hotel Castello", "Hotel Castello 4 Piano", "Palme & Garden", "Le Dune", "Altro"]
+    assert reg.unite()["Palme & Garden"] == ["Hotel Castello Garden", "Le Palme"]
+    assert "Palme & Garden" not in reg.hotel()
+
+@pytest.mark.parametrize("righe, errore", [
+    ("a,Zona A,X,,hotel,,\nb,Zona B,x,,hotel,,", "indica sia"),
+    ("a,Zona A,,,hotel,,\na,Zona B,,,hotel,,", "Id ripetuto"),
+    ("a,Zona A,,z,piano,,", "Padre"),
+])
+def test_registro_non_valido(tmp_path, righe, errore):
+    path = tmp_path / "zone.csv"
+    path.write_text("Id,Nome,Alias,Padre,Livello,Gruppo,Priorita\n" + righe + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=errore):
+        RegistroZone(_leggi(str(path)))
+
+def test_registro_riletto_quando_il_file_cambia(tmp_path):
+    path = tmp_path / "zone.csv"
+    path.write_text("Id,Nome\na,Zona A\n", encoding="utf-8")
+    assert registro(str(path)) is registro(str(path))
+    path.write_text("Id,Nome,Alias\na,Zona A,Prima\n", encoding="utf-8")
+    assert registro(str(path)).canonico("prima") == "Zona A"
@@ -0,0 +1,166 @@
+"""Grafo dei vincoli tra persone e zone, costruito una volta per ogni versione dei dati staff.
+
+Dai campi liberi della scheda:
+    Viaggia_Con       gruppi auto (union-find): chi viaggia insieme sta nella stessa zona
+                      e fa lo stesso turno
+    Lavora_Bene_Con   coppie preferite (adiacenza, vale nei due sensi)
+    Non_Assegnare_A   zone vietate alla persona (nomi o alias del registro zone, con le
+                      zone che contengono), oppure persone con cui non lavorare
+
+Tutti i controlli usati dal planning sono lookup in set o array. I riferimenti a nomi
+che non esistono (né staff né zona) finiscono in 'pendenti' invece di essere ignorati.
+"""
+import threading
+
+import pandas as pd
+
+from prestazioni import misura
+from zone import registro
+
+NESSUNO = {"", "nessuna", "nessuno", "nan", "none"}
+_VUOTO = frozenset()
+COLONNE = ['Nome', 'Viaggia_Con', 'Lavora_Bene_Con', 'Non_Assegnare_A']
+
+def elenco(v):
+    """Nomi di un campo libero separati da virgola, senza i 'Nessuna'."""
+    return [t.strip() for t in str(v).split(",") if t.strip().lower() not in NESSUNO]
+
+class GrafoVincoli:
+
+    def __init__(self, df, zone=(), zone_unite=None):
+        self.nomi = df['Nome'].astype(str).tolist() if 'Nome' in df.columns else []
+        n = len(self.nomi)
+        self.pos = {}
+        for i, nome in enumerate(self.nomi): self.pos.setdefault(nome.lower(), i)
+        # Zone note: quelle del registro, le pianificate, le unite e i loro membri. Vietare una
+        # zona vieta ciò che la sua padronanza copre (registro().coperte: discendenti e loro
+        # gruppi) e, per un membro, anche l'unità in cui viene pianificato
+        reg = registro()
+        self._zone = {z.lower(): {z} | reg.coperte(z) for z in [x.nome for x in reg.zone.values()] + list(zone)}
+        for unita, membri in (zone_unite or {}).items():
+            self._zone.setdefault(unita.lower(), set()).update({unita} | reg.coperte(unita))
+            for m in membri:
+                self._zone.setdefault(m.lower(), set()).update({m, unita} | reg.coperte(m))
+
+        self._padre = list(range(n))
+        # Dizionari sparsi {riga: set}: la maggior parte delle persone non ha vincoli
+        self.coppie, self.escluse, self.zone_vietate = {}, {}, {}
+        self.pendenti = []   # (nome, campo, riferimento)
+
+        def colonna(c):
+            return df[c].tolist() if c in df.columns else [""] * n
+
+        def lega(d, i, j):
+            d.setdefault(i, set()).add(j); d.setdefault(j, set()).add(i)
+
+        for i, (via, lbc, naa) in enumerate(zip(colonna('Viaggia_Con'), colonna('Lavora_Bene_Con'), colonna('Non_Assegnare_A'))):
+            for x in elenco(via):
+                j = self._persona(i, 'Viaggia_Con', x)
+                if j is not None: self._unisci(i, j)
+            for x in elenco(lbc):
+                j = self._persona(i, 'Lavora_Bene_Con', x)
+                if j is not None and j != i: lega(self.coppie, i, j)
+            for x in elenco(naa):
+                # Nome di zona, poi persona, poi alias del registro zone
+                zona = self._zone.get(x.lower())
+                if zona is None and x.lower() not in self.pos: zona = self._zone.get(registro().canonico(x).lower())
+                if zona is not None:
+                    self.zone_vietate.setdefault(i, set()).update(zona)
+                else:
+                    j = self._persona(i, 'Non_Assegnare_A', x)
+                    if j is not None and j != i: lega(self.escluse, i, j)
+        # Un'esclusione vince sulla preferenza
+        for i, e in self.escluse.items():
+            if i in self.coppie: self.coppie[i] -= e
+        self.gruppo = [self._radice(i) for i in range(n)]
+        self._membri = {}
+        conta = {}
+        for g in self.gruppo: conta[g] = conta.get(g, 0) + 1
+        for i, g in enumerate(self.gruppo):
+            if conta[g] > 1: self._membri.setdefault(g, []).append(i)
+        self.in_auto = [conta[g] > 1 for g in self.gruppo]
+        self._indice = pd.Index([x.lower() for x in self.nomi])
+
+    def _persona(self, i, campo, x):
+        j = self.pos.get(x.lower())
+        if j is None: self.pendenti.append((self.nomi[i], campo, x))
+        return j
+
+    def _radice(self, i):
+        while self._padre[i] != i:
+            self._padre[i] = self._padre[self._padre[i]]; i = self._padre[i]
+        return i
+
+    def _unisci(self, i, j):
+        a, b = self._radice(i), self._radice(j)
+        if a != b: self._padre[max(a, b)] = min(a, b)
+
+    # --- CONTROLLI (per indice di riga) ---
+
+    def indice(self, nome):
+        return self.pos.get(str(nome).lower())
+
+    def righe(self, nomi):
+        """indice() per una lista di nomi in una volta, come lista di int (-1 se il nome non c'è)."""
+        if not len(nomi): return []
+        if self._indice.is_unique:
+            return self._indice.get_indexer(pd.Index(nomi).astype(str).str.lower()).tolist()
+        return [self.pos.get(str(x).lower(), -1) for x in nomi]
+
+    def compagni_auto(self, i):
+        """Altre persone dello stesso gruppo auto."""
+        return [j for j in self._membri[self.gruppo[i]] if j != i] if self.in_auto[i] else []
+
+    def preferite(self, i):
+        return self.coppie.get(i, _VUOTO)
+
+    def esclusioni(self, i):
+        return self.escluse.get(i, _VUOTO)
+
+    def stesso_gruppo(self, i, j):
+        return self.gruppo[i] == self.gruppo[j]
+
+    def incompatibili(self, i, j):
+        return j in self.escluse.get(i, _VUOTO)
+
+    def vietata(self, i, zona):
+        return zona in self.zone_vietate.get(i, _VUOTO)
+
+    def gruppi_auto(self):
+        """Gruppi auto con almeno due persone, come liste di nomi."""
+        return [[self.nomi[i] for i in m] for m in self._membri.values() if len(m) > 1]
+
+    def problemi(self):
+        """Righe leggibili per i riferimenti pendenti e i gruppi auto con esclusioni interne."""
+        righe = [f"{n}: {campo} → '{x}' non esiste" for n, campo, x in self.pendenti]
+        for m in self._membri.values():
+            for i in m:
+                for j in self.esclusioni(i):
+                    if i < j and self.gruppo[j] == self.gruppo[i]:
+                        righe.append(f"{self.nomi[i]} e {self.nomi[j]} viaggiano insieme ma non devono lavorare insieme")
+        return righe
+
+# --- CACHE ---
+
+CACHE_MAX = 8
+_cache = {}
+_lock = threading.Lock()
+
+def _firma(df, zone, zone_unite):
+    # hash() delle tuple di valori: più rapido di hash_pandas_object e basta per una cache in processo
+    cols = [c for c in COLONNE if c in df.columns]
+    return (len(df), tuple(cols), hash(tuple(hash(tuple(df[c].tolist())) for c in cols)),
+            tuple(zone), tuple(sorted((k, tuple(v)) for k, v in (zone_unite or {}).items())))
+
+@misura("grafo_vincoli")
+def grafo_vincoli(df, zone=(), zone_unite=None):
+    """GrafoVincoli di df, riusato finché nomi e campi di relazione non cambiano."""
+    firma = _firma(df, zone, zone_unite)
+    with _lock:
+        g = _cache.get(firma)
+    if g is None:
+        g = GrafoVincoli(df, zone, zone_unite)
+        with _lock:
+            if len(_cache) >= CACHE_MAX: _cache.pop(next(iter(_cache)))
+            _cache[firma] = g
+    return g
@@ -0,0 +1,155 @@
+"""Registro delle zone da zone.csv: nomi, alias, gerarchia, zone unite e priorità.
+
+Colonne di zone.csv:
+    Id        identificativo stabile (minuscolo, senza spazi)
+    Nome      nome canonico, quello usato in carichi, tempi e planning
+    Alias     altri nomi separati da '|' (hotel_list.csv, file staff, PMS)
+    Padre     Id della zona che la contiene (hotel -> piano -> blocco), vuoto per le radici
+    Livello   hotel, piano, blocco, area o gruppo
+    Gruppo    Id della zona 'gruppo' in cui viene pianificata insieme ad altre (es. Palme & Garden)
+    Priorita  ordine di riempimento: prima i numeri più bassi, poi le altre in ordine di file
+
+Ogni nome o alias si risolve con un lookup in un dict dopo la normalizzazione
+(minuscolo, senza '°', spazi compattati). La padronanza di una zona vale anche per
+tutte le sue discendenti, e per i gruppi di cui fa parte una di queste.
+"""
+import os
+import re
+import threading
+
+import pandas as pd
+
+FILE_ZONE = os.environ.get("FV_ZONE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "zone.csv"))
+COLONNE = ['Id', 'Nome', 'Alias', 'Padre', 'Livello', 'Gruppo', 'Priorita']
+GRUPPO = "gruppo"
+
+def normalizza(nome):
+    return re.sub(r"\s+", " ", str(nome).replace("°", " ").strip().lower())
+
+class Zona:
+    __slots__ = ("id", "nome", "alias", "padre", "livello", "gruppo", "priorita")
+
+    def __init__(self, id, nome, alias, padre, livello, gruppo, priorita):
+        self.id, self.nome, self.alias, self.padre = id, nome, alias, padre
+        self.livello, self.gruppo, self.priorita = livello, gruppo, priorita
+
+    def __repr__(self):
+        return f"Zona({self.id!r}, {self.nome!r})"
+
+class RegistroZone:
+
+    def __init__(self, t):
+        self.zone = {}
+        for r in t.itertuples(index=False):
+            prio = pd.to_numeric(r.Priorita, errors='coerce')
+            z = Zona(r.Id, r.Nome, [a.strip() for a in r.Alias.split("|") if a.strip()], r.Padre or None,
+                     r.Livello or "hotel", r.Gruppo or None, None if pd.isna(prio) else float(prio))
+            if z.id in self.zone: raise ValueError(f"zone: Id ripetuto '{z.id}'")
+            self.zone[z.id] = z
+        self._alias = {}
+        for z in self.zone.values():
+            for x in [z.id, z.nome] + z.alias:
+                k = normalizza(x)
+                if self._alias.get(k, z.id) != z.id:
+                    raise ValueError(f"zone: '{x}' indica sia {self._alias[k]} sia {z.id}")
+                self._alias[k] = z.id
+            for rif, campo in ((z.padre, 'Padre'), (z.gruppo, 'Gruppo')):
+                if rif is not None and rif not in self.zone: raise ValueError(f"zone: {z.id}.{campo} = '{rif}' non esiste")
+        self.figli = {i: [] for i in self.zone}
+        for z in self.zone.values():
+            if z.padre: self.figli[z.padre].append(z.id)
+        self._coperte = {}
+
+    # --- NOMI ---
+
+    def risolvi(self, nome):
+        """Id della zona per un nome, alias o Id (None se sconosciuto)."""
+        return self._alias.get(normalizza(nome))
+
+    def canonico(self, nome):
+        """Nome canonico per un nome o alias; i nomi sconosciuti restano come sono."""
+        i = self.risolvi(nome)
+        return self.zone[i].nome if i else str(nome).strip()
+
+    def hotel(self):
+        """Zone con carichi propri (tutte tranne i gruppi), in ordine di file."""
+        return [z.nome for z in self.zone.values() if z.livello != GRUPPO]
+
+    def unite(self):
+        """{nome gruppo: [nomi delle zone membro]}."""
+        out = {}
+        for z in self.zone.values():
+            if z.gruppo: out.setdefault(self.zone[z.gruppo].nome, []).append(z.nome)
+        return out
+
+    # --- GERARCHIA ---
+
+    def discendenti(self, i):
+        """Id della zona e di tutte quelle contenute (piani, blocchi)."""
+        out, pila = [], [i]
+        while pila:
+            j = pila.pop(); out.append(j); pila.extend(self.figli[j])
+        return out
+
+    def coperte(self, testo):
+        """Nomi canonici delle zone coperte da una padronanza 'zona, zona, ...'.
+
+        Ogni zona copre le sue discendenti e i gruppi di cui una di esse fa parte; un nome
+        che non è in registro copre solo la zona con quel nome esatto.
+        Il risultato è memorizzato per testo: molte persone hanno la stessa padronanza.
+        """
+        c = self._coperte.get(testo)
+        if c is None:
+            ids, altre = set(), set()
+            for x in str(testo).split(","):
+                if not x.strip(): continue
+                i = self.risolvi(x)
+                if i: ids.update(self.discendenti(i))
+                else: altre.add(x.strip())
+            ids |= {self.zone[j].gruppo for j in ids if self.zone[j].gruppo}
+            c = self._coperte[testo] = frozenset(self.zone[j].nome for j in ids) | altre
+        return c
+
+    # --- ORDINE DI PIANIFICAZIONE ---
+
+    def ordine(self, nomi):
+        """Zone da pianificare per l'elenco nomi: i membri di un gruppo lasciano il posto al
+        gruppo, poi ordine per priorità; le zone senza priorità (o non in registro) seguono
+        nell'ordine dell'elenco."""
+        visti, out = set(), []
+        for k, n in enumerate(nomi):
+            i = self.risolvi(n)
+            if i and self.zone[i].gruppo: i = self.zone[i].gruppo
+            nome = self.zone[i].nome if i else n
+            if nome in visti: continue
+            visti.add(nome)
+            prio = self.zone[i].priorita if i else None
+            out.append((prio if prio is not None else float('inf'), k, nome))
+        return [n for _, _, n in sorted(out)]
+
+# --- CARICAMENTO ---
+
+_cache = {}
+_lock = threading.Lock()
+
+def _leggi(path):
+    t = pd.read_csv(path, dtype=str, keep_default_na=False)
+    t.columns = [str(c).strip() for c in t.columns]
+    mancanti = {'Id', 'Nome'} - set(t.columns)
+    if mancanti: raise ValueError(f"{path}: mancano le colonne {', '.join(sorted(mancanti))}")
+    for c in COLONNE:
+        if c not in t.columns: t[c] = ""
+    return t[COLONNE].apply(lambda s: s.str.strip())
+
+def registro(path=None):
+    """RegistroZone di zone.csv, riletto solo quando il file cambia."""
+    path = os.path.abspath(path or FILE_ZONE)
+    s = os.stat(path)
+    firma = (s.st_mtime_ns, s.st_size)
+    with _lock:
+        voce = _cache.get(path)
+    if voce is None or voce[0] != firma:
+        voce = (firma, RegistroZone(_leggi(path)))
+        with _lock:
+            _cache[path] = voce
+    return voce[1]